@@ -0,0 +1,118 @@
+"""
+Benchmark for collecting examples that request fixtures when using the pytest integration.
+
+Run with::
+
+    python benchmarks/pytest_collect.py [--documents N] [--examples N] [--fixtures N]
+
+It reports the time taken by ``pytest --collect-only`` when the fixture closure is computed
+once for each documentation source file, as it is by Sybil, and when it is computed once for
+each example, along with the speed-up.
+"""
+from argparse import ArgumentParser
+from contextlib import contextmanager, redirect_stdout
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Iterator, Sequence
+
+import pytest
+from _pytest.fixtures import FuncFixtureInfo
+
+from sybil.integration.pytest import SybilFile
+from sybil.python import import_cleanup
+
+# The prompt is substituted in so that Sybil's own doctests don't find these examples:
+EXAMPLE = '''\
+{prompt} x = {i}
+{prompt} x
+{i}
+
+'''
+
+CONFTEST = '''\
+import pytest
+from _pytest.fixtures import FuncFixtureInfo
+from sybil import Sybil
+from sybil.parsers.rest import DocTestParser
+
+{fixtures}
+
+pytest_collect_file = Sybil(
+    parsers=[DocTestParser()], pattern='*.rst', fixtures={names!r},
+).pytest()
+'''
+
+FIXTURE = '''
+@pytest.fixture
+def fixture_{i}({dependency}):
+    return {i}
+'''
+
+
+def write_documents(path: Path, documents: int, examples: int, fixtures: int) -> None:
+    names = [f'fixture_{i}' for i in range(fixtures)]
+    (path / 'conftest.py').write_text(CONFTEST.format(
+        # Each fixture depends on the one before so there's a closure to compute:
+        fixtures=''.join(
+            FIXTURE.format(i=i, dependency=names[i-1] if i else '') for i in range(fixtures)
+        ),
+        names=names[-1:],
+    ))
+    for document in range(documents):
+        text = ''.join(EXAMPLE.format(prompt='>>>', i=i) for i in range(examples))
+        (path / f'doc{document:04d}.rst').write_text(text)
+
+
+@contextmanager
+def per_example_closure() -> Iterator[None]:
+    # Emulate computing the fixture closure for every example by forgetting the
+    # closures already computed each time one is requested:
+    original = SybilFile.fixture_info
+
+    def fixture_info(self: SybilFile, names: Sequence[str]) -> FuncFixtureInfo:
+        self._fixture_infos.clear()
+        return original(self, names)
+
+    SybilFile.fixture_info = fixture_info
+    try:
+        yield
+    finally:
+        SybilFile.fixture_info = original
+
+
+def time_collect(path: Path, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        with import_cleanup(), redirect_stdout(StringIO()):
+            start = perf_counter()
+            pytest.main(['--collect-only', '-q', '-p', 'no:cacheprovider', str(path)])
+            best = min(best, perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--documents', type=int, default=100)
+    parser.add_argument('--examples', type=int, default=200)
+    parser.add_argument('--fixtures', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as directory:
+        path = Path(directory)
+        write_documents(path, args.documents, args.examples, args.fixtures)
+        print(f'{args.documents} documents, {args.examples} examples each, '
+              f'closure of {args.fixtures} fixtures')
+        # Warm up, so that neither timing includes the cost of first imports:
+        time_collect(path, 1)
+        with per_example_closure():
+            baseline = time_collect(path, args.repeats)
+        shared = time_collect(path, args.repeats)
+        print(f'per example  {baseline:8.3f}s')
+        print(f'per file     {shared:8.3f}s  {baseline / shared:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark for parsing documentation source files in worker processes when using the
+unittest integration.
+
+Run with::
+
+    python benchmarks/unittest_parse.py [--documents N] [--examples N]
+
+It reports the time taken to build the test suite with ``parse_processes`` set to each
+power of two up to the number of cores available, along with the speed-up over parsing in
+the current process.
+"""
+import os
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from sybil import Sybil
+from sybil.parsers.rest import DocTestParser, PythonCodeBlockParser, SkipParser
+
+# The prompt is substituted in so that Sybil's own doctests don't find these examples:
+EXAMPLE = '''\
+Some prose that isn't an example.
+
+{prompt} x = {i}
+{prompt} x
+{i}
+
+.. code-block:: python
+
+    assert x == {i}
+
+.. skip: next
+
+{prompt} raise Exception('boom')
+
+'''
+
+
+def write_documents(path: Path, documents: int, examples: int) -> None:
+    for document in range(documents):
+        text = ''.join(EXAMPLE.format(prompt='>>>', i=i) for i in range(examples))
+        (path / f'doc{document:04d}.rst').write_text(text)
+
+
+def time_load(sybil: Sybil, parse_processes: int, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = perf_counter()
+        sybil.unittest(parse_processes=parse_processes)()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--documents', type=int, default=200)
+    parser.add_argument('--examples', type=int, default=50)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--cores', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    cores = args.cores
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+
+    with TemporaryDirectory() as directory:
+        path = Path(directory)
+        write_documents(path, args.documents, args.examples)
+        sybil = Sybil(
+            [DocTestParser(), PythonCodeBlockParser(), SkipParser()],
+            path=directory, pattern='*.rst',
+        )
+        print(f'{args.documents} documents, {args.examples * 4} examples each, {cores} cores')
+        baseline = None
+        for count in counts:
+            duration = time_load(sybil, count, args.repeats)
+            if baseline is None:
+                baseline = duration
+            print(f'parse_processes={count:<3} {duration:8.3f}s  {baseline / duration:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
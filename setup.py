@@ -26,6 +26,9 @@ setup(
     packages=find_packages(exclude=['tests', 'functional_tests']),
     package_data={"sybil": ["py.typed"]},
     python_requires=">=3.9",
+    entry_points={
+        'pytest11': ['sybil = sybil.integration.pytest_plugin'],
+    },
     extras_require=dict(
         pytest=[PYTEST_VERSION_SPEC],
         test=[
@@ -0,0 +1,430 @@
+import marshal
+import pickle
+import sys
+from collections import OrderedDict
+from functools import partial
+from hashlib import sha256
+from io import BytesIO, StringIO
+from pathlib import Path
+from re import Pattern
+from threading import Lock
+from types import CodeType, FunctionType, MethodType, ModuleType
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Union
+from weakref import WeakKeyDictionary
+
+from .document import Document
+from .region import Region
+
+if TYPE_CHECKING:
+    from .sybil import Sybil
+
+#: Bump this when the format of cache entries changes.
+CACHE_FORMAT = 1
+
+SIMPLE_TYPES = (str, bytes, int, float, complex, bool, type(None))
+
+_module_hashes: Dict[str, bytes] = {}
+
+
+def module_hash(name: str) -> bytes:
+    """
+    Return a hash of the source of the named module, or of its name if the module
+    has no source file.
+    """
+    if name not in _module_hashes:
+        digest = sha256(name.encode())
+        filename = getattr(sys.modules.get(name), '__file__', None)
+        if filename:
+            try:
+                digest.update(Path(filename).read_bytes())
+            except OSError:  # pragma: no cover - module file removed while running
+                pass
+        _module_hashes[name] = digest.digest()
+    return _module_hashes[name]
+
+
+class ParserState:
+    """
+    The objects reachable from a set of :term:`parsers <parser>` along with a
+    fingerprint of their configuration.
+
+    The fingerprint covers the values of all the attributes of the objects
+    reachable from the roots supplied, along with the source of every module defining
+    a class or function that is found.
+
+    The objects found are also given stable identifiers so that :class:`~sybil.Region`
+    objects can be pickled with references to them rather than copies of them.
+    """
+
+    def __init__(self, *roots: Any) -> None:
+        self.objects: List[Any] = []
+        self.ids: Dict[int, int] = {}
+        self.modules: Set[str] = set()
+        digest = sha256()
+        for root in roots:
+            self._walk(root, digest)
+        for name in sorted(self.modules):
+            digest.update(module_hash(name))
+        #: A hex digest that changes when the configuration of the parsers changes.
+        self.fingerprint: str = digest.hexdigest()
+
+    def _walk(self, obj: Any, digest: Any) -> None:
+        if isinstance(obj, SIMPLE_TYPES):
+            digest.update(repr(obj).encode())
+            return
+        if isinstance(obj, Pattern):
+            digest.update(f'<pattern {obj.pattern!r} {obj.flags}>'.encode())
+            return
+        index = self.ids.get(id(obj))
+        if index is not None:
+            digest.update(f'<ref {index}>'.encode())
+            return
+        self.ids[id(obj)] = len(self.objects)
+        self.objects.append(obj)
+
+        if isinstance(obj, ModuleType):
+            self.modules.add(obj.__name__)
+            digest.update(f'<module {obj.__name__}>'.encode())
+            return
+        if isinstance(obj, (type, FunctionType)):
+            self.modules.add(obj.__module__)
+            digest.update(f'<{obj.__module__}.{obj.__qualname__}>'.encode())
+            if isinstance(obj, FunctionType):
+                self._walk(obj.__defaults__, digest)
+                self._walk(obj.__kwdefaults__, digest)
+                for cell in obj.__closure__ or ():
+                    self._walk(cell.cell_contents, digest)
+            return
+
+        type_ = type(obj)
+        self.modules.add(type_.__module__)
+        digest.update(f'<{type_.__module__}.{type_.__qualname__}>'.encode())
+        if isinstance(obj, MethodType):
+            self._walk(obj.__func__, digest)
+            self._walk(obj.__self__, digest)
+        elif isinstance(obj, partial):
+            self._walk(obj.func, digest)
+            self._walk(obj.args, digest)
+            self._walk(obj.keywords, digest)
+        elif isinstance(obj, (list, tuple)):
+            for item in obj:
+                self._walk(item, digest)
+        elif isinstance(obj, (set, frozenset)):
+            for item in sorted(obj, key=repr):
+                self._walk(item, digest)
+        elif isinstance(obj, dict):
+            for key, value in obj.items():
+                self._walk(key, digest)
+                self._walk(value, digest)
+        elif hasattr(obj, '__dict__'):
+            for name, value in sorted(vars(obj).items()):
+                self._walk(name, digest)
+                self._walk(value, digest)
+
+    def dumps(self, regions: List[Region]) -> bytes:
+        """
+        Pickle the supplied regions, storing references to any objects reachable
+        from the parsers rather than copies of them.
+        """
+        buffer = BytesIO()
+        RegionPickler(buffer, self).dump(regions)
+        return buffer.getvalue()
+
+    def loads(self, data: bytes) -> List[Region]:
+        """
+        Unpickle regions previously pickled with :meth:`dumps`.
+        """
+        regions: List[Region] = RegionUnpickler(BytesIO(data), self).load()
+        return regions
+
+
+class RegionPickler(pickle.Pickler):
+
+    def __init__(self, file: BytesIO, state: ParserState) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.state = state
+
+    def persistent_id(self, obj: Any) -> Optional[int]:
+        return self.state.ids.get(id(obj))
+
+
+class RegionUnpickler(pickle.Unpickler):
+
+    def __init__(self, file: BytesIO, state: ParserState) -> None:
+        super().__init__(file)
+        self.state = state
+
+    def persistent_load(self, pid: Any) -> Any:
+        return self.state.objects[pid]
+
+
+_parser_states: 'WeakKeyDictionary[Sybil, ParserState]' = WeakKeyDictionary()
+
+
+def parser_state(sybil: 'Sybil') -> ParserState:
+    """
+    Return the :class:`ParserState` for the supplied :class:`~sybil.Sybil`.
+    This is computed the first time it is needed and re-used thereafter.
+    """
+    state = _parser_states.get(sybil)
+    if state is None:
+        state = _parser_states[sybil] = ParserState(
+            sybil.parsers, list(sybil.document_types.values()), Region
+        )
+    return state
+
+
+def read_text(raw: bytes, encoding: str) -> str:
+    # Decode in the same way as opening the file in text mode would:
+    return StringIO(raw.decode(encoding), newline=None).read()
+
+
+class ParseCache:
+    """
+    An on-disk cache of the :class:`~sybil.Region` objects parsed from documentation
+    source files, such that unchanged files do not need to be lexed and parsed again.
+
+    An entry in the cache will only be used if all of the following are unchanged since it
+    was stored:
+
+    - the bytes of the documentation source file.
+    - the :class:`~sybil.Document` type and encoding used for the file.
+    - the attributes of the :class:`~sybil.Sybil`'s parsers, and those of any objects
+      reachable from them.
+    - the source of any module that defines a class or function reachable from those parsers
+      or the :class:`~sybil.Document` types.
+    - the version of Python in use.
+
+    Regions containing objects that cannot be pickled, or that cannot be written to
+    the directory, will not be cached.
+
+    :param directory:
+        The directory in which cache entries will be stored. It will be created if it
+        does not exist.
+    """
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory: Path = Path(directory)
+        #: The number of documents whose regions were loaded from the cache.
+        self.hits: int = 0
+        #: The number of documents that had to be parsed.
+        self.misses: int = 0
+        #: The number of documents whose regions could not be stored in the cache.
+        self.uncacheable: int = 0
+
+    def __repr__(self) -> str:
+        return (
+            f'<ParseCache {self.directory}: {self.hits} hits, {self.misses} misses, '
+            f'{self.uncacheable} uncacheable>'
+        )
+
+    def key(self, raw: bytes, document_type: type, sybil: 'Sybil') -> str:
+        digest = sha256()
+        for part in (
+            str(CACHE_FORMAT),
+            sys.version,
+            f'{document_type.__module__}.{document_type.__qualname__}',
+            sybil.encoding,
+            parser_state(sybil).fingerprint,
+        ):
+            digest.update(part.encode())
+            digest.update(b'\0')
+        digest.update(raw)
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.directory / f'{key}.pickle'
+
+    def load(self, key: str, sybil: 'Sybil') -> Optional[List[Region]]:
+        path = self.entry_path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            return parser_state(sybil).loads(data)
+        except Exception:
+            # A corrupt or incompatible entry, get rid of it:
+            path.unlink(missing_ok=True)
+            return None
+
+    def store(self, key: str, document: Document, sybil: 'Sybil') -> None:
+        regions = [region for _, region in document.regions]
+        try:
+            data = parser_state(sybil).dumps(regions)
+        except Exception:
+            self.uncacheable += 1
+            return
+        path = self.entry_path(key)
+        temp = path.with_suffix(f'.{id(self)}.tmp')
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp.write_bytes(data)
+            temp.replace(path)
+        except OSError:
+            # A cache that can't be written to, such as when it is read-only or full,
+            # must not stop documents being parsed:
+            self.uncacheable += 1
+            try:
+                temp.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def parse(self, sybil: 'Sybil', path: Path) -> Document:
+        """
+        Return the :class:`~sybil.Document` for the supplied path as parsed by
+        the supplied :class:`~sybil.Sybil`, using the cache where possible.
+        """
+        document_type = sybil.document_type_for(path)
+        raw = path.read_bytes()
+        key = self.key(raw, document_type, sybil)
+        regions = self.load(key, sybil)
+        if regions is not None:
+            self.hits += 1
+            document = document_type(read_text(raw, sybil.encoding), str(path))
+            document.regions = [(region.start, region) for region in regions]
+            return document
+        self.misses += 1
+        document = document_type.parse(str(path), *sybil.parsers, encoding=sybil.encoding)
+        # Only store if the file hasn't changed since we computed the key:
+        if document.text == read_text(raw, sybil.encoding):
+            self.store(key, document, sybil)
+        return document
+
+    def clear(self) -> None:
+        """
+        Remove all entries from this cache.
+        """
+        if self.directory.exists():
+            for path in self.directory.glob('*.pickle'):
+                path.unlink()
+
+
+class CodeCache:
+    """
+    A cache of the code objects compiled from the source of :term:`examples <example>`,
+    such that the same source does not need to be compiled more than once.
+
+    Code objects are kept in memory and, if a ``directory`` is set, are also stored
+    there using :mod:`marshal`, in the same way as ``__pycache__``, so that unchanged
+    examples are not compiled again in later runs.
+
+    Entries are keyed on a hash of the source, the path and line number it is compiled with
+    and the compiler flags, along with the version of Python in use, so line numbers in
+    tracebacks remain correct.
+
+    :param directory:
+        The directory in which code objects will be stored. It will be created if it
+        does not exist.
+
+    :param maxsize:
+        The maximum number of code objects kept in memory. Once reached, those used least
+        recently are discarded.
+    """
+
+    def __init__(
+            self, directory: Union[str, Path, None] = None, maxsize: int = 1024
+    ) -> None:
+        self.directory: Optional[Path] = None if directory is None else Path(directory)
+        self.maxsize = maxsize
+        self.code: 'OrderedDict[str, CodeType]' = OrderedDict()
+        self.lock = Lock()
+        #: The number of code objects found in memory or on disk.
+        self.hits: int = 0
+        #: The number of code objects that had to be compiled.
+        self.misses: int = 0
+
+    def __repr__(self) -> str:
+        return f'<CodeCache {self.directory}: {self.hits} hits, {self.misses} misses>'
+
+    @staticmethod
+    def key(source: str, path: str, line: int, flags: int) -> str:
+        digest = sha256()
+        for part in (str(CACHE_FORMAT), sys.version, path, str(line), str(flags), source):
+            digest.update(part.encode('utf-8', 'surrogatepass'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / f'{key}.code'
+
+    def load(self, key: str) -> Optional[CodeType]:
+        if self.directory is None:
+            return None
+        path = self.entry_path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            code = marshal.loads(data)
+        except Exception:
+            code = None
+        if not isinstance(code, CodeType):
+            # A corrupt entry, get rid of it:
+            path.unlink(missing_ok=True)
+            return None
+        return code
+
+    def store(self, key: str, code: CodeType) -> None:
+        if self.directory is None:
+            return
+        path = self.entry_path(key)
+        temp = path.with_suffix(f'.{id(self)}.tmp')
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp.write_bytes(marshal.dumps(code))
+            temp.replace(path)
+        except OSError:
+            # As with ParseCache, a cache that can't be written to must not stop examples
+            # being evaluated:
+            try:
+                temp.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def compile(self, source: str, path: str, line: int, flags: int) -> CodeType:
+        """
+        Return the code object for the supplied source, compiled in ``'exec'`` mode
+        using the supplied compiler flags such that line numbers start at ``line + 1``
+        in the file at ``path``.
+        """
+        key = self.key(source, path, line, flags)
+        with self.lock:
+            code = self.code.get(key)
+            if code is not None:
+                self.code.move_to_end(key)
+        if code is None:
+            code = self.load(key)
+            if code is None:
+                # Imported here as the evaluator uses this cache:
+                from .evaluators.python import pad
+                code = compile(pad(source, line), path, 'exec', flags=flags, dont_inherit=True)
+                self.misses += 1
+                self.store(key, code)
+            else:
+                self.hits += 1
+            with self.lock:
+                self.code[key] = code
+                while len(self.code) > self.maxsize:
+                    self.code.popitem(last=False)
+        else:
+            self.hits += 1
+        return code
+
+    def clear(self) -> None:
+        """
+        Remove all entries from this cache, both in memory and on disk.
+        """
+        with self.lock:
+            self.code.clear()
+        if self.directory is not None and self.directory.exists():
+            for path in self.directory.glob('*.code'):
+                path.unlink()
+
+
+#: The :class:`CodeCache` used by :class:`~sybil.evaluators.python.PythonEvaluator`.
+#: This only stores a limited number of code objects in memory unless its
+#: :attr:`~CodeCache.directory` is set.
+code_cache = CodeCache()
@@ -0,0 +1,297 @@
+import ast
+import re
+import sys
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+IMPORT_PATTERN = re.compile(
+    r'^[ \t]*(?:(?:>>>|\.\.\.)[ \t]+)?'
+    r'(?:from[ \t]+(?P<from>\.*[\w.]*)[ \t]+import[ \t]+(?P<names>[\w, \t()*]+)'
+    r'|import[ \t]+(?P<modules>[\w., \t]+))',
+    re.MULTILINE,
+)
+
+State = List[object]
+
+
+def file_state(path: Path) -> Optional[State]:
+    """
+    Return the modification time, size and content hash of the supplied file,
+    or ``None`` if it does not exist.
+    """
+    try:
+        stat = path.stat()
+        digest = sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size, digest]
+
+
+class Manifest:
+    """
+    A record of the state of files when examples from them last passed, along with the
+    state of the modules they import at that time.
+
+    :param entries:
+        A mapping of absolute path to ``[mtime_ns, size, sha256]``, as stored in
+        the pytest cache.
+
+    :param imports:
+        A mapping of the absolute path of each document to a mapping, like ``entries``, of
+        the modules it imported when its examples last passed, as stored in the pytest cache.
+    """
+
+    def __init__(
+            self,
+            entries: Optional[Dict[str, State]] = None,
+            imports: Optional[Dict[str, Dict[str, State]]] = None,
+    ) -> None:
+        self.entries: Dict[str, State] = dict(entries or {})
+        self.imports: Dict[str, Dict[str, State]] = {
+            document: dict(modules) for document, modules in (imports or {}).items()
+        }
+
+    def _entries(self, document: Optional[Path]) -> Dict[str, State]:
+        if document is None:
+            return self.entries
+        return self.imports.setdefault(str(document), {})
+
+    def changed(self, path: Path, document: Optional[Path] = None) -> bool:
+        """
+        Return ``True`` if the supplied file has changed since it was recorded, or was never
+        recorded. The content hash is only checked if the modification time or size differ.
+        If ``document`` is supplied, the file is a module and the state recorded when that
+        document's examples last passed is used.
+        """
+        entries = self._entries(document)
+        entry = entries.get(str(path))
+        if entry is None:
+            return True
+        try:
+            stat = path.stat()
+        except OSError:
+            return True
+        if [stat.st_mtime_ns, stat.st_size] == entry[:2]:
+            return False
+        state = file_state(path)
+        if state is None or state[2] != entry[2]:
+            return True
+        # Only touched, so remember the new modification time:
+        entries[str(path)] = state
+        return False
+
+    def record(self, path: Path, document: Optional[Path] = None) -> None:
+        state = file_state(path)
+        entries = self._entries(document)
+        if state is None:
+            entries.pop(str(path), None)
+        else:
+            entries[str(path)] = state
+
+    def forget(self, path: Path) -> None:
+        self.entries.pop(str(path), None)
+        self.imports.pop(str(path), None)
+
+    def save(self) -> Dict[str, Any]:
+        """
+        Return the files and imports recorded, to be stored in the pytest cache.
+        """
+        imports = {document: modules for document, modules in self.imports.items() if modules}
+        return {'files': self.entries, 'imports': imports}
+
+
+def imported_modules(text: str, python: bool, package: str = '') -> Set[str]:
+    """
+    Return the names of the modules imported by the supplied source.
+    If ``python`` is true, the source is parsed as Python, otherwise import statements
+    are found wherever they appear, such as in doctests or code blocks.
+    ``package`` is used to resolve relative imports.
+    """
+    names: Set[str] = set()
+    if python:
+        try:
+            tree = ast.parse(text)
+        except SyntaxError:
+            tree = None
+        if tree is not None:
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    names.update(alias.name for alias in node.names)
+                elif isinstance(node, ast.ImportFrom):
+                    base = resolve('.' * node.level + (node.module or ''), package)
+                    if base:
+                        names.add(base)
+                        names.update(f'{base}.{alias.name}' for alias in node.names)
+            return names
+    for match in IMPORT_PATTERN.finditer(text):
+        if match['modules']:
+            for module in match['modules'].split(','):
+                names.add(module.split()[0] if module.split() else '')
+        else:
+            base = resolve(match['from'], package)
+            if base:
+                names.add(base)
+                for name in match['names'].strip('()').split(','):
+                    name = name.split()[0] if name.split() else ''
+                    if name and name != '*':
+                        names.add(f'{base}.{name}')
+    names.discard('')
+    return names
+
+
+def resolve(name: str, package: str) -> str:
+    level = len(name) - len(name.lstrip('.'))
+    if not level:
+        return name
+    parts = package.split('.') if package else []
+    if level - 1 > len(parts):
+        return ''
+    base = parts[:len(parts) - (level - 1)]
+    rest = name[level:]
+    return '.'.join(base + ([rest] if rest else []))
+
+
+def module_path(name: str, search_path: Sequence[Path]) -> Optional[Path]:
+    """
+    Find the source file for the named module in the supplied search path without
+    importing anything.
+    """
+    parts = name.split('.')
+    for directory in search_path:
+        candidate = directory.joinpath(*parts)
+        for path in (candidate.with_name(parts[-1] + '.py'), candidate / '__init__.py'):
+            if path.is_file():
+                return path
+    return None
+
+
+def module_name(path: Path, search_path: Sequence[Path]) -> str:
+    for directory in search_path:
+        try:
+            relative = path.relative_to(directory)
+        except ValueError:
+            continue
+        parts = list(relative.with_suffix('').parts)
+        if parts and parts[-1] == '__init__':
+            parts.pop()
+        return '.'.join(parts)
+    return ''
+
+
+class Changes:
+    """
+    Decides which documentation source files should be collected when only examples
+    from changed documents are to be run.
+
+    :param root:
+        Only files within this directory are considered when following imports.
+
+    :param manifest:
+        The :class:`Manifest` used to find changed files. Ignored if ``files`` is supplied.
+
+    :param files:
+        If supplied, the files to treat as changed.
+
+    :param imports:
+        If true, documents that import, directly or indirectly, a module whose source
+        file has changed are also collected.
+    """
+
+    def __init__(
+            self,
+            root: Path,
+            manifest: Optional[Manifest] = None,
+            files: Optional[Iterable[Path]] = None,
+            imports: bool = False,
+    ) -> None:
+        self.root = root
+        self.manifest = manifest if manifest is not None else Manifest()
+        self.files = None if files is None else {path.absolute() for path in files}
+        self.imports = imports
+        self.search_path = [root] + [
+            Path(entry).absolute() for entry in sys.path
+            if entry and Path(entry).absolute().is_relative_to(root)
+        ]
+        self._imports: Dict[Path, Set[Path]] = {}
+        self._changed: Dict[Path, bool] = {}
+        #: Documents whose examples all passed, and the modules they import.
+        self.passed: Set[Path] = set()
+        #: Documents where at least one example failed.
+        self.failed: Set[Path] = set()
+
+    def file_changed(self, path: Path) -> bool:
+        if path not in self._changed:
+            if self.files is not None:
+                self._changed[path] = path in self.files
+            else:
+                self._changed[path] = self.manifest.changed(path)
+        return self._changed[path]
+
+    def module_changed(self, module: Path, document: Path) -> bool:
+        """
+        Return ``True`` if the supplied module has changed since the supplied document's
+        examples last passed.
+        """
+        if self.files is not None:
+            return self.file_changed(module)
+        return self.manifest.changed(module, document)
+
+    def direct_imports(self, path: Path) -> Set[Path]:
+        if path not in self._imports:
+            try:
+                text = path.read_text()
+            except (OSError, UnicodeDecodeError):
+                text = ''
+            name = module_name(path, self.search_path)
+            package = name if path.name == '__init__.py' else name.rpartition('.')[0]
+            found = set()
+            for module in imported_modules(text, python=path.suffix == '.py', package=package):
+                source = module_path(module, self.search_path)
+                if source is not None and source != path:
+                    found.add(source)
+            self._imports[path] = found
+        return self._imports[path]
+
+    def imported(self, path: Path) -> Set[Path]:
+        """
+        Return the source files of all the local modules imported, directly or indirectly,
+        by the supplied file.
+        """
+        seen: Set[Path] = set()
+        pending = [path]
+        while pending:
+            for module in self.direct_imports(pending.pop()):
+                if module not in seen:
+                    seen.add(module)
+                    pending.append(module)
+        seen.discard(path)
+        return seen
+
+    def __call__(self, path: Path) -> bool:
+        """
+        Return ``True`` if the supplied documentation source file should be collected.
+        """
+        if self.file_changed(path):
+            return True
+        if self.imports:
+            return any(self.module_changed(module, path) for module in self.imported(path))
+        return False
+
+    def save(self) -> Dict[str, Any]:
+        """
+        Record the current state of documents that passed, along with the modules
+        they import, and forget documents that failed so they are collected next time.
+        The state of the modules is recorded for each document, so that a module changing
+        only stops documents that have passed since the change from being collected.
+        Returns what is to be stored.
+        """
+        for path in self.passed - self.failed:
+            self.manifest.record(path)
+            if self.imports:
+                self.manifest.imports.pop(str(path), None)
+                for module in self.imported(path):
+                    self.manifest.record(module, document=path)
+        for path in self.failed:
+            self.manifest.forget(path)
+        return self.manifest.save()
@@ -1,20 +1,34 @@
 import ast
 import re
+from array import array
 from ast import AsyncFunctionDef, FunctionDef, ClassDef, Constant, Module, Expr
-from bisect import bisect
-from collections.abc import Iterator
+from bisect import bisect, bisect_right
+from collections.abc import Iterable, Iterator
+from functools import partial
 from io import open
 from itertools import chain
 from pathlib import Path
-from typing import Any, Dict
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
 from typing import List, Tuple
 
 from .example import Example, SybilFailure, NotEvaluated
 from .python import import_path
 from .region import Region
-from .text import LineNumberOffsets
+from .text import LineIndex
+from .timing import ParserTiming
 from .typing import Parser, Evaluator
 
+if TYPE_CHECKING:
+    from .profiling import Profiler
+
+
+def clear_scans() -> None:
+    # The scans of the text of the document just parsed are no longer needed and would keep
+    # that text alive. Imported here as the scanning module imports this one:
+    from .parsers.abstract.scanning import SCANS
+    SCANS.clear()
+
 
 class Document:
     """
@@ -28,8 +42,8 @@ class Document:
     """
 
     def __init__(self, text: str, path: str) -> None:
-        #: This is the text of the documentation source file.
-        self.text: str = text
+        self._text: Optional[str] = text
+        self._encoding = 'utf-8'
         #: This is the absolute path of the documentation source file.
         self.path: str = path
         self.end: int = len(text)
@@ -38,6 +52,60 @@ class Document:
         #: this document will be evaluated.
         self.namespace: Dict[str, Any] = {}
         self.evaluators: list[Evaluator] = []
+        #: If set, the :class:`~sybil.profiling.Profiler` used when evaluating examples
+        #: from this document.
+        self.profiler: Optional['Profiler'] = None
+        self._teardowns: List[Callable[[], None]] = []
+        #: The time, in seconds, taken to read this document's source file, if it was
+        #: read by :meth:`parse`.
+        self.read_time: Optional[float] = None
+        #: The time taken by each parser when this document was parsed by :meth:`parse`,
+        #: along with the number of regions each parser found.
+        self.parser_timings: List[ParserTiming] = []
+        self._line_index: Optional[Tuple[str, LineIndex]] = None
+        self._region_index: Optional[
+            Tuple[List[Tuple[int, Region]], int, 'array[int]', 'array[int]']
+        ] = None
+
+    @property
+    def text(self) -> str:
+        """
+        This is the text of the documentation source file. If it has been
+        :meth:`released <release>`, it is read from :attr:`path` again.
+        """
+        text = self._text
+        if text is None:
+            with open(self.path, encoding=self._encoding) as source:
+                text = self._text = source.read()
+        return text
+
+    @text.setter
+    def text(self, text: str) -> None:
+        self._text = text
+
+    def release(self, encoding: str = 'utf-8') -> None:
+        """
+        Release this document's :attr:`text`, along with the :attr:`~sybil.Region.lexemes`
+        of its regions, once its examples have been collected. Only what is needed to
+        evaluate those examples and report their failures is kept.
+        If the text is needed again, it is read from :attr:`path` using the
+        supplied encoding.
+        """
+        self._text = None
+        self._encoding = encoding
+        self._line_index = None
+        for _, region in self.regions:
+            region.lexemes = {}
+
+    @property
+    def line_index(self) -> LineIndex:
+        """
+        The :class:`~sybil.text.LineIndex` for the :attr:`text` of this document.
+        This is built the first time it is needed.
+        """
+        if self._line_index is None or self._line_index[0] is not self.text:
+            self._line_index = self.text, LineIndex(self.text)
+        return self._line_index[1]
 
     @classmethod
     def parse(cls, path: str, *parsers: Parser, encoding: str = 'utf-8') -> 'Document':
@@ -45,22 +113,45 @@ class Document:
         Read the text from the supplied path and parse it into a document
         using the supplied parsers.
         """
+        start = perf_counter()
         with open(path, encoding=encoding) as source:
             text = source.read()
         document = cls(text, path)
-        for parser in parsers:
-            for region in parser(document):
-                document.add(region)
+        document.read_time = perf_counter() - start
+        regions: List[Region] = []
+        try:
+            for parser in parsers:
+                start = perf_counter()
+                count = len(regions)
+                for region in parser(document):
+                    regions.append(region)
+                document.parser_timings.append(
+                    ParserTiming(parser, perf_counter() - start, len(regions) - count)
+                )
+        except Exception:
+            # Check the regions found before the error, so that an overlap between them is
+            # reported first, as it would be if each region was added as it was found:
+            document.add_regions(regions)
+            raise
+        finally:
+            clear_scans()
+        document.add_regions(regions)
         return document
 
+    @property
+    def parse_time(self) -> float:
+        """
+        The total time, in seconds, taken to read and parse this document, as far as
+        it is known.
+        """
+        return (self.read_time or 0) + sum(timing.seconds for timing in self.parser_timings)
+
     def line_column(self, position: int) -> str:
         """
         Return a line and column location in this document based on a character
         position.
         """
-        line = self.text.count('\n', 0, position)+1
-        col = position - self.text.rfind('\n', 0, position)
-        return 'line {}, column {}'.format(line, col)
+        return 'line {}, column {}'.format(*self.line_index.line_column(position))
 
     def region_details(self, region: Region) -> str:
         return '{!r} from {} to {}'.format(
@@ -84,6 +175,7 @@ class Document:
             raise ValueError('{} goes beyond end of document'.format(
                 self.region_details(region)
             ))
+        self._region_index = None
         entry = (region.start, region)
         index = bisect(self.regions, entry)
         if index > 0:
@@ -96,19 +188,64 @@ class Document:
                 self.raise_overlap(region, next)
         self.regions.insert(index, entry)
 
+    def add_regions(self, regions: Iterable[Region]) -> None:
+        """
+        Add all the supplied regions to this document, sorting them once and checking
+        for overlaps in a single pass rather than inserting each in turn.
+
+        The resulting order, and any :class:`ValueError` raised, are the same as if
+        each region had been passed to :meth:`add` in the order supplied. If an error
+        is raised, no regions are added.
+        """
+        new = list(regions)
+        self._region_index = None
+        # Regions with the same start end up in reverse order of being added, as with add():
+        keyed = [((start, 0, i), (start, region)) for i, (start, region) in enumerate(self.regions)]
+        keyed.extend(
+            ((region.start, -1, -i), (region.start, region)) for i, region in enumerate(new)
+        )
+        keyed.sort(key=lambda item: item[0])
+        entries = [entry for _, entry in keyed]
+        valid = all(region.start >= 0 and region.end <= self.end for region in new) and all(
+            previous.end <= next.start for (_, previous), (_, next) in zip(entries, entries[1:])
+        )
+        if not valid:
+            # Add each region in turn so the error matches that from add():
+            existing = list(self.regions)
+            try:
+                for region in new:
+                    self.add(region)
+            except ValueError:
+                self.regions[:] = existing
+                raise
+            return
+        self.regions[:] = entries
+
+    def region_at(self, position: int) -> Optional[Region]:
+        """
+        Return the region containing the supplied character position, or ``None`` if
+        no region does. Regions contain their start but not their end.
+        """
+        regions = self.regions
+        index = self._region_index
+        if index is None or index[0] is not regions or index[1] != len(regions):
+            starts = array('q', (region.start for _, region in regions))
+            ends = array('q', (region.end for _, region in regions))
+            index = self._region_index = regions, len(regions), starts, ends
+        _, _, starts, ends = index
+        i = bisect_right(starts, position) - 1
+        if i >= 0 and position < ends[i]:
+            return regions[i][1]
+        return None
+
     def examples(self) -> Iterator[Example]:
         """
         Return the :term:`examples <example>` contained within this document.
         """
-        line = 1
-        place = 0
+        line_index = self.line_index
         for _, region in self.regions:
-            line += self.text.count('\n', place, region.start)
-            line_start = self.text.rfind('\n', place, region.start)
-            place = region.start
-            yield Example(self,
-                          line, region.start-line_start,
-                          region, self.namespace)
+            line, column = line_index.line_column(region.start)
+            yield Example(self, line, column, region, self.namespace)
 
     def __iter__(self) -> Iterator[Example]:
         return self.examples()
@@ -136,10 +273,37 @@ class Document:
         if evaluator in self.evaluators:
             self.evaluators.remove(evaluator)
 
+    def add_teardown(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callable to be called with no arguments after all the examples from this
+        document have been evaluated and any ``teardown`` passed to :class:`~sybil.Sybil`
+        has been called. This allows evaluators to release resources they have created for
+        this document.
+        """
+        self._teardowns.append(callback)
+
+    def teardown(self) -> None:
+        """
+        Call the callables registered with :meth:`add_teardown`, most recently registered
+        first. Each is only called once.
+        """
+        while self._teardowns:
+            self._teardowns.pop()()
+
     def evaluate(self, example: Example, evaluator: Evaluator) -> None:
 
         __tracebackhide__ = True
 
+        profiler = self.profiler
+        if profiler is not None:
+            # Evaluate without the profiler, but from within it:
+            self.profiler = None
+            try:
+                profiler(example, partial(self.evaluate, example, evaluator))
+            finally:
+                self.profiler = profiler
+            return
+
         for current_evaluator in chain(reversed(self.evaluators), (evaluator,)):
             try:
                 result = current_evaluator(example)
@@ -187,7 +351,7 @@ class PythonDocStringDocument(PythonDocument):
 
     @staticmethod
     def extract_docstrings(python_source_code: str) -> Iterator[Tuple[int, int, str]]:
-        line_offsets = LineNumberOffsets(python_source_code)
+        line_index = LineIndex(python_source_code)
         for node in ast.walk(ast.parse(python_source_code)):
             if not isinstance(node, (AsyncFunctionDef, FunctionDef, ClassDef, Module)):
                 continue
@@ -200,10 +364,10 @@ class PythonDocStringDocument(PythonDocument):
                 continue
             if text is Ellipsis:
                 continue
-            node_start = line_offsets.get(docstring.lineno-1, docstring.col_offset)
+            node_start = line_index.offset(docstring.lineno-1, docstring.col_offset)
             end_lineno = docstring.end_lineno or 1
             end_col_offset = docstring.end_col_offset or 0
-            node_end = line_offsets.get(end_lineno-1, end_col_offset)
+            node_end = line_index.offset(end_lineno-1, end_col_offset)
             punc = DOCSTRING_PUNCTUATION.match(python_source_code, node_start, node_end)
             punc_size = len(punc.group(1))
             start = punc.end()
@@ -216,13 +380,29 @@ class PythonDocStringDocument(PythonDocument):
         Read the text from the supplied path to a Python source file and parse any docstrings
         it contains into a document using the supplied parsers.
         """
+        read_start = perf_counter()
         with open(path, encoding=encoding) as source:
             document = cls(source.read(), path)
+        document.read_time = perf_counter() - read_start
+        timings = [ParserTiming(parser) for parser in parsers]
+        regions: List[Region] = []
+        try:
             for start, end, text in cls.extract_docstrings(document.text):
                 docstring_document = cls(text, path)
-                for parser in parsers:
+                for parser, timing in zip(parsers, timings):
+                    parser_start = perf_counter()
                     for region in parser(docstring_document):
                         region.start += start
                         region.end += start
-                        document.add(region)
+                        regions.append(region)
+                        timing.regions += 1
+                    timing.seconds += perf_counter() - parser_start
+        except Exception:
+            # As in Document.parse(), an overlap found before the error is reported first:
+            document.add_regions(regions)
+            raise
+        finally:
+            clear_scans()
+        document.parser_timings = timings
+        document.add_regions(regions)
         return document
@@ -0,0 +1,51 @@
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class Durations:
+    """
+    A record of how long the examples from each documentation source file took to run,
+    so that the slowest files can be run first.
+
+    :param entries:
+        A mapping of absolute path to the total number of seconds taken to set up, run and
+        tear down the examples from that file, as stored in the pytest cache.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, float]] = None) -> None:
+        self.entries: Dict[str, float] = dict(entries or {})
+        self.current: Dict[str, float] = {}
+
+    def add(self, path: str, seconds: float) -> None:
+        """
+        Add time taken by an example from the supplied file during this test run.
+        """
+        self.current[path] = self.current.get(path, 0.0) + seconds
+
+    def estimate(self, path: Path) -> Optional[float]:
+        """
+        Return the number of seconds the examples from the supplied file took to run
+        when last recorded, or ``None`` if they have never been recorded.
+        """
+        return self.entries.get(str(path))
+
+    def order(self, paths: Iterable[Path]) -> List[Path]:
+        """
+        Return the supplied paths ordered so that those whose examples took longest to run
+        come first. Paths that have never been recorded may be slow, so they come before
+        all the others. Otherwise, the order in which the paths were supplied is kept.
+        """
+        def key(path: Path) -> float:
+            estimate = self.estimate(path)
+            return -float('inf') if estimate is None else -estimate
+        return sorted(paths, key=key)
+
+    def save(self) -> Dict[str, float]:
+        """
+        Return the entries to be stored in the pytest cache, with those for files
+        run during this test run replaced.
+        """
+        entries = dict(self.entries)
+        entries.update(self.current)
+        return entries
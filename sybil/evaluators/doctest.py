@@ -1,12 +1,14 @@
+from bisect import bisect_left
 from doctest import (
     DocTest as BaseDocTest,
     DocTestRunner as BaseDocTestRunner,
     Example as BaseDocTestExample,
+    REPORT_ONLY_FIRST_FAILURE,
     set_unittest_reportflags,
 )
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
-from sybil import Example
+from sybil import Document, Example, Region
 
 
 class DocTest(BaseDocTest):
@@ -37,9 +39,57 @@ class DocTestRunner(BaseDocTestRunner):
             optionflags=optionflags,
         )
 
+        #: When running a batch, the output for each example started, keyed by
+        #: the example's id.
+        self.outputs: Optional[Dict[int, List[str]]] = None
+
     def _failure_header(self, test: DocTest, example: BaseDocTestExample) -> str:
         return ''
 
+    def _out(self, out: Callable[[str], Any], example: BaseDocTestExample) -> Callable[[str], Any]:
+        if self.outputs is None:
+            return out
+        return self.outputs[id(example)].append
+
+    def report_start(self, out: Callable[[str], Any], test: BaseDocTest,
+                     example: BaseDocTestExample) -> None:
+        if self.outputs is not None:
+            self.outputs[id(example)] = []
+        super().report_start(self._out(out, example), test, example)
+
+    def report_success(self, out: Callable[[str], Any], test: BaseDocTest,
+                       example: BaseDocTestExample, got: str) -> None:
+        super().report_success(self._out(out, example), test, example, got)
+
+    def report_failure(self, out: Callable[[str], Any], test: BaseDocTest,
+                       example: BaseDocTestExample, got: str) -> None:
+        super().report_failure(self._out(out, example), test, example, got)
+
+    def report_unexpected_exception(self, out: Callable[[str], Any], test: BaseDocTest,
+                                    example: BaseDocTestExample, exc_info: Any) -> None:
+        super().report_unexpected_exception(self._out(out, example), test, example, exc_info)
+
+    def run_batch(self, test: DocTest) -> List[Optional[str]]:
+        """
+        Run all the examples in the supplied test, returning the output for each,
+        or ``None`` for examples that were not started, such as those following
+        a failure when ``FAIL_FAST`` is used.
+        """
+        optionflags = self.optionflags
+        # Each example should be reported on as if it was run on its own:
+        self.optionflags &= ~REPORT_ONLY_FIRST_FAILURE
+        self.outputs = {}
+        try:
+            self.run(test, clear_globs=False)
+            outputs = self.outputs
+        finally:
+            self.outputs = None
+            self.optionflags = optionflags
+        return [
+            ''.join(outputs[id(example)]) if id(example) in outputs else None
+            for example in test.examples
+        ]
+
 
 class DocTestEvaluator:
     """
@@ -50,13 +100,50 @@ class DocTestEvaluator:
     :param optionflags:
         :ref:`doctest option flags<option-flags-and-directives>` to use
         when evaluating examples.
+
+    :param batch:
+        If ``True``, when an example is evaluated, it and any examples from the regions that
+        immediately follow it in the document and use this evaluator are run together as one
+        :class:`~doctest.DocTest`. The outcome of each following example is then reported
+        when that example is evaluated. Batches are only run when no other evaluators have
+        been :meth:`pushed <sybil.Document.push_evaluator>` onto the document. If any other
+        example is evaluated before all the examples in a batch have been reported on,
+        including an example from the batch being evaluated again, the outcomes that have
+        yet to be reported on are discarded and those examples are run again when evaluated.
     """
 
-    def __init__(self, optionflags: int = 0) -> None:
+    def __init__(self, optionflags: int = 0, batch: bool = False) -> None:
         self.runner = DocTestRunner(optionflags)
+        self.batch = batch
+        #: The outcomes of batched examples that have yet to be reported on.
+        self.pending: Dict[Document, Dict[Region, str]] = {}
 
-    def __call__(self, sybil_example: Example) -> str:
-        example = sybil_example.parsed
+    def following(self, sybil_example: Example) -> List[Region]:
+        """
+        Return the region of the supplied example along with those of any examples
+        that immediately follow it in the document and use this evaluator.
+        """
+        regions = sybil_example.document.regions
+        region = sybil_example.region
+        index = bisect_left(regions, (region.start,))
+        while regions[index][1] is not region:
+            index += 1
+        batch = []
+        for _, region in regions[index:]:
+            if region.evaluator is not self:
+                break
+            batch.append(region)
+        return batch
+
+    def discard(self, document: Document) -> None:
+        """
+        Discard the outcomes of batched examples from the supplied document that have
+        yet to be reported on.
+        """
+        self.pending.pop(document, None)
+
+    def run(self, sybil_example: Example, regions: List[Region]) -> List[Optional[str]]:
+        examples = [region.parsed for region in regions]
         namespace = sybil_example.namespace
         output: List[str] = []
         remove_name = False
@@ -64,13 +151,40 @@ class DocTestEvaluator:
             if '__name__' not in namespace:
                 remove_name = True
                 namespace['__name__'] = '__test__'
-            self.runner.run(
-                DocTest([example], namespace, name=sybil_example.path,
-                        filename=None, lineno=example.lineno, docstring=None),
-                clear_globs=False,
-                out=output.append
-            )
+            test = DocTest(examples, namespace, name=sybil_example.path,
+                           filename=None, lineno=examples[0].lineno, docstring=None)
+            if len(examples) > 1:
+                return self.runner.run_batch(test)
+            self.runner.run(test, clear_globs=False, out=output.append)
         finally:
             if remove_name:
                 del namespace['__name__']
-        return ''.join(output)
+        return [''.join(output)]
+
+    def __call__(self, sybil_example: Example) -> str:
+        document = sybil_example.document
+        if not self.batch or document.evaluators:
+            return self.run(sybil_example, [sybil_example.region])[0] or ''
+        pending = self.pending.pop(document, None)
+        if pending is not None:
+            output = pending.pop(sybil_example.region, None)
+            if output is not None:
+                if pending:
+                    self.pending[document] = pending
+                return output
+            # Any other example being evaluated, including one from the batch being evaluated
+            # again, means the outcomes of the rest of the batch may no longer be valid.
+        regions = self.following(sybil_example)
+        outputs = self.run(sybil_example, regions)
+        # Examples after the last one started, such as when FAIL_FAST is used, will be run
+        # when they are evaluated. Those before it that weren't started were skipped:
+        while outputs and outputs[-1] is None:
+            outputs.pop()
+        results = [output or '' for output in outputs] or ['']
+        pending = dict(zip(regions[1:], results[1:]))
+        if pending:
+            self.pending[document] = pending
+            # Don't keep the document, or outcomes that will never be reported, once it
+            # has been finished with:
+            document.add_teardown(lambda: self.discard(document))
+        return results[0]
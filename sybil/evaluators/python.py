@@ -1,7 +1,13 @@
+import asyncio
+from ast import PyCF_ALLOW_TOP_LEVEL_AWAIT
 from collections.abc import Sequence
+from inspect import CO_COROUTINE
+from types import CodeType
+from typing import Any, Dict
 import __future__
 
-from sybil import Example
+from sybil import Document, Example
+from sybil.cache import code_cache
 
 
 def pad(source: str, line: int) -> str:
@@ -21,6 +27,9 @@ class PythonEvaluator:
     :param future_imports:
         A sequence of strings naming future import options, for example ``'annotations'``,
         that should be used at the top of each :class:`~sybil.Example` being evaluated.
+
+    Compiled code is kept in the :data:`~sybil.cache.code_cache`, so the same source is
+    only compiled once.
     """
 
     def __init__(self, future_imports: Sequence[str] = ()) -> None:
@@ -29,9 +38,78 @@ class PythonEvaluator:
             self.flags |= getattr(__future__, future_import).compiler_flag
 
     def __call__(self, example: Example) -> None:
-        # There must be a nicer way to get line numbers to be correct...
-        source = pad(example.parsed, example.line + example.parsed.line_offset)
-        code = compile(source, example.path, 'exec', flags=self.flags, dont_inherit=True)
+        code = code_cache.compile(
+            example.parsed, example.path, example.line + example.parsed.line_offset, self.flags
+        )
         exec(code, example.namespace)
         # exec adds __builtins__, we don't want it:
         del example.namespace['__builtins__']
+
+
+class AsyncPythonEvaluator(PythonEvaluator):
+    """
+    A :class:`PythonEvaluator` that allows ``await``, ``async for`` and ``async with``
+    to be used at the top level of examples.
+
+    All the examples from a :class:`~sybil.Document`, whether or not they await anything,
+    are run on the same event loop, so
+    connections, tasks and other objects bound to that loop can be created in one example
+    and used in later ones. Once all the examples from the document have been evaluated,
+    any tasks still pending are cancelled and the loop is closed.
+
+    :param future_imports:
+        A sequence of strings naming future import options, for example ``'annotations'``,
+        that should be used at the top of each :class:`~sybil.Example` being evaluated.
+    """
+
+    def __init__(self, future_imports: Sequence[str] = ()) -> None:
+        super().__init__(future_imports)
+        self.flags |= PyCF_ALLOW_TOP_LEVEL_AWAIT
+        self.loops: Dict[Document, asyncio.AbstractEventLoop] = {}
+
+    def loop_for(self, document: Document) -> asyncio.AbstractEventLoop:
+        """
+        Return the event loop used for examples from the supplied document, creating it
+        if necessary.
+        """
+        loop = self.loops.get(document)
+        if loop is None:
+            loop = self.loops[document] = asyncio.new_event_loop()
+            document.add_teardown(lambda: self.close(document))
+        return loop
+
+    def close(self, document: Document) -> None:
+        """
+        Cancel any tasks still pending on the event loop for the supplied document
+        and close it.
+        """
+        loop = self.loops.pop(document, None)
+        if loop is None:
+            return
+        try:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            loop.close()
+
+    def __call__(self, example: Example) -> None:
+        code = code_cache.compile(
+            example.parsed, example.path, example.line + example.parsed.line_offset, self.flags
+        )
+        loop = self.loop_for(example.document)
+        loop.run_until_complete(self.run(code, example.namespace))
+        # exec adds __builtins__, we don't want it:
+        del example.namespace['__builtins__']
+
+    @staticmethod
+    async def run(code: CodeType, namespace: Dict[str, Any]) -> None:
+        # Code that doesn't await is still run on the loop, so it can create tasks:
+        if code.co_flags & CO_COROUTINE:
+            await eval(code, namespace)
+        else:
+            exec(code, namespace)
@@ -0,0 +1,268 @@
+import os
+import signal
+from pathlib import Path
+from queue import Empty, Queue
+from subprocess import PIPE, STDOUT, Popen, TimeoutExpired
+from textwrap import indent
+from threading import Thread
+from time import monotonic
+from typing import IO, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import uuid4
+
+from sybil import Document, Example
+
+PROMPT = '$ '
+CONTINUATION = '> '
+TIMEOUT = 60.0
+
+
+def commands(source: str, prompt: str = PROMPT, continuation: str = CONTINUATION
+             ) -> List[Tuple[str, Optional[str]]]:
+    """
+    Split the source of a console session into a list of commands, each with the output
+    expected from it. If the source contains no prompts, it is treated as a single script
+    whose output is not checked, with ``None`` returned as the expected output.
+    """
+    lines = source.splitlines()
+    if not any(line.startswith(prompt) for line in lines):
+        return [(source, None)]
+    result: List[Tuple[List[str], List[str]]] = []
+    for line in lines:
+        if line.startswith(prompt):
+            result.append(([line[len(prompt):]], []))
+        elif result and not result[-1][1] and line.startswith(continuation):
+            result[-1][0].append(line[len(continuation):])
+        elif result:
+            result[-1][1].append(line)
+    return [
+        ('\n'.join(command), '\n'.join(output).rstrip('\n'))
+        for command, output in result
+    ]
+
+
+class ShellExited(RuntimeError):
+    """
+    Raised when the shell exits while running a command, such as when the command
+    uses ``exit`` or fails when ``set -e`` is in effect.
+    """
+
+    def __init__(self, status: int, command: str, output: str) -> None:
+        super().__init__(
+            f'shell exited with status {status} while running:\n{command}\nOutput:\n{output}'
+        )
+        self.status = status
+        self.output = output
+
+
+class ShellSession:
+    """
+    A long-lived shell process to which commands are sent in turn, such that changes
+    to the environment and current directory made by one command are seen by the next.
+
+    :param command:
+        The command used to start the shell.
+
+    :param cwd:
+        The directory in which the shell is started.
+
+    :param timeout:
+        The number of seconds a command may take to run before the shell is killed and
+        :class:`TimeoutError` is raised. If ``None``, commands may take as long as they need.
+    """
+
+    def __init__(
+            self,
+            command: Sequence[str],
+            cwd: Optional[str] = None,
+            timeout: Optional[float] = TIMEOUT,
+    ) -> None:
+        self.command = list(command)
+        self.timeout = timeout
+        self.sentinel = f'sybil-{uuid4().hex}'
+        # The shell is started in its own process group so that it can be killed along with
+        # anything it has started:
+        self.process = Popen(
+            self.command, stdin=PIPE, stdout=PIPE, stderr=STDOUT, cwd=cwd, text=True, bufsize=1,
+            start_new_session=True,
+        )
+        # Output is read in a thread so that reading it can be given a deadline:
+        assert self.process.stdout is not None
+        self.lines: 'Queue[str]' = Queue()
+        Thread(target=self._read, args=(self.process.stdout,), daemon=True).start()
+
+    def _read(self, stdout: IO[str]) -> None:
+        with stdout:
+            for line in stdout:
+                self.lines.put(line)
+        # An empty string marks the end of the output:
+        self.lines.put('')
+
+    def run(self, command: str) -> Tuple[str, int]:
+        """
+        Run the supplied command, returning its combined stdout and stderr along
+        with its exit status.
+
+        If the command does not finish within the session's ``timeout``, the shell is
+        killed and :class:`TimeoutError` is raised. If the command causes the shell to exit,
+        :class:`ShellExited` is raised.
+        """
+        stdin = self.process.stdin
+        assert stdin is not None
+        # The command is passed to eval as a single quoted argument, so that a syntax error,
+        # such as an unterminated quote, fails the command rather than leaving the shell
+        # waiting for more input. Commands should not read the rest of the protocol as
+        # their input. The newline before the sentinel ensures it starts a line even if the
+        # output doesn't end with one:
+        quoted = command.replace("'", "'\\''")
+        stdin.write(
+            f"eval '{quoted}' </dev/null\n"
+            f"printf '\\n%s %s\\n' '{self.sentinel}' \"$?\"\n"
+        )
+        stdin.flush()
+        deadline = None if self.timeout is None else monotonic() + self.timeout
+        lines: List[str] = []
+        while True:
+            try:
+                line = self.lines.get(
+                    timeout=None if deadline is None else max(deadline - monotonic(), 0)
+                )
+            except Empty:
+                self.close(timeout=0)
+                raise TimeoutError(
+                    f'timed out after {self.timeout} seconds while running:\n'
+                    f'{command}\nOutput:\n{"".join(lines)}'
+                )
+            if not line:
+                raise ShellExited(self.process.wait(), command, ''.join(lines))
+            if line.startswith(self.sentinel):
+                status = int(line.split()[1])
+                break
+            lines.append(line)
+        output = ''.join(lines)
+        if output.endswith('\n'):
+            output = output[:-1]
+        return output, status
+
+    def close(self, timeout: float = 5) -> None:
+        """
+        Close the shell's input and wait for it to exit, killing it if it does not
+        exit within the supplied timeout.
+        """
+        try:
+            if self.process.stdin is not None:
+                self.process.stdin.close()
+            self.process.wait(timeout)
+        except (OSError, TimeoutExpired):
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self.process.wait()
+
+
+class ShellEvaluator:
+    """
+    An :any:`Evaluator` for code blocks containing shell commands or console sessions.
+
+    All the examples from a :class:`~sybil.Document` are run in the same shell process, so
+    environment variables, the current directory and other shell state set in one example
+    are seen by later ones. The process is closed once all the examples from the document
+    have been evaluated.
+
+    If an example contains lines starting with the ``prompt``, each of these is run as a
+    command and must exit with a status of zero and produce the output on the lines that
+    follow it, up to the next prompt. Lines starting with ``continuation`` straight after a
+    prompt are added to that command. Otherwise, the whole example is run as a script which
+    must exit with a status of zero, but whose output is not checked.
+
+    The shell must be a POSIX-compatible shell, such as ``bash`` or ``sh``.
+
+    Standard error is combined with standard output, as it would be in a terminal.
+
+    If a command causes the shell to exit, such as by using ``exit`` or failing when
+    ``set -e`` is in effect, the example fails and a new shell is started for later examples.
+
+    :param shell:
+        The command used to start the shell, either as a string or a sequence of arguments.
+
+    :param cwd:
+        The directory in which to start the shell. If not supplied, the directory containing
+        the document is used.
+
+    :param prompt:
+        The prefix of lines containing commands in console sessions.
+
+    :param continuation:
+        The prefix of lines continuing a command in console sessions.
+
+    :param timeout:
+        The number of seconds each command may take to run. If a command takes longer, the
+        shell is killed and the example fails. If ``None``, commands may take as long as
+        they need.
+    """
+
+    def __init__(
+            self,
+            shell: Union[str, Sequence[str]] = 'bash',
+            cwd: Optional[str] = None,
+            prompt: str = PROMPT,
+            continuation: str = CONTINUATION,
+            timeout: Optional[float] = TIMEOUT,
+    ) -> None:
+        self.shell: Sequence[str] = [shell] if isinstance(shell, str) else shell
+        self.cwd = cwd
+        self.prompt = prompt
+        self.continuation = continuation
+        self.timeout = timeout
+        self.sessions: Dict[Document, ShellSession] = {}
+
+    def session_for(self, document: Document) -> ShellSession:
+        """
+        Return the shell session used for examples from the supplied document, starting it
+        if necessary.
+        """
+        session = self.sessions.get(document)
+        if session is None:
+            cwd = self.cwd
+            if cwd is None:
+                cwd = str(Path(document.path).parent)
+            session = self.sessions[document] = ShellSession(self.shell, cwd, self.timeout)
+            document.add_teardown(lambda: self.close(document))
+        return session
+
+    def close(self, document: Document) -> None:
+        """
+        Close the shell session for the supplied document.
+        """
+        session = self.sessions.pop(document, None)
+        if session is not None:
+            session.close()
+
+    def __call__(self, example: Example) -> Optional[str]:
+        session = self.session_for(example.document)
+        for command, expected in commands(example.parsed, self.prompt, self.continuation):
+            shown = command.rstrip('\n')
+            if expected is not None:
+                first, *rest = command.split('\n')
+                shown = '\n'.join([self.prompt + first] + [self.continuation + r for r in rest])
+            try:
+                output, status = session.run(command)
+            except TimeoutError:
+                # The shell has been killed, so a new one is needed for later examples:
+                self.close(example.document)
+                return f'{shown}\ntimed out after {self.timeout} seconds\n'
+            except ShellExited as exited:
+                self.close(example.document)
+                output = exited.output.rstrip('\n')
+                details = f':\n{indent(output, "    ")}' if output else ''
+                return f'{shown}\nexited the shell with status {exited.status}{details}\n'
+            output = output.rstrip('\n')
+            if status:
+                details = f':\n{indent(output, "    ")}' if output else ''
+                return f'{shown}\nexited with status {status}{details}\n'
+            if expected is not None and output.rstrip() != expected.rstrip():
+                return (
+                    f'{shown}\nExpected:\n{indent(expected, "    ")}\n'
+                    f'Got:\n{indent(output, "    ")}\n'
+                )
+        return None
@@ -1,6 +1,11 @@
+import builtins
+from collections import ChainMap
 from dataclasses import dataclass
-from typing import Any, Optional, Dict
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Dict, Optional, Tuple
 from unittest import SkipTest
+from weakref import WeakKeyDictionary
 
 from sybil import Example, Document
 from sybil.example import NotEvaluated
@@ -17,6 +22,31 @@ class If:
         return None
 
 
+class NamespaceGlobals(Dict[str, Any]):
+    # Used as the globals when evaluating a condition, so that names from the document's
+    # namespace can be found from within comprehensions and lambdas, without copying it
+    # or letting eval() add __builtins__ to it.
+
+    def __init__(self, namespace: Dict[str, Any]) -> None:
+        super().__init__(__builtins__=builtins)
+        self.namespace = namespace
+
+    def __missing__(self, key: str) -> Any:
+        return self.namespace[key]
+
+
+@lru_cache(maxsize=None)
+def compile_reason(reason: str) -> Tuple[CodeType, Optional[str]]:
+    # Each distinct reason is only compiled once, however many times the skip region
+    # it comes from is evaluated. The condition is returned for conditional reasons
+    # so that it can be used as the default reason for skipping.
+    condition = None
+    if reason.startswith('if'):
+        condition = reason[2:]
+        reason = 'if_' + condition
+    return compile(reason, '<skip>', 'eval'), condition
+
+
 @dataclass
 class SkipState:
     active: bool = True
@@ -28,7 +58,7 @@ class SkipState:
 class Skipper:
 
     def __init__(self, directive: str) -> None:
-        self.document_state: Dict[Document, SkipState] = {}
+        self.document_state: 'WeakKeyDictionary[Document, SkipState]' = WeakKeyDictionary()
         self.directive = directive
 
     def state_for(self, example: Example) -> SkipState:
@@ -41,13 +71,13 @@ class Skipper:
         document = example.document
         document.push_evaluator(self)
         if reason:
-            namespace = document.namespace.copy()
-            reason = reason.lstrip()
-            if reason.startswith('if'):
-                condition = reason[2:]
-                reason = 'if_' + condition
-                namespace['if_'] = If(condition)
-            reason = eval(reason, namespace)
+            code, condition = compile_reason(reason.lstrip())
+            # The document's namespace is only read. Anything only needed to evaluate the
+            # condition, along with any names it binds, goes in an overlay that takes
+            # precedence:
+            overlay: Dict[str, Any] = {} if condition is None else {'if_': If(condition)}
+            namespace = document.namespace
+            reason = eval(code, NamespaceGlobals(namespace), ChainMap(overlay, namespace))
             if reason:
                 state.exception = SkipTest(reason)
             else:
@@ -58,6 +88,19 @@ class Skipper:
         document.pop_evaluator(self)
         del self.document_state[document]
 
+    def validate(self, example: Example) -> None:
+        """
+        Check the action and any reason of the supplied skip example without evaluating it,
+        raising a :class:`ValueError` or :class:`SyntaxError` if either is not valid.
+        """
+        action, reason = example.parsed
+        if action not in ('start', 'next', 'end'):
+            raise ValueError('Bad skip action: ' + action)
+        if reason:
+            if action == 'end':
+                raise ValueError("Cannot have condition on 'skip: end'")
+            compile_reason(reason.lstrip())
+
     def evaluate_skip_example(self, example: Example) -> None:
         state = self.state_for(example)
         directive = self.directive
@@ -1,4 +1,5 @@
-from typing import TYPE_CHECKING, Any, Dict
+from time import perf_counter, process_time
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from .region import Region
 
@@ -62,6 +63,11 @@ class Example:
         #: The :attr:`~sybil.Document.namespace` of the document from
         #: which this example came.
         self.namespace: Dict[str, Any] = namespace
+        #: The wall clock time, in seconds, taken by the last evaluation of this example.
+        self.wall_time: Optional[float] = None
+        #: The CPU time, in seconds, used by this process during the last evaluation
+        #: of this example.
+        self.cpu_time: Optional[float] = None
 
     def __repr__(self) -> str:
         return '<Example path={} line={} column={} using {!r}>'.format(
@@ -70,4 +76,9 @@ class Example:
 
     def evaluate(self) -> None:
         if self.region.evaluator is not None:
-            self.document.evaluate(self, self.region.evaluator)
+            wall, cpu = perf_counter(), process_time()
+            try:
+                self.document.evaluate(self, self.region.evaluator)
+            finally:
+                self.wall_time = perf_counter() - wall
+                self.cpu_time = process_time() - cpu
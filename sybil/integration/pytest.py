@@ -5,21 +5,42 @@ from collections.abc import Callable, Sequence
 from inspect import getsourcefile
 from os.path import abspath
 from pathlib import Path
-from typing import Union, Tuple, Optional, List
+from typing import Dict, Union, Tuple, Optional, List
+from unittest import SkipTest
 
 import pytest
 from pytest import Collector, ExceptionInfo, Module, Session
 from _pytest import fixtures
-from _pytest._code.code import TerminalRepr, Traceback
+from _pytest._code.code import ExceptionRepr, TerminalRepr, Traceback
 from _pytest._io import TerminalWriter
 from _pytest.fixtures import FuncFixtureInfo
 
 from sybil import example as example_module, Sybil, Document
+from sybil.cache import ParseCache
+from sybil.changes import Changes
+from sybil.durations import Durations
 from sybil.example import Example
 from sybil.example import SybilFailure
+from sybil.namespaces import Namespaces
+from sybil.paths import CollectionMatcher
+from sybil.profiling import Profiler
+from sybil.snapshots import Snapshots
+from sybil.timing import Timings
+from sybil.validation import Problem, validate
 
 example_module_path = abspath(getsourcefile(example_module))
 
+parse_cache_key = pytest.StashKey[ParseCache]()
+changes_key = pytest.StashKey[Changes]()
+snapshots_key = pytest.StashKey[Snapshots]()
+timings_key = pytest.StashKey[Timings]()
+profiler_key = pytest.StashKey[Profiler]()
+per_document_key = pytest.StashKey[bool]()
+lean_key = pytest.StashKey[bool]()
+namespaces_key = pytest.StashKey[Namespaces]()
+validation_key = pytest.StashKey[Dict[Path, List[Problem]]]()
+durations_key = pytest.StashKey[Durations]()
+
 
 class SybilFailureRepr(TerminalRepr):
 
@@ -40,21 +61,22 @@ class SybilItem(pytest.Item):
 
     obj = None
 
-    def __init__(self, parent, sybil, example: Example) -> None:
-        super(SybilItem, self).__init__(sybil.identify(example), parent)
+    def __init__(self, parent, sybil, example: Example, name: Optional[str] = None) -> None:
+        super(SybilItem, self).__init__(name or sybil.identify(example), parent)
+        self.sybil = sybil
         self.example = example
+        # Examples from one document share a namespace, so must all run on the same
+        # pytest-xdist worker when using --dist loadgroup:
+        self.add_marker(pytest.mark.xdist_group(parent.nodeid))
         self.request_fixtures(sybil.fixtures)
 
     def request_fixtures(self, names):
         # pytest fixtures dance:
-        fm = self.session._fixturemanager
-        closure = fm.getfixtureclosure(initialnames=names, parentnode=self, ignore_args=set())
-        names_closure, arg2fixturedefs = closure
-        fixtureinfo = FuncFixtureInfo(argnames=names, initialnames=names, names_closure=names_closure, name2fixturedefs=arg2fixturedefs)
+        fixtureinfo = self.parent.fixture_info(names)
         self._fixtureinfo = fixtureinfo
         self.funcargs = {}
         self._request = fixtures.TopRequest(pyfuncitem=self, _ispytest=True)
-        self.fixturenames = names_closure
+        self.fixturenames = list(fixtureinfo.names_closure)
 
     def reportinfo(self) -> Tuple[Union["os.PathLike[str]", str], Optional[int], str]:
         info = '%s line=%i column=%i' % (
@@ -74,7 +96,21 @@ class SybilItem(pytest.Item):
             self.example.namespace[name] = fixture
 
     def runtest(self) -> None:
-        self.example.evaluate()
+        snapshots = self.config.stash.get(snapshots_key, None)
+        if snapshots is not None:
+            snapshots.prepare(self.example, self.sybil.name, self.fixturenames)
+        timings = self.config.stash.get(timings_key, None)
+        try:
+            self.example.evaluate()
+        finally:
+            if timings is not None:
+                timings.add_example(self.example)
+
+    def teardown(self) -> None:
+        namespaces = self.config.stash.get(namespaces_key, None)
+        document = self.example.document
+        if namespaces is not None and namespaces.finish(document):
+            self.parent.teardown_document(self.sybil, document)
 
     def _traceback_filter(self, excinfo: ExceptionInfo[BaseException]) -> Traceback:
         traceback = excinfo.traceback
@@ -94,39 +130,189 @@ class SybilItem(pytest.Item):
         return super().repr_failure(excinfo, style)
 
 
+class SybilDocumentItem(SybilItem):
+    """
+    An item that evaluates all the examples from a document in order, stopping at the
+    first that fails. Examples that are skipped do not stop evaluation or cause the item
+    to be skipped. While running, :attr:`example` is the example being evaluated.
+    """
+
+    def __init__(self, parent, sybil, examples: List[Example], index: int) -> None:
+        # Unnamed Sybils are told apart by their position in the file's Sybils, which,
+        # unlike their ids, is the same in every process and on every run:
+        name = f'sybil:{sybil.name}' if sybil.name else f'document:{index}'
+        super().__init__(parent, sybil, examples[0], name)
+        self.examples = examples
+
+    def reportinfo(self) -> Tuple[Union["os.PathLike[str]", str], Optional[int], str]:
+        return self.example.path, None, f'{self.path.name} {self.name}'
+
+    def runtest(self) -> None:
+        timings = self.config.stash.get(timings_key, None)
+        for example in self.examples:
+            self.example = example
+            try:
+                example.evaluate()
+            except (SkipTest, pytest.skip.Exception):
+                pass
+            finally:
+                if timings is not None:
+                    timings.add_example(example)
+
+    def repr_failure(
+        self,
+        excinfo: ExceptionInfo[BaseException],
+        style = None,
+    ) -> Union[str, TerminalRepr]:
+        result = super().repr_failure(excinfo, style)
+        if isinstance(result, ExceptionRepr):
+            example = self.example
+            result.addsection('sybil', (
+                f'Example at {example.path}, line {example.line}, column {example.column}'
+            ))
+        return result
+
+
+class SybilValidationItem(pytest.Item):
+    """
+    An item that fails with every problem found when :meth:`validating
+    <sybil.Sybil.validate>` a documentation source file, without evaluating any examples.
+    The first of these items to run validates the files for all of them, in parallel.
+    """
+
+    def __init__(self, parent, sybils: Sequence[Sybil]) -> None:
+        super().__init__('validate', parent)
+        self.sybils = sybils
+
+    def reportinfo(self) -> Tuple[Union["os.PathLike[str]", str], Optional[int], str]:
+        return self.path, None, f'{self.path.name} {self.name}'
+
+    def runtest(self) -> None:
+        problems = self.config.stash[validation_key]
+        if self.path not in problems:
+            sybils: List[Sybil] = []
+            jobs = []
+            for item in self.session.items:
+                if isinstance(item, SybilValidationItem) and item.path not in problems:
+                    for sybil in item.sybils:
+                        if sybil not in sybils:
+                            sybils.append(sybil)
+                        jobs.append((sybils.index(sybil), item.path))
+                    problems[item.path] = []
+            for (_, path), found in zip(jobs, validate(sybils, jobs, processes=None)):
+                problems[path].extend(found)
+        found = problems[self.path]
+        if found:
+            pytest.fail('\n'.join(str(problem) for problem in found), pytrace=False)
+
+
 class SybilFile(pytest.File):
 
     def __init__(self, *, sybils: Sequence[Sybil], **kwargs) -> None:
         super(SybilFile, self).__init__(**kwargs)
         self.sybils: Sequence[Sybil] = sybils
         self.documents: List[Document] = []
+        #: The number of items collected from this file.
+        self.collected = 0
+        self._fixture_infos: Dict[Tuple[str, ...], FuncFixtureInfo] = {}
+
+    def fixture_info(self, names: Sequence[str]) -> FuncFixtureInfo:
+        # All the examples from this file request the same fixtures, so the closure is
+        # only computed once for each set of names rather than once for each example:
+        key = tuple(names)
+        fixtureinfo = self._fixture_infos.get(key)
+        if fixtureinfo is None:
+            fm = self.session._fixturemanager
+            names_closure, arg2fixturedefs = fm.getfixtureclosure(
+                initialnames=key, parentnode=self, ignore_args=set()
+            )
+            fixtureinfo = self._fixture_infos[key] = FuncFixtureInfo(
+                argnames=key,
+                initialnames=key,
+                names_closure=names_closure,
+                name2fixturedefs=arg2fixturedefs,
+            )
+        return fixtureinfo
 
     def collect(self):
-        for sybil in self.sybils:
-            document = sybil.parse(self.path)
+        if validation_key in self.config.stash:
+            yield SybilValidationItem.from_parent(self, sybils=self.sybils)
+            return
+        cache = self.config.stash.get(parse_cache_key, None)
+        timings = self.config.stash.get(timings_key, None)
+        profiler = self.config.stash.get(profiler_key, None)
+        per_document = self.config.stash.get(per_document_key, False)
+        lean = self.config.stash.get(lean_key, False)
+        self.collected = 0
+        for index, sybil in enumerate(self.sybils):
+            if cache is None:
+                document = sybil.parse(self.path)
+            else:
+                document = cache.parse(sybil, self.path)
+            document.profiler = profiler or sybil.profiler
             self.documents.append(document)
-            for example in document.examples():
-                yield SybilItem.from_parent(
-                    self,
-                    sybil=sybil,
-                    example=example,
-                )
+            if timings is not None:
+                timings.add_document(document)
+            if per_document:
+                examples = list(document.examples())
+                if examples:
+                    self.collected += 1
+                    yield SybilDocumentItem.from_parent(
+                        self, sybil=sybil, examples=examples, index=index
+                    )
+            else:
+                for example in document.examples():
+                    self.collected += 1
+                    yield SybilItem.from_parent(
+                        self,
+                        sybil=sybil,
+                        example=example,
+                    )
+            if lean:
+                document.release(sybil.encoding)
+        changes = self.config.stash.get(changes_key, None)
+        if changes is not None and not self.collected:
+            # Nothing to run, so this document can't fail:
+            changes.passed.add(self.path)
 
     def setup(self) -> None:
+        namespaces = self.config.stash.get(namespaces_key, None)
         for sybil, document in zip(self.sybils, self.documents):
+            if namespaces is not None and not namespaces.open(document):
+                continue
             if sybil.setup:
                 sybil.setup(document.namespace)
 
     def teardown(self) -> None:
         for sybil, document in zip(self.sybils, self.documents):
-            if sybil.teardown:
-                sybil.teardown(document.namespace)
+            self.teardown_document(sybil, document)
+
+    def teardown_document(self, sybil: Sybil, document: Document) -> None:
+        namespaces = self.config.stash.get(namespaces_key, None)
+        if namespaces is not None and document in namespaces.released:
+            # Already torn down after its last example was run:
+            return
+        try:
+            try:
+                if sybil.teardown:
+                    sybil.teardown(document.namespace)
+            finally:
+                # Evaluators must release what they hold even if the teardown fails:
+                document.teardown()
+        finally:
+            if namespaces is not None:
+                namespaces.close(document)
 
 
 def pytest_integration(*sybils: Sybil) -> Callable[[Path, Collector], Optional[SybilFile]]:
 
+    matcher = CollectionMatcher(sybils)
+
     def pytest_collect_file(file_path: Path, parent: Collector) -> Optional[SybilFile]:
-        active_sybils = [sybil for sybil in sybils if sybil.should_parse(file_path)]
+        active_sybils = matcher(file_path)
+        changes = parent.config.stash.get(changes_key, None)
+        if active_sybils and changes is not None and not changes(file_path):
+            return None
         if active_sybils:
             return SybilFile.from_parent(parent, path=file_path, sybils=active_sybils)
         return None
@@ -0,0 +1,322 @@
+"""
+The pytest plugin that provides the command line options used by Sybil's
+:ref:`pytest integration <pytest_integration>`.
+"""
+import sys
+from pathlib import Path
+from typing import Any, Dict, Generator, List, Sequence, Set
+
+import pytest
+
+from sybil.cache import ParseCache, code_cache
+from sybil.changes import Changes, Manifest
+from sybil.durations import Durations
+from sybil.namespaces import Namespaces
+from sybil.profiling import CPU, MEMORY, Profiler
+from sybil.snapshots import Snapshots
+from sybil.timing import Timings
+from .pytest import (
+    SybilItem,
+    changes_key,
+    durations_key,
+    lean_key,
+    namespaces_key,
+    validation_key,
+    parse_cache_key,
+    per_document_key,
+    profiler_key,
+    snapshots_key,
+    timings_key,
+)
+
+MANIFEST_KEY = 'sybil/manifest'
+DURATIONS_KEY = 'sybil/durations'
+CHANGES_RECORDER = 'sybil-changes-recorder'
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup('sybil')
+    group.addoption(
+        '--sybil-cache', action='store_true', default=False,
+        help='Cache the regions parsed from documentation source files, and the code '
+             'compiled from Python examples, in the pytest cache directory so that '
+             'unchanged files are not parsed, and unchanged examples not compiled, again.',
+    )
+    group.addoption(
+        '--sybil-snapshots', action='store_true', default=False,
+        help='Store an image of the document namespace before each failing example, so that '
+             'example can be re-run on its own, such as with --lf, without re-running the '
+             'examples before it.',
+    )
+    group.addoption(
+        '--sybil-timings', metavar='N', type=int, default=None,
+        help='Show the N slowest documentation source files to parse and the N slowest '
+             'examples to evaluate.',
+    )
+    group.addoption(
+        '--sybil-profile', choices=[CPU, MEMORY, 'all'], default=None,
+        help='Profile the evaluation of examples using cProfile, tracemalloc or both, writing '
+             'pstats files and allocation reports for each document.',
+    )
+    group.addoption(
+        '--sybil-profile-select', metavar='PATTERN', action='append', default=[],
+        help="Only profile examples where 'path:line' matches this pattern, such as "
+             "'*/api.rst:*'. May be specified more than once.",
+    )
+    group.addoption(
+        '--sybil-profile-dir', metavar='DIR', default=None,
+        help='The directory in which profiling results are written. '
+             'Defaults to a sybil-profile directory in the pytest cache directory.',
+    )
+    group.addoption(
+        '--sybil-validate', action='store_true', default=False,
+        help='Only parse documentation source files, in parallel, and compile the Python '
+             'examples found in them, without evaluating any examples. One test is collected '
+             'for each file, which fails with every problem found.',
+    )
+    group.addoption(
+        '--sybil-per-document', action='store_true', default=False,
+        help='Collect one test for each documentation source file, that evaluates all its '
+             'examples in order and stops at the first failure, rather than one test for '
+             'each example.',
+    )
+    group.addoption(
+        '--sybil-lean', action='store_true', default=False,
+        help='Once the examples from each documentation source file have been collected, '
+             'release its text and the lexemes parsed from it, keeping only what is needed '
+             'to evaluate the examples. The text is read again if it is needed.',
+    )
+    group.addoption(
+        '--sybil-release-namespaces', action='store_true', default=False,
+        help="Tear down each document and clear its namespace as soon as its last example "
+             "has been run, rather than when pytest tears down the document's file, and "
+             "report the largest number of namespaces live at once.",
+    )
+    group.addoption(
+        '--sybil-durations', action='store_true', default=False,
+        help='Record how long the examples from each documentation source file take to run '
+             'in the pytest cache, and run the examples from the slowest files first. '
+             'Use with --dist loadgroup when using pytest-xdist.',
+    )
+    group.addoption(
+        '--sybil-changed', action='store_true', default=False,
+        help='Only collect examples from documentation source files that have changed, '
+             'or had failing examples, since all their examples last passed.',
+    )
+    group.addoption(
+        '--sybil-changed-files', metavar='PATH', default=None,
+        help='Only collect examples from the documentation source files listed, one per line, '
+             "in the file at PATH, or on standard input if PATH is '-'. "
+             'Relative paths are relative to the current directory.',
+    )
+    group.addoption(
+        '--sybil-changed-imports', action='store_true', default=False,
+        help='When only collecting changed documentation source files, also collect those '
+             'that import local Python modules that have changed.',
+    )
+
+
+class DurationsRecorder:
+    # Registered as a plugin so that reports from pytest-xdist workers are seen.
+
+    def __init__(self, durations: Durations) -> None:
+        self.durations = durations
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        path = getattr(report, 'sybil_path', None)
+        if path is not None:
+            self.durations.add(path, report.duration)
+
+
+class ChangesRecorder:
+    # Registered as a plugin so that reports from pytest-xdist workers are seen.
+    # A document has only passed once every item collected from it has run.
+
+    def __init__(self, changes: Changes) -> None:
+        self.changes = changes
+        self.finished: Dict[Path, Set[str]] = {}
+        self.deselected = False
+
+    def pytest_deselected(self, items: Sequence[pytest.Item]) -> None:
+        self.deselected = True
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        path = getattr(report, 'sybil_path', None)
+        if path is None:
+            return
+        path = Path(path)
+        if report.failed:
+            self.changes.failed.add(path)
+        elif report.when == 'call' or report.skipped:
+            finished = self.finished.setdefault(path, set())
+            finished.add(report.nodeid)
+            if len(finished) == getattr(report, 'sybil_collected', None):
+                self.changes.passed.add(path)
+
+
+def read_file_list(path: str, invocation_dir: Path) -> List[Path]:
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        lines = Path(path).read_text().splitlines()
+    return [invocation_dir / line.strip() for line in lines if line.strip()]
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if not config.pluginmanager.hasplugin('xdist'):
+        config.addinivalue_line(
+            'markers', 'xdist_group(name): the pytest-xdist group a Sybil example belongs to.'
+        )
+    cache = getattr(config, 'cache', None)
+    if config.getoption('sybil_cache') and cache is not None:
+        config.stash[parse_cache_key] = ParseCache(cache.mkdir('sybil'))
+        code_cache.directory = cache.mkdir('sybil-code')
+        code_cache.hits = code_cache.misses = 0
+    if config.getoption('sybil_snapshots') and cache is not None:
+        config.stash[snapshots_key] = Snapshots(cache.mkdir('sybil-snapshots'))
+    if config.getoption('sybil_timings') is not None:
+        config.stash[timings_key] = Timings()
+    profile = config.getoption('sybil_profile')
+    if profile is not None:
+        directory = config.getoption('sybil_profile_dir')
+        if directory is None:
+            directory = cache.mkdir('sybil-profile') if cache is not None else 'sybil-profile'
+        config.stash[profiler_key] = Profiler(
+            directory,
+            cpu=profile in (CPU, 'all'),
+            memory=profile in (MEMORY, 'all'),
+            select=config.getoption('sybil_profile_select'),
+        )
+    config.stash[per_document_key] = config.getoption('sybil_per_document')
+    config.stash[lean_key] = config.getoption('sybil_lean')
+    if config.getoption('sybil_validate'):
+        config.stash[validation_key] = {}
+    if config.getoption('sybil_release_namespaces'):
+        config.stash[namespaces_key] = Namespaces()
+        # Examples can only be counted down to the last one if all the examples from
+        # a document run in the same pytest-xdist worker:
+        dist = config.getoption('dist', 'no')
+        if dist in ('load', 'worksteal') and not hasattr(config, 'workerinput'):
+            config.issue_config_time_warning(pytest.PytestConfigWarning(
+                f'--sybil-release-namespaces has no effect with --dist {dist}, '
+                f'use --dist loadgroup instead'
+            ), stacklevel=2)
+    if config.getoption('sybil_durations') and cache is not None:
+        durations = config.stash[durations_key] = Durations(cache.get(DURATIONS_KEY, None))
+        config.pluginmanager.register(DurationsRecorder(durations))
+    changed_files = config.getoption('sybil_changed_files')
+    if config.getoption('sybil_changed') or changed_files is not None:
+        stored = (cache.get(MANIFEST_KEY, None) if cache is not None else None) or {}
+        manifest = Manifest(stored.get('files'), stored.get('imports'))
+        files = None
+        if changed_files is not None:
+            files = read_file_list(changed_files, config.invocation_params.dir)
+        changes = config.stash[changes_key] = Changes(
+            config.rootpath, manifest, files, imports=config.getoption('sybil_changed_imports')
+        )
+        config.pluginmanager.register(ChangesRecorder(changes), CHANGES_RECORDER)
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    if config.stash.get(parse_cache_key, None) is not None:
+        code_cache.directory = None
+
+
+def pytest_collection_modifyitems(
+        session: pytest.Session, config: pytest.Config, items: List[pytest.Item]
+) -> None:
+    durations = config.stash.get(durations_key, None)
+    if durations is None:
+        return
+    # Re-order the examples, a whole document at a time, in the places already
+    # occupied by examples, leaving any other tests where they are:
+    places = [i for i, item in enumerate(items) if isinstance(item, SybilItem)]
+    documents: Dict[Path, List[pytest.Item]] = {}
+    for i in places:
+        documents.setdefault(items[i].path, []).append(items[i])
+    ordered = [item for path in durations.order(documents) for item in documents[path]]
+    for i, item in zip(places, ordered):
+        items[i] = item
+
+
+def pytest_collection_finish(session: pytest.Session) -> None:
+    namespaces = session.config.stash.get(namespaces_key, None)
+    if namespaces is None:
+        return
+    # Only count the examples that are going to be run, after any deselection:
+    for item in session.items:
+        if isinstance(item, SybilItem):
+            namespaces.expect(item.example.document)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(
+        item: pytest.Item, call: pytest.CallInfo[None]
+) -> Generator[None, pytest.TestReport, pytest.TestReport]:
+    report = yield
+    snapshots = item.config.stash.get(snapshots_key, None)
+    if snapshots is not None and isinstance(item, SybilItem) and report.when == 'call':
+        snapshots.finish(item.example, item.sybil.name, report.failed)
+    stash = item.config.stash
+    if (durations_key in stash or changes_key in stash) and isinstance(item, SybilItem):
+        # Reports are passed from pytest-xdist workers to the controller, along with
+        # these attributes, where pytest_runtest_logreport records the durations and outcomes:
+        report.sybil_path = str(item.path)  # type: ignore[attr-defined]
+        report.sybil_collected = item.parent.collected  # type: ignore[attr-defined]
+    return report
+
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    profiler = session.config.stash.get(profiler_key, None)
+    if profiler is not None:
+        profiler.close()
+    cache = getattr(session.config, 'cache', None)
+    # Only the pytest-xdist controller, which sees the reports from all workers, saves:
+    worker = hasattr(session.config, 'workerinput')
+    interrupted = exitstatus == pytest.ExitCode.INTERRUPTED
+    if cache is None or worker or interrupted:
+        return
+    changes = session.config.stash.get(changes_key, None)
+    recorder = session.config.pluginmanager.get_plugin(CHANGES_RECORDER)
+    # A partial run, such as with -k or -x, may not have run all the examples needed to
+    # say a document has passed, and what it does record is left for a full run:
+    partial = session.shouldstop or session.shouldfail or recorder and recorder.deselected
+    if changes is not None and not partial:
+        cache.set(MANIFEST_KEY, changes.save())
+    durations = session.config.stash.get(durations_key, None)
+    if durations is not None:
+        cache.set(DURATIONS_KEY, durations.save())
+
+
+def pytest_terminal_summary(terminalreporter: Any, exitstatus: int, config: pytest.Config) -> None:
+    profiler = config.stash.get(profiler_key, None)
+    if profiler is not None:
+        terminalreporter.write_line(
+            f'sybil profile: {profiler.profiled} examples profiled, '
+            f'results in {profiler.directory}'
+        )
+    namespaces = config.stash.get(namespaces_key, None)
+    if namespaces is not None:
+        terminalreporter.write_line(
+            f'sybil namespaces: peak of {namespaces.peak} live, '
+            f'{namespaces.cleared} released'
+        )
+    timings = config.stash.get(timings_key, None)
+    if timings is not None:
+        terminalreporter.write_sep('=', 'sybil timings')
+        terminalreporter.write(timings.report(config.getoption('sybil_timings')))
+    snapshots = config.stash.get(snapshots_key, None)
+    if snapshots is not None and (snapshots.restored or snapshots.replayed):
+        terminalreporter.write_line(
+            f'sybil snapshots: {snapshots.restored} restored, '
+            f'{snapshots.replayed} examples replayed'
+        )
+    cache = config.stash.get(parse_cache_key, None)
+    if cache is not None:
+        terminalreporter.write_line(
+            f'sybil parse cache: {cache.hits} hits, {cache.misses} misses, '
+            f'{cache.uncacheable} uncacheable'
+        )
+        terminalreporter.write_line(
+            f'sybil code cache: {code_cache.hits} hits, {code_cache.misses} misses'
+        )
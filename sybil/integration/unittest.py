@@ -1,23 +1,30 @@
-from collections.abc import Callable
-from typing import Any, Dict, Optional
-from unittest import TestCase as BaseTestCase, TestSuite
+from collections.abc import Callable, Iterable
+from typing import Any, Dict, List, Optional, cast
+from unittest import TestCase as BaseTestCase, TestResult, TestSuite
 from unittest.loader import TestLoader
 
-from sybil import Sybil
+from sybil import Document, Sybil
 from sybil.example import Example
+from sybil.timing import Timings
 
 
 class TestCase(BaseTestCase):
 
     sybil: Sybil
+    document: Document
     namespace: Dict[str, Any]
+    timings: Optional[Timings] = None
 
     def __init__(self, example: Example) -> None:
         BaseTestCase.__init__(self)
         self.example = example
 
     def runTest(self) -> None:
-        self.example.evaluate()
+        try:
+            self.example.evaluate()
+        finally:
+            if self.timings is not None:
+                self.timings.add_example(self.example)
 
     def id(self) -> str:
         return f'{self.example.path},{self.sybil.identify(self.example)}'
@@ -31,12 +38,36 @@ class TestCase(BaseTestCase):
 
     @classmethod
     def tearDownClass(cls) -> None:
-        if cls.sybil.teardown is not None:
-            cls.sybil.teardown(cls.namespace)
+        try:
+            if cls.sybil.teardown is not None:
+                cls.sybil.teardown(cls.namespace)
+        finally:
+            cls.document.teardown()
+
+
+class ProcessSuite(TestSuite):
+    """
+    A suite of per-document suites that, when run, evaluates each document in a pool of
+    worker processes.
+    """
+
+    def __init__(self, processes: int) -> None:
+        super().__init__()
+        self.processes = processes
+
+    def run(self, result: TestResult, debug: bool = False) -> TestResult:
+        from sybil.processes import run_in_processes
+        if debug or len(self._tests) < 2:
+            return super().run(result, debug)
+        run_in_processes(cast(List[TestSuite], self._tests), result, self.processes)
+        return result
 
 
 def unittest_integration(
     *sybils: Sybil,
+    parse_processes: Optional[int] = None,
+    processes: Optional[int] = None,
+    timings: Optional[Timings] = None,
 ) -> Callable[[Optional[TestLoader], Optional[TestSuite], Optional[str]], TestSuite]:
 
     def load_tests(
@@ -44,18 +75,37 @@ def unittest_integration(
         tests: Optional[TestSuite] = None,
         pattern: Optional[str] = None,
     ) -> TestSuite:
-        suite = TestSuite()
-        for sybil in sybils:
-            for path in sorted(sybil.path.glob('**/*')):
-                if path.is_file() and sybil.should_parse(path):
-                    document = sybil.parse(path)
-
-                    case = type(document.path, (TestCase, ), dict(
-                        sybil=sybil, namespace=document.namespace,
-                    ))
-
-                    for example in document.examples():
-                        suite.addTest(case(example))
+        jobs = []
+        for index, sybil in enumerate(sybils):
+            for path in sybil.paths():
+                jobs.append((index, path))
+
+        documents: Iterable[Document]
+        if parse_processes is not None and parse_processes > 1 and len(jobs) > 1:
+            from sybil.processes import parse_in_processes
+            documents = parse_in_processes(sybils, jobs, parse_processes)
+        else:
+            documents = (sybils[index].parse(path) for index, path in jobs)
+
+        suite: TestSuite
+        if processes is not None and processes > 1:
+            suite = ProcessSuite(processes)
+        else:
+            suite = TestSuite()
+        for (index, _), document in zip(jobs, documents):
+            case = type(document.path, (TestCase, ), dict(
+                sybil=sybils[index], document=document, namespace=document.namespace,
+                timings=timings,
+            ))
+            if timings is not None:
+                timings.add_document(document)
+            document.profiler = sybils[index].profiler
+
+            cases = [case(example) for example in document.examples()]
+            if isinstance(suite, ProcessSuite):
+                suite.addTest(TestSuite(cases))
+            else:
+                suite.addTests(cases)
 
         return suite
 
@@ -0,0 +1,72 @@
+from typing import TYPE_CHECKING, Dict, Set
+from weakref import WeakSet
+
+if TYPE_CHECKING:
+    from .document import Document
+
+
+class Namespaces:
+    """
+    A record of which documents have a live :attr:`~sybil.Document.namespace`, having been
+    set up but not yet cleared, and how many of their examples are still to be run, so
+    that each namespace can be cleared as soon as the last example from its document
+    has been run.
+    """
+
+    def __init__(self) -> None:
+        self.remaining: Dict['Document', int] = {}
+        self.live: Set['Document'] = set()
+        #: The documents whose namespaces have been cleared. These are weak references,
+        #: so that documents no longer needed can still be freed.
+        self.released: 'WeakSet[Document]' = WeakSet()
+        #: The number of namespaces that have been cleared.
+        self.cleared: int = 0
+        #: The largest number of namespaces that were live at the same time.
+        self.peak: int = 0
+
+    def __repr__(self) -> str:
+        return (
+            f'<Namespaces: {len(self.live)} live, peak of {self.peak}, '
+            f'{self.cleared} released>'
+        )
+
+    def expect(self, document: 'Document') -> None:
+        """
+        Record that an example from the supplied document is going to be run.
+        """
+        self.remaining[document] = self.remaining.get(document, 0) + 1
+
+    def open(self, document: 'Document') -> bool:
+        """
+        Record that the supplied document's namespace is being set up, returning ``False``
+        if it should not be as it has already been released.
+        """
+        if document in self.released:
+            return False
+        self.live.add(document)
+        self.peak = max(self.peak, len(self.live))
+        return True
+
+    def finish(self, document: 'Document') -> bool:
+        """
+        Record that an example from the supplied document has been run, returning ``True``
+        if it was the last one expected.
+        """
+        remaining = self.remaining.get(document, 0) - 1
+        if remaining > 0:
+            self.remaining[document] = remaining
+            return False
+        self.remaining.pop(document, None)
+        return True
+
+    def close(self, document: 'Document') -> None:
+        """
+        Record that the supplied document's namespace has been torn down, clearing it if
+        no more of its examples are going to be run. Otherwise, it remains live, as it
+        will be set up again before they are.
+        """
+        if document not in self.remaining:
+            document.namespace.clear()
+            self.live.discard(document)
+            self.released.add(document)
+            self.cleared += 1
@@ -1,4 +1,5 @@
 from collections.abc import Iterable
+from typing import Optional
 from doctest import (
     DocTestParser as BaseDocTestParser,
     Example as DocTestExample,
@@ -6,6 +7,7 @@ from doctest import (
 
 from sybil.evaluators.doctest import DocTestEvaluator
 from sybil.region import Region
+from sybil.text import LineIndex
 
 
 class DocTestStringParser(BaseDocTestParser):
@@ -18,20 +20,26 @@ class DocTestStringParser(BaseDocTestParser):
         #: The evaluator to use for any doctests found in the supplied source string.
         self.evaluator: DocTestEvaluator = evaluator
 
-    def __call__(self, string: str, name: str) -> Iterable[Region]:
+    def __call__(
+            self, string: str, name: str, line_index: Optional[LineIndex] = None
+    ) -> Iterable[Region]:
         """
         This will yield :class:`sybil.Region` objects for any doctest examples found in
         the supplied ``string`` with the :attr:`evaluator` supplied to its constructor
         and the file ``name`` supplied.
 
         Each section starting with a ``>>>`` will form a separate region.
+
+        If a :class:`~sybil.text.LineIndex` for the ``string`` already exists, it can be
+        passed as ``line_index``.
         """
         # a cut down version of doctest.DocTestParser.parse:
-        charno, lineno = 0, 0
+        if line_index is None:
+            line_index = LineIndex(string)
         # Find all doctest examples in the string:
         for m in self._EXAMPLE_RE.finditer(string):  # type: ignore
-            # Update lineno (lines before this example)
-            lineno += string.count('\n', charno, m.start())
+            # The zero based line number of the start of this example:
+            lineno = line_index.line(m.start()) - 1
             # Extract info from the regexp match.
             source, options, want, exc_msg = self._parse_example(m, name, lineno)  # type: ignore
 
@@ -47,7 +55,3 @@ class DocTestStringParser(BaseDocTestParser):
                     self.evaluator
 
                 )
-            # Update lineno (lines inside this example)
-            lineno += string.count('\n', m.start(), m.end())
-            # Update charno.
-            charno = m.end()
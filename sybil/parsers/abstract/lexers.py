@@ -2,11 +2,13 @@ import re
 import textwrap
 from itertools import chain
 from collections.abc import Iterable
-from typing import Optional, Dict, Pattern, List
+from typing import Optional, Dict, Pattern, List, Match
 
 from sybil import Document
 from sybil.region import Lexeme, Region
 from sybil.typing import Lexer
+from .patterns import PATTERNS
+from .scanning import SCANS, CombinedScanner
 
 
 class LexingException(Exception):
@@ -18,8 +20,28 @@ class LexingException(Exception):
 
 
 class LexerCollection(List[Lexer]):
+    """
+    A collection of :term:`lexers <lexer>` that can be called as a single lexer.
+
+    The start patterns of any :class:`BlockLexer` instances in the collection are
+    searched for in a single pass over the document's text rather than one pass per lexer.
+    """
+
+    _scanner: Optional[CombinedScanner] = None
+
+    def scanner(self) -> CombinedScanner:
+        patterns = tuple(dict.fromkeys(
+            re.compile(lexer.start_pattern) for lexer in self
+            if isinstance(lexer, BlockLexer) and type(lexer).__call__ is BlockLexer.__call__
+        ))
+        if self._scanner is None or tuple(self._scanner.patterns) != patterns:
+            self._scanner = CombinedScanner(patterns)
+        return self._scanner
 
     def __call__(self, document: Document) -> Iterable[Region]:
+        scanner = self.scanner()
+        if len(scanner.patterns) > 1:
+            scanner.prime(document)
         return chain(*(lexer(document) for lexer in self))
 
 
@@ -61,13 +83,24 @@ class BlockLexer:
         self.mapping = mapping
 
     def __call__(self, document: Document) -> Iterable[Region]:
-        for start_match in re.finditer(self.start_pattern, document.text):
+        start_pattern = re.compile(self.start_pattern)
+        return self.lex(document, SCANS.get(
+            document, start_pattern, lambda: start_pattern.finditer(document.text)
+        ))
+
+    def lex(self, document: Document, start_matches: Iterable[Match[str]]) -> Iterable[Region]:
+        """
+        Yield a :class:`~sybil.Region` for each of the supplied matches of the
+        ``start_pattern`` in the supplied document. Subclasses that need to post-process
+        the regions found should extend this method rather than :meth:`__call__`.
+        """
+        for start_match in start_matches:
             source_start = start_match.end()
             lexemes = start_match.groupdict()
             prefix = lexemes.pop('prefix', '')
-            end_pattern = re.compile(self.end_pattern_template.format(
-                prefix=prefix, len_prefix=len(prefix)
-            ))
+            end_pattern = PATTERNS.compile(
+                self.end_pattern_template, prefix=prefix, len_prefix=len(prefix)
+            )
             end_match = end_pattern.search(document.text, source_start)
             if end_match is None:
                 raise LexingException(
@@ -0,0 +1,71 @@
+import re
+from collections import OrderedDict
+from threading import Lock
+from typing import Pattern, Tuple, Any
+
+PatternKey = Tuple[str, int, Tuple[Tuple[str, Any], ...]]
+
+
+class PatternRegistry:
+    """
+    A registry of compiled regular expressions, keyed by the template they were formatted
+    from along with the substitutions and flags used, such that identical patterns are only
+    formatted and compiled once, regardless of how many lexers need them.
+
+    When it holds more than ``maxsize`` patterns, the least recently used ones are evicted.
+
+    :param maxsize:
+        The maximum number of compiled patterns to keep.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self.patterns: 'OrderedDict[PatternKey, Pattern[str]]' = OrderedDict()
+        self.lock = Lock()
+        #: The number of times a compiled pattern was found in this registry.
+        self.hits: int = 0
+        #: The number of times a pattern had to be formatted and compiled.
+        self.misses: int = 0
+        #: The number of compiled patterns that have been evicted from this registry.
+        self.evictions: int = 0
+
+    def __repr__(self) -> str:
+        return (
+            f'<PatternRegistry: {len(self.patterns)}/{self.maxsize} patterns, '
+            f'{self.hits} hits, {self.misses} misses, {self.evictions} evictions>'
+        )
+
+    def compile(self, template: str, flags: int = 0, **substitutions: Any) -> Pattern[str]:
+        """
+        Return the compiled :class:`~typing.Pattern` for the supplied template.
+        If any substitutions are supplied, the template is formatted with them using
+        :meth:`str.format` before being compiled, otherwise it is compiled as-is.
+        """
+        key: PatternKey = (template, flags, tuple(sorted(substitutions.items())))
+        with self.lock:
+            pattern = self.patterns.get(key)
+            if pattern is not None:
+                self.hits += 1
+                self.patterns.move_to_end(key)
+                return pattern
+        source = template.format(**substitutions) if substitutions else template
+        pattern = re.compile(source, flags)
+        with self.lock:
+            self.misses += 1
+            self.patterns[key] = pattern
+            while len(self.patterns) > self.maxsize:
+                self.patterns.popitem(last=False)
+                self.evictions += 1
+        return pattern
+
+    def clear(self) -> None:
+        """
+        Remove all compiled patterns from this registry and reset its statistics.
+        """
+        with self.lock:
+            self.patterns.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+#: The registry used by Sybil's lexers.
+PATTERNS = PatternRegistry()
@@ -0,0 +1,278 @@
+import re
+from collections.abc import Callable, Hashable, Iterable, Sequence
+from typing import Any, Dict, List, Match, Optional, Pattern, Tuple
+from weakref import ref
+
+from sybil import Document
+
+QUANTIFIER = re.compile(r'(?:[*+?]|\{\d*(?:,\d*)?\})[?+]?')
+INLINE_GLOBAL_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+ESCAPE_LENGTHS = {'x': 2, 'u': 4, 'U': 8}
+MAX_GROUP_REFERENCE = 99
+
+
+class ScanCache:
+    """
+    A cache of the results of scanning the text of the :class:`~sybil.Document`
+    currently being parsed, such that lexers that need the same scan of that text,
+    even when used by different parsers, only need it to be performed once.
+
+    Only the results for the most recently scanned document are kept, and only until
+    :meth:`clear` is called once the document has been parsed, as they refer to its text.
+    """
+
+    def __init__(self) -> None:
+        self.current: Tuple[Optional['ref[Document]'], Optional[str], Dict[Any, Any]] = (
+            None, None, {}
+        )
+
+    def results_for(self, document: Document) -> Dict[Any, Any]:
+        document_ref, text, results = self.current
+        if document_ref is None or document_ref() is not document or text is not document.text:
+            results = {}
+            self.current = (ref(document), document.text, results)
+        return results
+
+    def clear(self) -> None:
+        """
+        Discard the results kept for the most recently scanned document.
+        """
+        self.current = (None, None, {})
+
+    def get(self, document: Document, key: Hashable, scan: Callable[[], Iterable[Any]]) -> Any:
+        """
+        Return the result of calling ``scan``, as a :class:`list`, which is cached for the
+        supplied ``document`` using the supplied ``key``.
+        """
+        results = self.results_for(document)
+        result = results.get(key)
+        if result is None:
+            result = results[key] = list(scan())
+        return result
+
+
+SCANS = ScanCache()
+
+
+def _escape_end(pattern: str, index: int) -> int:
+    # index is that of the backslash, return the index just after the escape sequence.
+    char = pattern[index+1:index+2]
+    end = index + 2
+    if char in ESCAPE_LENGTHS:
+        return end + ESCAPE_LENGTHS[char]
+    if char == 'N' and pattern[end:end+1] == '{':
+        return pattern.index('}', end) + 1
+    if char.isdigit():
+        while end < len(pattern) and end - index < 4 and pattern[end].isdigit():
+            end += 1
+    return end
+
+
+def _class_end(pattern: str, index: int) -> int:
+    # index is that of the opening bracket, return the index just after the closing one.
+    index += 1
+    if pattern[index:index+1] == '^':
+        index += 1
+    if pattern[index:index+1] == ']':
+        index += 1
+    while pattern[index] != ']':
+        if pattern[index] == '\\':
+            index = _escape_end(pattern, index)
+        else:
+            index += 1
+    return index + 1
+
+
+def _group_end(pattern: str, index: int) -> int:
+    # index is that of the opening parenthesis, return the index just after the closing one.
+    depth = 0
+    while True:
+        char = pattern[index]
+        if char == '\\':
+            index = _escape_end(pattern, index)
+            continue
+        if char == '[':
+            index = _class_end(pattern, index)
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if not depth:
+                return index + 1
+        index += 1
+
+
+def tokenize(pattern: str) -> List[str]:
+    """
+    Split a regular expression pattern into its top level atoms, each including any
+    quantifier that applies to it.
+    """
+    tokens = []
+    index = 0
+    while index < len(pattern):
+        start = index
+        char = pattern[index]
+        if char == '\\':
+            index = _escape_end(pattern, index)
+        elif char == '[':
+            index = _class_end(pattern, index)
+        elif char == '(':
+            index = _group_end(pattern, index)
+        else:
+            index += 1
+        quantifier = QUANTIFIER.match(pattern, index)
+        if quantifier is not None and char != '|':
+            index = quantifier.end()
+        tokens.append(pattern[start:index])
+    return tokens
+
+
+class Rewriter:
+    """
+    Rename the groups in part of a pattern and adjust references to them so that
+    part can be used as one alternative amongst several in a combined pattern.
+    """
+
+    def __init__(self, suffix: str, shared_names: Sequence[str], shared_groups: int, offset: int):
+        self.suffix = suffix
+        self.shared_names = shared_names
+        self.shared_groups = shared_groups
+        self.offset = offset
+        self.groups = 0
+
+    def rename(self, name: str) -> str:
+        return name if name in self.shared_names else name + self.suffix
+
+    def __call__(self, pattern: str) -> str:
+        output = []
+        index = 0
+        while index < len(pattern):
+            char = pattern[index]
+            if char == '\\':
+                end = _escape_end(pattern, index)
+                escape = pattern[index:end]
+                if escape[1:2].isdigit() and escape[1] != '0' and len(escape) < 4:
+                    number = int(escape[1:])
+                    if number > self.shared_groups:
+                        number += self.offset
+                    if number > MAX_GROUP_REFERENCE:
+                        raise ValueError('too many groups')
+                    escape = f'(?:\\{number})'
+                output.append(escape)
+                index = end
+            elif char == '[':
+                end = _class_end(pattern, index)
+                output.append(pattern[index:end])
+                index = end
+            elif pattern.startswith('(?P<', index):
+                end = pattern.index('>', index)
+                output.append('(?P<' + self.rename(pattern[index+4:end]) + '>')
+                self.groups += 1
+                index = end + 1
+            elif pattern.startswith('(?P=', index):
+                end = pattern.index(')', index)
+                output.append('(?P=' + self.rename(pattern[index+4:end]) + ')')
+                index = end + 1
+            elif pattern.startswith('(?(', index):
+                raise ValueError('conditional groups are not supported')
+            else:
+                if char == '(' and not pattern.startswith('(?', index):
+                    self.groups += 1
+                output.append(char)
+                index += 1
+        return ''.join(output)
+
+
+def count_groups(pattern: str) -> Tuple[int, List[str]]:
+    rewriter = Rewriter('', [], 0, 0)
+    rewriter(pattern)
+    return rewriter.groups, [name for name in re.compile(pattern).groupindex]
+
+
+def combine_patterns(patterns: Sequence[Pattern[str]]) -> Optional[Pattern[str]]:
+    """
+    Combine the supplied patterns into one that will match, without consuming any text,
+    at every position where any of the supplied patterns would match.
+
+    Any tokens common to the start of all the patterns are only matched once, which is where
+    the performance benefit comes from.
+
+    If the patterns cannot be combined, ``None`` is returned.
+    """
+    if not patterns or len({p.flags for p in patterns}) != 1 or patterns[0].flags & re.VERBOSE:
+        return None
+    sources = []
+    for pattern in patterns:
+        if INLINE_GLOBAL_FLAGS.search(pattern.pattern):
+            return None
+        tokens = tokenize(pattern.pattern)
+        if '|' in tokens:
+            tokens = ['(?:' + pattern.pattern + ')']
+        sources.append(tokens)
+
+    common = 0
+    for column in zip(*sources):
+        if len(set(column)) != 1:
+            break
+        common += 1
+    prefix = ''.join(sources[0][:common])
+
+    try:
+        shared_groups, shared_names = count_groups(prefix)
+        alternatives = []
+        offset = 0
+        for i, tokens in enumerate(sources):
+            rewriter = Rewriter(f'__{i}', shared_names, shared_groups, offset)
+            alternatives.append(rewriter(''.join(tokens[common:])))
+            offset += rewriter.groups
+        return re.compile(
+            '(?=' + prefix + '(?:' + '|'.join(alternatives) + '))', patterns[0].flags
+        )
+    except (ValueError, IndexError, re.error):
+        return None
+
+
+class CombinedScanner:
+    """
+    Find all the matches of several start patterns in a single pass over
+    a document's text, giving the same matches for each pattern as :func:`re.finditer`
+    would.
+    """
+
+    def __init__(self, patterns: Sequence[Pattern[str]]) -> None:
+        self.patterns = list(dict.fromkeys(patterns))
+        self.combined = combine_patterns(self.patterns) if len(self.patterns) > 1 else None
+
+    def scan(self, text: str) -> Dict[Pattern[str], List[Match[str]]]:
+        if self.combined is None:
+            return {pattern: list(pattern.finditer(text)) for pattern in self.patterns}
+        matches: Dict[Pattern[str], List[Match[str]]] = {p: [] for p in self.patterns}
+        next_allowed = dict.fromkeys(self.patterns, 0)
+        fallback = set()
+        for candidate in self.combined.finditer(text):
+            position = candidate.start()
+            for pattern in self.patterns:
+                if position < next_allowed[pattern]:
+                    continue
+                match = pattern.match(text, position)
+                if match is not None:
+                    end = match.end()
+                    if end == position:
+                        # empty matches have subtle semantics, leave them to finditer:
+                        fallback.add(pattern)
+                    matches[pattern].append(match)
+                    next_allowed[pattern] = end
+        for pattern in fallback:
+            matches[pattern] = list(pattern.finditer(text))
+        return matches
+
+    def prime(self, document: Document, cache: ScanCache = SCANS) -> None:
+        """
+        Scan the supplied document, storing the matches for each pattern in the
+        supplied cache.
+        """
+        results = cache.results_for(document)
+        if all(pattern in results for pattern in self.patterns):
+            return
+        results.update(self.scan(document.text))
@@ -1,11 +1,14 @@
 import re
 from collections.abc import Iterable
-from typing import Optional, Dict, Pattern, Match, List
+from typing import Optional, Dict, Pattern, Match, List, Iterator, Tuple
 
 from sybil import Document, Region, Lexeme
 from sybil.parsers.abstract.lexers import BlockLexer, strip_prefix
+from sybil.parsers.abstract.patterns import PATTERNS
+from sybil.parsers.abstract.scanning import SCANS
 
 FENCE = re.compile(r"^(?P<prefix>[ \t]*)(?P<fence>`{3,}|~{3,})", re.MULTILINE)
+LANGUAGE_INFO_PATTERN = '(?P<language>{language})$\n'
 
 
 class RawFencedCodeBlockLexer:
@@ -68,7 +71,13 @@ class RawFencedCodeBlockLexer:
             lexemes = {dest: lexemes[source] for source, dest in self.mapping.items()}
         return Region(opening.start(), region_end, lexemes=lexemes)
 
-    def __call__(self, document: Document) -> Iterable[Region]:
+    @classmethod
+    def fences(cls, document: Document) -> Iterator[Tuple[Match[str], Optional[Match[str]]]]:
+        """
+        Yield pairs of opening and closing fences found in the supplied document.
+        The closing fence of a block that is still open at the end of the document will be
+        ``None``.
+        """
         open_blocks: List[Match[str]] = []
         index = 0
         while True:
@@ -80,19 +89,37 @@ class RawFencedCodeBlockLexer:
             # does this fence close any open block?
             for i in range(len(open_blocks)):
                 existing = open_blocks[i]
-                if self.match_closes_existing(match, existing):
-                    maybe_region = self.make_region(existing, document, match)
-                    if maybe_region is not None:
-                        yield maybe_region
+                if cls.match_closes_existing(match, existing):
+                    yield existing, match
                     open_blocks = open_blocks[:i]
                     break
             else:
                 open_blocks.append(match)
         if open_blocks:
-            maybe_region = self.make_region(open_blocks[0], document, closing=None)
+            yield open_blocks[0], None
+
+    def lex(
+            self, document: Document, fences: Iterable[Tuple[Match[str], Optional[Match[str]]]]
+    ) -> Iterable[Region]:
+        """
+        Yield a :class:`~sybil.Region` for each of the supplied pairs of fences where the
+        ``info_pattern`` matches. Subclasses that need to post-process the regions found
+        should extend this method rather than :meth:`__call__`.
+        """
+        for opening, closing in fences:
+            maybe_region = self.make_region(opening, document, closing)
             if maybe_region is not None:
                 yield maybe_region
 
+    def __call__(self, document: Document) -> Iterable[Region]:
+        # Pairing up fences doesn't depend on the info pattern, so this is shared by all
+        # lexers of the same type, even when they're used by different parsers:
+        cls = type(self)
+        fences = SCANS.get(
+            document, (cls.fences, cls.match_closes_existing), lambda: cls.fences(document)
+        )
+        return self.lex(document, fences)
+
 
 class FencedCodeBlockLexer(RawFencedCodeBlockLexer):
     """
@@ -117,7 +144,9 @@ class FencedCodeBlockLexer(RawFencedCodeBlockLexer):
 
     def __init__(self, language: str, mapping: Optional[Dict[str, str]] = None) -> None:
         super().__init__(
-            info_pattern=re.compile(f'(?P<language>{language})$\n', re.MULTILINE),
+            info_pattern=PATTERNS.compile(
+                LANGUAGE_INFO_PATTERN, re.MULTILINE, language=language
+            ),
             mapping=mapping,
         )
 
@@ -164,9 +193,9 @@ class DirectiveInHTMLCommentLexer(BlockLexer):
             self, directive: str, arguments: str = '.*?', mapping: Optional[Dict[str, str]] = None
     ) -> None:
         super().__init__(
-            start_pattern=re.compile(
-                DIRECTIVE_IN_HTML_COMMENT_START.format(directive=directive, arguments=arguments),
-                re.MULTILINE
+            start_pattern=PATTERNS.compile(
+                DIRECTIVE_IN_HTML_COMMENT_START, re.MULTILINE,
+                directive=directive, arguments=arguments,
             ),
             end_pattern_template=DIRECTIVE_IN_HTML_COMMENT_END,
             mapping=mapping,
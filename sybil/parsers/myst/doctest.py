@@ -14,10 +14,14 @@ class DocTestDirectiveParser:
         :ref:`doctest option flags<option-flags-and-directives>` to use
         when evaluating the examples found by this parser.
 
+    :param batch:
+        If ``True``, consecutive examples found by this parser are run together.
+        See :class:`~sybil.evaluators.doctest.DocTestEvaluator`.
+
     """
-    def __init__(self, optionflags: int = 0) -> None:
+    def __init__(self, optionflags: int = 0, batch: bool = False) -> None:
         self.lexer = DirectiveLexer('doctest')
-        self.string_parser = DocTestStringParser(DocTestEvaluator(optionflags))
+        self.string_parser = DocTestStringParser(DocTestEvaluator(optionflags, batch))
 
     def __call__(self, document: Document) -> Iterable[Region]:
         for lexed_region in self.lexer(document):
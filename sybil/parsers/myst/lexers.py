@@ -1,9 +1,10 @@
 import re
 from collections.abc import Iterable
-from typing import Optional, Dict
+from typing import Optional, Dict, Match, Tuple
 
 from sybil import Document, Region
 from sybil.parsers.abstract.lexers import BlockLexer
+from sybil.parsers.abstract.patterns import PATTERNS
 from sybil.parsers.markdown.lexers import RawFencedCodeBlockLexer
 from sybil.parsers.rest.lexers import parse_options_and_source
 
@@ -61,15 +62,16 @@ class DirectiveLexer(RawFencedCodeBlockLexer):
             self, directive: str, arguments: str = '.*', mapping: Optional[Dict[str, str]] = None
     ) -> None:
         super().__init__(
-            info_pattern=re.compile(
-                INFO_PATTERN.format(directive=directive, arguments=arguments),
-                re.MULTILINE,
+            info_pattern=PATTERNS.compile(
+                INFO_PATTERN, re.MULTILINE, directive=directive, arguments=arguments
             ),
             mapping=mapping,
         )
 
-    def __call__(self, document: Document) -> Iterable[Region]:
-        for lexed in super().__call__(document):
+    def lex(
+            self, document: Document, fences: Iterable[Tuple[Match[str], Optional[Match[str]]]]
+    ) -> Iterable[Region]:
+        for lexed in super().lex(document, fences):
             parse_options_and_source(lexed)
             parse_yaml_options(lexed)
             yield lexed
@@ -113,9 +115,9 @@ class DirectiveInPercentCommentLexer(BlockLexer):
             self, directive: str, arguments: str = '.*', mapping: Optional[Dict[str, str]] = None
     ) -> None:
         super().__init__(
-            start_pattern=re.compile(
-                DIRECTIVE_IN_PERCENT_COMMENT_START.format(directive=directive, arguments=arguments),
-                re.MULTILINE
+            start_pattern=PATTERNS.compile(
+                DIRECTIVE_IN_PERCENT_COMMENT_START, re.MULTILINE,
+                directive=directive, arguments=arguments,
             ),
             end_pattern_template=DIRECTIVE_IN_PERCENT_COMMENT_END,
             mapping=mapping,
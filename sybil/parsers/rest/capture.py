@@ -1,7 +1,6 @@
 import re
 import string
 from collections.abc import Iterable
-from typing import List, Tuple
 from textwrap import dedent
 
 from sybil import Region, Document
@@ -11,6 +10,12 @@ CAPTURE_DIRECTIVE = re.compile(
     r'^(?P<indent>(\t| )*)\.\.\s*-+>\s*(?P<name>\S+).*$'
 )
 
+# The same as CAPTURE_DIRECTIVE, but used to find all the capture directives in a
+# document's text in one pass, so whitespace may not span lines:
+CAPTURE_DIRECTIVE_IN_TEXT = re.compile(
+    r'^(?P<indent>[\t ]*)\.\.[^\S\n]*-+>[^\S\n]*(?P<name>\S+).*$', re.MULTILINE
+)
+
 
 def indent_matches(line: str, indent: str) -> bool:
     # Is the indentation of a line match what we're looking for?
@@ -29,20 +34,11 @@ def indent_matches(line: str, indent: str) -> bool:
     return False
 
 
-class DocumentReversedLines(List[str]):
-
-    def __init__(self, document: Document) -> None:
-        super().__init__()
-        self[:] = document.text.splitlines(keepends=True)
-        self.current_line = len(self)
-        self.current_line_end_position = len(document.text)
-
-    def iterate_with_line_number(self) -> Iterable[Tuple[int, str]]:
-        while self.current_line > 0:
-            self.current_line -= 1
-            line = self[self.current_line]
-            self.current_line_end_position -= len(line)
-            yield self.current_line, line
+def line_starts_before(text: str, position: int) -> Iterable[int]:
+    # Yield the start of each line ending before position, working backwards.
+    while position > 0:
+        position = text.rfind('\n', 0, position - 1) + 1
+        yield position
 
 
 class CaptureParser:
@@ -50,42 +46,42 @@ class CaptureParser:
     A :any:`Parser` for :ref:`captures <capture-parser>`.
     """
     def __call__(self, document: Document) -> Iterable[Region]:
-        lines = DocumentReversedLines(document)
-
-        for end_index, line in lines.iterate_with_line_number():
-
-            directive = CAPTURE_DIRECTIVE.match(line)
-            if directive:
-
-                region_end = lines.current_line_end_position
-
-                indent = directive.group('indent')
-                for start_index, line in lines.iterate_with_line_number():
-                    if indent_matches(line, indent):
-                        # don't include the preceding line in the capture
-                        start_index += 1
-                        break
-                else:
-                    # make it blow up
-                    start_index = end_index
-
-                if end_index - start_index < 2:
-                    raise ValueError((
-                        "couldn't find the start of the block to match "
-                        "%r on line %i of %s"
-                    ) % (directive.group(), end_index+1, document.path))
-
-                # after dedenting, we need to remove excess leading and trailing
-                # newlines, before adding back the final newline that's strippped
-                # off
-                text = dedent(''.join(lines[start_index:end_index])).strip()+'\n'
-
-                name = directive.group('name')
-                parsed = name, text
-
-                yield Region(
-                    lines.current_line_end_position,
-                    region_end,
-                    parsed,
-                    evaluate_capture
-                )
+        text = document.text
+        # Lines before this point have been consumed by a capture that's already been found:
+        consumed = len(text)
+
+        for directive in reversed(list(CAPTURE_DIRECTIVE_IN_TEXT.finditer(text))):
+
+            region_end = directive.start()
+            if region_end >= consumed:
+                continue
+
+            indent = directive.group('indent')
+            block_start = region_end
+            lines = 0
+            for line_start in line_starts_before(text, region_end):
+                if indent_matches(text[line_start:block_start], indent):
+                    break
+                block_start = line_start
+                lines += 1
+            else:
+                # make it blow up
+                lines = 0
+                line_start = 0
+
+            if lines < 2:
+                raise ValueError((
+                    "couldn't find the start of the block to match "
+                    "%r on line %i of %s"
+                ) % (directive.group(), text.count('\n', 0, region_end)+1, document.path))
+
+            # after dedenting, we need to remove excess leading and trailing
+            # newlines, before adding back the final newline that's strippped
+            # off
+            captured = dedent(text[block_start:region_end]).strip()+'\n'
+
+            name = directive.group('name')
+            parsed = name, captured
+
+            consumed = line_start
+            yield Region(line_start, region_end, parsed, evaluate_capture)
@@ -14,12 +14,16 @@ class DocTestParser:
         :ref:`doctest option flags<option-flags-and-directives>` to use
         when evaluating the examples found by this parser.
 
+    :param batch:
+        If ``True``, consecutive examples found by this parser are run together.
+        See :class:`~sybil.evaluators.doctest.DocTestEvaluator`.
+
     """
-    def __init__(self, optionflags: int = 0) -> None:
-        self.string_parser = DocTestStringParser(DocTestEvaluator(optionflags))
+    def __init__(self, optionflags: int = 0, batch: bool = False) -> None:
+        self.string_parser = DocTestStringParser(DocTestEvaluator(optionflags, batch))
 
     def __call__(self, document: Document) -> Iterable[Region]:
-        return self.string_parser(document.text, document.path)
+        return self.string_parser(document.text, document.path, document.line_index)
 
 
 class DocTestDirectiveParser:
@@ -30,11 +34,15 @@ class DocTestDirectiveParser:
         :ref:`doctest option flags<option-flags-and-directives>` to use
         when evaluating the examples found by this parser.
 
+    :param batch:
+        If ``True``, consecutive examples found by this parser are run together.
+        See :class:`~sybil.evaluators.doctest.DocTestEvaluator`.
+
     """
 
-    def __init__(self, optionflags: int = 0) -> None:
+    def __init__(self, optionflags: int = 0, batch: bool = False) -> None:
         self.lexer = DirectiveLexer(directive='doctest')
-        self.string_parser = DocTestStringParser(DocTestEvaluator(optionflags))
+        self.string_parser = DocTestStringParser(DocTestEvaluator(optionflags, batch))
 
     def __call__(self, document: Document) -> Iterable[Region]:
         for lexed in self.lexer(document):
@@ -1,9 +1,10 @@
 import re
 from collections.abc import Iterable
-from typing import Optional, Dict
+from typing import Optional, Dict, Match
 
 from sybil import Document, Region
 from sybil.parsers.abstract.lexers import BlockLexer
+from sybil.parsers.abstract.patterns import PATTERNS
 
 START_PATTERN_TEMPLATE =(
     r'^(?P<prefix>[ \t]*)\.\.\s*(?P<directive>{directive})'
@@ -61,20 +62,19 @@ class DirectiveLexer(BlockLexer):
         Both ``directive`` and ``arguments`` are regex patterns.
         """
         super().__init__(
-            start_pattern=re.compile(
-                START_PATTERN_TEMPLATE.format(
-                    directive=directive,
-                    delimiter=self.delimiter,
-                    arguments=arguments
-                ),
-                re.MULTILINE
+            start_pattern=PATTERNS.compile(
+                START_PATTERN_TEMPLATE,
+                re.MULTILINE,
+                directive=directive,
+                delimiter=self.delimiter,
+                arguments=arguments,
             ),
             end_pattern_template=END_PATTERN_TEMPLATE,
             mapping=mapping,
         )
 
-    def __call__(self, document: Document) -> Iterable[Region]:
-        for lexed in super().__call__(document):
+    def lex(self, document: Document, start_matches: Iterable[Match[str]]) -> Iterable[Region]:
+        for lexed in super().lex(document, start_matches):
             parse_options_and_source(lexed)
             yield lexed
 
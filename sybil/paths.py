@@ -0,0 +1,287 @@
+import os
+import re
+from fnmatch import translate
+from pathlib import Path, PurePath, PureWindowsPath
+from typing import (
+    TYPE_CHECKING, Collection, Iterator, List, Optional, Pattern, Sequence, Tuple
+)
+
+if TYPE_CHECKING:
+    from .sybil import Sybil
+
+#: Whether paths are compared case-insensitively, as :meth:`pathlib.PurePath.match` does.
+CASE_INSENSITIVE = isinstance(PurePath(), PureWindowsPath)
+
+WILDCARDS = re.compile(r'[*?\[\]]')
+
+
+def casefold(text: str) -> str:
+    return text.lower() if CASE_INSENSITIVE else text
+
+
+class GlobPattern:
+    """
+    A compiled version of a glob pattern that gives the same results as
+    :meth:`pathlib.PurePath.match`, where the pattern is matched against the right-most
+    parts of a relative path, one part at a time.
+    """
+
+    def __init__(self, pattern: str) -> None:
+        pure = PurePath(pattern)
+        if not pure.parts:
+            raise ValueError('empty pattern')
+        self.pattern = pattern
+        #: Absolute patterns can never match a relative path.
+        self.absolute = bool(pure.drive or pure.root)
+        self.parts: Tuple[Pattern[str], ...] = tuple(
+            re.compile(translate(casefold(part))) for part in pure.parts
+        )
+        last = casefold(pure.parts[-1])
+        # The literal text following the last wildcard in the last part of the pattern,
+        # which any matching file name must end with:
+        self.suffix = WILDCARDS.split(last)[-1]
+        self.name = self.parts[-1]
+
+    def __repr__(self) -> str:
+        return f'<GlobPattern {self.pattern!r}>'
+
+    def match(self, parts: Tuple[str, ...]) -> bool:
+        # parts must be casefolded if needed.
+        if self.absolute or len(self.parts) > len(parts):
+            return False
+        for part, pattern in zip(reversed(parts), reversed(self.parts)):
+            if pattern.match(part) is None:
+                return False
+        return True
+
+
+class PathMatcher:
+    """
+    A compiled version of the ``patterns``, ``excludes`` and ``filenames`` of a
+    :class:`~sybil.Sybil` that gives the same answers as matching each of them with
+    :meth:`pathlib.PurePath.match` against the path relative to ``root``.
+
+    Before any glob patterns are evaluated, file names are checked against the literal
+    suffixes of the patterns and then against a single expression made from their final
+    parts, which rejects most files cheaply.
+    """
+
+    def __init__(
+            self,
+            root: Path,
+            patterns: Sequence[str],
+            excludes: Sequence[str],
+            filenames: Collection[str],
+    ) -> None:
+        self.root = root
+        self.root_parts = tuple(casefold(part) for part in root.parts)
+        self.patterns = [GlobPattern(pattern) for pattern in patterns]
+        self.excludes = [GlobPattern(exclude) for exclude in excludes]
+        self.filenames = frozenset(filenames)
+        suffixes = tuple(pattern.suffix for pattern in self.patterns)
+        #: The literal suffixes one of which every file name matching a pattern must end with,
+        #: or ``None`` if any pattern ends with a wildcard.
+        self.suffixes: Optional[Tuple[str, ...]] = None if '' in suffixes else suffixes
+        self.names: Optional[Pattern[str]] = None
+        if self.patterns:
+            self.names = re.compile('|'.join(
+                f'(?:{pattern.name.pattern})' for pattern in self.patterns
+            ))
+
+    def might_match(self, name: str) -> bool:
+        """
+        Return ``False`` if the supplied file name definitely does not match.
+        """
+        if name in self.filenames:
+            return True
+        if self.names is None:
+            return False
+        folded = casefold(name)
+        if self.suffixes is not None and not folded.endswith(self.suffixes):
+            return False
+        return self.names.match(folded) is not None
+
+    def relative_parts(self, path: Path) -> Optional[Tuple[str, ...]]:
+        parts = path.parts
+        count = len(self.root_parts)
+        if tuple(casefold(part) for part in parts[:count]) != self.root_parts:
+            return None
+        return parts[count:]
+
+    def __call__(self, path: Path) -> bool:
+        if not self.might_match(path.name):
+            return False
+        parts = self.relative_parts(path)
+        if parts is None:
+            return False
+        name = parts[-1] if parts else ''
+        folded = tuple(casefold(part) for part in parts)
+        if not (name in self.filenames or any(p.match(folded) for p in self.patterns)):
+            return False
+        return not any(exclude.match(folded) for exclude in self.excludes)
+
+
+class CollectionMatcher:
+    """
+    Find which of several :class:`~sybil.Sybil` instances should parse a path,
+    rejecting file names that none of them could match before checking each one.
+    """
+
+    def __init__(self, sybils: Sequence['Sybil']) -> None:
+        self.sybils = sybils
+        self.matchers: List[PathMatcher] = []
+        self.filenames: Collection[str] = frozenset()
+        self.suffixes: Optional[Tuple[str, ...]] = None
+
+    def update(self) -> None:
+        matchers = [sybil.matcher() for sybil in self.sybils]
+        if all(a is b for a, b in zip(matchers, self.matchers)) and self.matchers:
+            return
+        self.matchers = matchers
+        self.filenames = frozenset().union(*(matcher.filenames for matcher in matchers))
+        suffixes: List[str] = []
+        for matcher in matchers:
+            if matcher.suffixes is None:
+                self.suffixes = None
+                break
+            suffixes.extend(matcher.suffixes or ())
+        else:
+            self.suffixes = tuple(suffixes)
+
+    def __call__(self, path: Path) -> List['Sybil']:
+        """
+        Return the :class:`~sybil.Sybil` instances that should parse the supplied path.
+        """
+        self.update()
+        name = path.name
+        if name not in self.filenames and self.suffixes is not None:
+            if not casefold(name).endswith(self.suffixes):
+                return []
+        return [sybil for sybil, matcher in zip(self.sybils, self.matchers) if matcher(path)]
+
+
+def _translate_ignore(pattern: str) -> str:
+    # Translate a .gitignore-style glob, which may contain **, into a regular expression.
+    output = []
+    index = 0
+    length = len(pattern)
+    while index < length:
+        if pattern.startswith('**/', index) and (index == 0 or pattern[index-1] == '/'):
+            output.append('(?:.*/)?')
+            index += 3
+            continue
+        if pattern.startswith('**', index) and index + 2 == length and (
+            index == 0 or pattern[index-1] == '/'
+        ):
+            output.append('.*')
+            index += 2
+            continue
+        char = pattern[index]
+        index += 1
+        if char == '*':
+            output.append('[^/]*')
+        elif char == '?':
+            output.append('[^/]')
+        elif char == '\\' and index < length:
+            output.append(re.escape(pattern[index]))
+            index += 1
+        elif char == '[':
+            end = index
+            if end < length and pattern[end] in '!^':
+                end += 1
+            if end < length and pattern[end] == ']':
+                end += 1
+            end = pattern.find(']', end)
+            if end == -1:
+                output.append('\\[')
+            else:
+                content = pattern[index:end].replace('\\', '\\\\')
+                if content[:1] in ('!', '^'):
+                    content = '^' + content[1:]
+                output.append(f'(?!/)[{content}]')
+                index = end + 1
+        else:
+            output.append(re.escape(char))
+    return ''.join(output)
+
+
+class IgnoreRule:
+    """
+    A single rule from a ``.gitignore``-style ignore file.
+    """
+
+    def __init__(self, line: str, base: str) -> None:
+        self.negated = line.startswith('!')
+        if self.negated:
+            line = line[1:]
+        self.directory_only = line.endswith('/')
+        line = line.rstrip('/')
+        anchored = '/' in line
+        line = line.lstrip('/')
+        source = _translate_ignore(line)
+        if not anchored:
+            source = '(?:.*/)?' + source
+        if base:
+            source = re.escape(base + '/') + source
+        self.pattern = re.compile(source, re.IGNORECASE if CASE_INSENSITIVE else 0)
+
+    def matches(self, relative: str, is_dir: bool) -> bool:
+        if self.directory_only and not is_dir:
+            return False
+        return self.pattern.fullmatch(relative) is not None
+
+
+def read_ignore_rules(path: Path, base: str) -> List[IgnoreRule]:
+    """
+    Read the rules from the ignore file at the supplied path, where ``base`` is the
+    relative path of the directory containing it.
+    """
+    rules = []
+    for line in path.read_text(errors='replace').splitlines():
+        line = line.rstrip()
+        if line.endswith('\\'):
+            line += ' '
+        if not line or line.startswith('#'):
+            continue
+        rules.append(IgnoreRule(line, base))
+    return rules
+
+
+def is_ignored(rules: Sequence[IgnoreRule], relative: str, is_dir: bool) -> bool:
+    ignored = False
+    for rule in rules:
+        if rule.negated == ignored and rule.matches(relative, is_dir):
+            ignored = not rule.negated
+    return ignored
+
+
+def walk(root: Path, ignore_files: Sequence[str] = ()) -> Iterator[Path]:
+    """
+    Lazily yield the files under ``root`` in the same order as
+    ``sorted(root.glob('**/*'))`` would, without following symlinks to directories.
+
+    If the names of any ``ignore_files`` are supplied, these are read from each
+    directory as it is visited and any files or directories they ignore, using
+    ``.gitignore`` semantics, are skipped, along with everything beneath them.
+    """
+    def visit(directory: Path, relative: str, rules: List[IgnoreRule]) -> Iterator[Path]:
+        for name in ignore_files:
+            ignore_file = directory / name
+            if ignore_file.is_file():
+                rules = rules + read_ignore_rules(ignore_file, relative)
+        try:
+            with os.scandir(directory) as scan:
+                entries = sorted(scan, key=lambda entry: casefold(entry.name))
+        except OSError:
+            return
+        for entry in entries:
+            entry_relative = f'{relative}/{entry.name}' if relative else entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if rules and is_ignored(rules, entry_relative, is_dir or entry.is_dir()):
+                continue
+            if is_dir:
+                yield from visit(directory / entry.name, entry_relative, rules)
+            elif entry.is_file():
+                yield directory / entry.name
+
+    return visit(root, '', [])
@@ -0,0 +1,345 @@
+import pickle
+import sys
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.context import BaseContext
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
+from unittest import TestCase, TestResult, TestSuite
+
+from .cache import parser_state
+from .document import Document
+from .sybil import Sybil
+from .timing import ParserTiming
+from .validation import Problem, validate_path
+
+#: The :class:`Sybil` instances available to a worker process.
+_sybils: Sequence[Sybil] = ()
+#: The test suites available to a worker process.
+_suites: Sequence[TestSuite] = ()
+
+ExcInfo = Tuple[Type[BaseException], BaseException, Optional[TracebackType]]
+Event = Tuple[Any, ...]
+Test = Union[TestCase, TestSuite]
+
+
+def can_fork() -> bool:
+    """
+    Return ``True`` if worker processes can safely be started by forking this process.
+    Forking is not used on macOS, where it is unsafe and not the default, or when this
+    process has more than one thread, as the threads are not copied to the child process.
+    """
+    if 'fork' not in get_all_start_methods() or sys.platform == 'darwin':
+        return False
+    return threading.active_count() == 1
+
+
+def context() -> BaseContext:
+    """
+    Return the multiprocessing context to use for worker processes.
+    Forking is preferred where it is safe, as it means parsers don't need to be pickled
+    to be sent to workers. Otherwise, worker processes are spawned.
+    """
+    return get_context('fork' if can_fork() else 'spawn')
+
+
+def fall_back(reason: str) -> None:
+    warnings.warn(
+        f'Sybil could not use worker processes, so is running in this process: {reason}',
+        RuntimeWarning,
+        stacklevel=3,
+    )
+
+
+def map_jobs(
+        function: Callable[[int, Path], Any],
+        sybils: Sequence[Sybil],
+        jobs: Sequence[Tuple[int, Path]],
+        processes: int,
+) -> Optional[List[Any]]:
+    """
+    Call the supplied function with each job in a pool of worker processes, returning
+    the results in the same order as ``jobs``. If worker processes can't be used, such as
+    when they must be spawned and the Sybils can't be pickled, a warning is issued and
+    ``None`` is returned so that the jobs can be done in this process instead.
+    """
+    mp_context = context()
+    if mp_context.get_start_method() != 'fork':
+        try:
+            pickle.dumps(sybils)
+        except Exception as exception:
+            fall_back(f'{type(exception).__name__}: {exception}')
+            return None
+    try:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=mp_context,
+            initializer=_initialize,
+            initargs=(sybils,),
+        ) as executor:
+            return list(executor.map(
+                function, [index for index, _ in jobs], [path for _, path in jobs],
+                chunksize=max(1, len(jobs) // (processes * 4)),
+            ))
+    except BrokenProcessPool as exception:
+        fall_back(f'{type(exception).__name__}: {exception}')
+        return None
+
+
+def _initialize(sybils: Sequence[Sybil]) -> None:
+    global _sybils
+    _sybils = sybils
+
+
+Counts = Tuple[int, int, int]
+Parsed = Tuple[str, Optional[bytes], Optional[float], List[Tuple[float, int]], Counts]
+
+
+def cache_counts(sybil: Sybil) -> Counts:
+    cache = sybil.cache
+    if cache is None:
+        return 0, 0, 0
+    return cache.hits, cache.misses, cache.uncacheable
+
+
+def _parse(index: int, path: Path) -> Parsed:
+    # Runs in a worker process. The regions are None if they can't be pickled.
+    # Along with the document's timings, the changes to the counts of the Sybil's cache
+    # are returned, as the cache in the worker process is a copy.
+    sybil = _sybils[index]
+    before = cache_counts(sybil)
+    document = sybil.parse(path)
+    counts = cache_counts(sybil)
+    regions = [region for _, region in document.regions]
+    data: Optional[bytes]
+    try:
+        data = parser_state(sybil).dumps(regions)
+    except Exception:
+        data = None
+    timings = [(timing.seconds, timing.regions) for timing in document.parser_timings]
+    changes = (counts[0] - before[0], counts[1] - before[1], counts[2] - before[2])
+    return document.text, data, document.read_time, timings, changes
+
+
+def parse_in_processes(
+        sybils: Sequence[Sybil], jobs: Sequence[Tuple[int, Path]], processes: int
+) -> List[Document]:
+    """
+    Parse the supplied documentation source files using a pool of worker processes.
+
+    :param sybils:
+        The :class:`Sybil` instances to use for parsing.
+
+    :param jobs:
+        A sequence of (index into ``sybils``, path) pairs.
+
+    :param processes:
+        The maximum number of worker processes to use.
+
+    :return:
+        A :class:`~sybil.Document` for each job, in the same order as ``jobs``.
+        Documents whose regions cannot be pickled are parsed in this process instead,
+        as are all the documents if worker processes can't be used.
+    """
+    results = map_jobs(_parse, sybils, jobs, processes)
+    if results is None:
+        return [sybils[index].parse(path) for index, path in jobs]
+    documents = []
+    for (index, path), (text, data, read_time, timings, counts) in zip(jobs, results):
+        sybil = sybils[index]
+        if data is None:
+            documents.append(sybil.parse(path))
+            continue
+        if sybil.cache is not None:
+            sybil.cache.hits += counts[0]
+            sybil.cache.misses += counts[1]
+            sybil.cache.uncacheable += counts[2]
+        document = sybil.document_type_for(path)(text, str(path))
+        document.regions = [(region.start, region) for region in parser_state(sybil).loads(data)]
+        document.read_time = read_time
+        document.parser_timings = [
+            ParserTiming(parser, seconds, regions)
+            for parser, (seconds, regions) in zip(sybil.parsers, timings)
+        ]
+        document.profiler = sybil.profiler
+        documents.append(document)
+    return documents
+
+
+def _validate(index: int, path: Path) -> List[Problem]:
+    # Runs in a worker process.
+    return validate_path(_sybils[index], path)
+
+
+def validate_in_processes(
+        sybils: Sequence[Sybil], jobs: Sequence[Tuple[int, Path]], processes: int
+) -> List[List[Problem]]:
+    """
+    Validate the supplied documentation source files using a pool of worker processes.
+
+    :param sybils:
+        The :class:`Sybil` instances to use for parsing.
+
+    :param jobs:
+        A sequence of (index into ``sybils``, path) pairs.
+
+    :param processes:
+        The maximum number of worker processes to use.
+
+    :return:
+        A list of the problems found for each job, in the same order as ``jobs``.
+    """
+    results = map_jobs(_validate, sybils, jobs, processes)
+    if results is None:
+        return [validate_path(sybils[index], path) for index, path in jobs]
+    return results
+
+
+class WorkerException(Exception):
+    """
+    An exception raised by a test run in a worker process. Its message is the formatted
+    traceback of the original exception.
+    """
+
+
+class RecordingResult(TestResult):
+    """
+    A :class:`~unittest.TestResult` used in worker processes that records the outcome of
+    each test such that it can be replayed onto a result in the main process.
+    """
+
+    def __init__(self, tests: Sequence[Test]) -> None:
+        super().__init__()
+        self.indexes = {id(test): index for index, test in enumerate(tests)}
+        self.events: List[Event] = []
+
+    def key(self, test: TestCase) -> Union[int, str]:
+        # Tests are identified by position, errors in class fixtures by their description:
+        index = self.indexes.get(id(test))
+        return str(test) if index is None else index
+
+    def format(self, err: ExcInfo, test: TestCase) -> str:
+        text: str = self._exc_info_to_string(err, test)  # type: ignore[attr-defined]
+        return text
+
+    def record(self, name: str, test: TestCase, *args: Any) -> None:
+        self.events.append((name, self.key(test)) + args)
+
+    def startTest(self, test: TestCase) -> None:
+        super().startTest(test)
+        self.record('startTest', test)
+
+    def stopTest(self, test: TestCase) -> None:
+        super().stopTest(test)
+        self.record('stopTest', test)
+
+    def addSuccess(self, test: TestCase) -> None:
+        self.record('addSuccess', test)
+
+    def addError(self, test: TestCase, err: ExcInfo) -> None:  # type: ignore[override]
+        self.record('addError', test, self.format(err, test))
+
+    def addFailure(self, test: TestCase, err: ExcInfo) -> None:  # type: ignore[override]
+        self.record('addFailure', test, self.format(err, test))
+
+    def addSkip(self, test: TestCase, reason: str) -> None:
+        self.record('addSkip', test, reason)
+
+    def addExpectedFailure(self, test: TestCase, err: ExcInfo) -> None:  # type: ignore[override]
+        self.record('addExpectedFailure', test, self.format(err, test))
+
+    def addUnexpectedSuccess(self, test: TestCase) -> None:
+        self.record('addUnexpectedSuccess', test)
+
+
+class ErrorHolder:
+    """
+    Stands in for a class fixture, such as ``setUpClass``, that raised an exception in a
+    worker process, when that exception is replayed onto a result.
+    """
+
+    failureException = None
+
+    def __init__(self, description: str) -> None:
+        self.description = description
+
+    def id(self) -> str:
+        return self.description
+
+    def shortDescription(self) -> None:
+        return None
+
+    def __str__(self) -> str:
+        return self.description
+
+    def __repr__(self) -> str:
+        return f'<ErrorHolder description={self.description!r}>'
+
+
+def _run(index: int) -> List[Event]:
+    # Runs in a worker process.
+    suite = _suites[index]
+    result = RecordingResult(list(suite))
+    suite.run(result)
+    return result.events
+
+
+def replay(events: Sequence[Event], tests: Sequence[Test], result: TestResult) -> None:
+    """
+    Replay the events recorded by a :class:`RecordingResult` onto the supplied result.
+    """
+    holders: Dict[str, Any] = {}
+    for name, key, *args in events:
+        if isinstance(key, int):
+            test = tests[key]
+        else:
+            test = holders.setdefault(key, ErrorHolder(key))
+        if name in ('addError', 'addFailure', 'addExpectedFailure'):
+            exception = WorkerException(args[0].rstrip('\n'))
+            args = [(WorkerException, exception, None)]
+        getattr(result, name)(test, *args)
+
+
+def run_in_processes(suites: Sequence[TestSuite], result: TestResult, processes: int) -> None:
+    """
+    Run each of the supplied suites in one of a pool of worker processes, replaying
+    the outcome of each test onto the supplied result in the same order as the suites.
+
+    The tests within each suite are run in order, in the same worker process.
+    Worker processes must be forked so that they have access to the suites. Where that
+    isn't safe, or the worker processes stop unexpectedly, a warning is issued and the
+    suites that have not been run are run in this process instead.
+    """
+    global _suites
+    if not can_fork():
+        fall_back('worker processes cannot safely be forked')
+        run_serially(suites, result)
+        return
+    _suites = suites
+    replayed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=get_context('fork')) as executor:
+            futures = [executor.submit(_run, index) for index in range(len(suites))]
+            for suite, future in zip(suites, futures):
+                if result.shouldStop:
+                    for remaining in futures:
+                        remaining.cancel()
+                    break
+                replay(future.result(), list(suite), result)
+                replayed += 1
+    except BrokenProcessPool as exception:
+        fall_back(f'{type(exception).__name__}: {exception}')
+        run_serially(suites[replayed:], result)
+    finally:
+        _suites = ()
+
+
+def run_serially(suites: Sequence[TestSuite], result: TestResult) -> None:
+    for suite in suites:
+        if result.shouldStop:
+            break
+        suite.run(result)
@@ -0,0 +1,206 @@
+import cProfile
+import pstats
+import tracemalloc
+from collections.abc import Callable, Sequence
+from fnmatch import fnmatch
+from hashlib import sha256
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .document import Document
+    from .example import Example
+
+CPU = 'cpu'
+MEMORY = 'memory'
+
+
+def format_size(size: int) -> str:
+    sign = '+' if size >= 0 else '-'
+    value = float(abs(size))
+    for unit in ('B', 'KiB', 'MiB'):
+        if value < 1024:
+            break
+        value /= 1024
+    else:
+        unit = 'GiB'
+    return f'{sign}{value:.1f} {unit}'
+
+
+class DocumentProfile:
+    # The results of profiling the examples from one document.
+
+    def __init__(self, document: 'Document', directory: Path) -> None:
+        self.document = document
+        self.directory = directory
+        self.stats: List[Tuple['Example', cProfile.Profile]] = []
+        self.allocations: List[Tuple['Example', List[Tuple[str, int]]]] = []
+
+
+class Profiler:
+    """
+    Profiles the evaluation of :term:`examples <example>`, using :mod:`cProfile` to see
+    where time is spent and :mod:`tracemalloc` to see where memory is allocated.
+
+    Once all the examples from a :class:`~sybil.Document` have been evaluated, the results
+    are written to a directory for that document within ``directory``:
+
+    - a :mod:`pstats` file for each example, named after the example's line and column,
+      along with ``document.pstats`` combining the results for all examples.
+    - ``allocations.txt``, listing the ``top`` lines of source with the largest growth
+      in memory allocated for each example and for the document as a whole.
+
+    :param directory:
+        The directory in which results will be written.
+
+    :param cpu:
+        Profile examples using :mod:`cProfile`.
+
+    :param memory:
+        Trace memory allocations made by examples using :mod:`tracemalloc`.
+
+    :param select:
+        If supplied, only examples where ``path:line`` matches one of these
+        :func:`patterns <fnmatch.fnmatch>` will be profiled, for example ``'*/api.rst:*'``
+        or ``'*.rst:412'``.
+
+    :param top:
+        The number of lines of source to show for each example and document in the
+        allocation report.
+    """
+
+    def __init__(
+            self,
+            directory: Union[str, Path],
+            cpu: bool = True,
+            memory: bool = False,
+            select: Sequence[str] = (),
+            top: int = 10,
+    ) -> None:
+        self.directory = Path(directory)
+        self.cpu = cpu
+        self.memory = memory
+        self.select = list(select)
+        self.top = top
+        self.documents: Dict['Document', DocumentProfile] = {}
+        #: The number of examples that have been profiled.
+        self.profiled: int = 0
+        self._started_tracing = False
+
+    def __repr__(self) -> str:
+        return f'<Profiler {self.directory}: {self.profiled} examples profiled>'
+
+    def selected(self, example: 'Example') -> bool:
+        if not self.select:
+            return True
+        name = f'{example.path}:{example.line}'
+        return any(fnmatch(name, pattern) for pattern in self.select)
+
+    def profile_for(self, document: 'Document') -> DocumentProfile:
+        profile = self.documents.get(document)
+        if profile is None:
+            path = Path(document.path)
+            suffix = sha256(str(path).encode('utf-8', 'surrogatepass')).hexdigest()[:8]
+            profile = self.documents[document] = DocumentProfile(
+                document, self.directory / f'{path.name}-{suffix}'
+            )
+            document.add_teardown(lambda: self.write(document))
+        return profile
+
+    def __call__(self, example: 'Example', evaluate: Callable[[], None]) -> None:
+        """
+        Call ``evaluate``, profiling it if the supplied example has been selected.
+        """
+        __tracebackhide__ = True
+        if not self.selected(example):
+            return evaluate()
+        document_profile = self.profile_for(example.document)
+        profile: Optional[cProfile.Profile] = None
+        before: Optional[tracemalloc.Snapshot] = None
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            before = tracemalloc.take_snapshot()
+        if self.cpu:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler, such as a debugger or coverage tool, is active:
+                profile = None
+        try:
+            evaluate()
+        finally:
+            if profile is not None:
+                profile.disable()
+                document_profile.stats.append((example, profile))
+            if before is not None:
+                after = tracemalloc.take_snapshot()
+                document_profile.allocations.append((example, self.growth(before, after)))
+            self.profiled += 1
+
+    @staticmethod
+    def growth(
+            before: tracemalloc.Snapshot, after: tracemalloc.Snapshot
+    ) -> List[Tuple[str, int]]:
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        differences = after.filter_traces(filters).compare_to(
+            before.filter_traces(filters), 'lineno'
+        )
+        return [
+            (f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}', stat.size_diff)
+            for stat in differences if stat.size_diff
+        ]
+
+    def allocation_report(self, document_profile: DocumentProfile) -> str:
+        totals: Dict[str, int] = {}
+        for _, growth in document_profile.allocations:
+            for location, size in growth:
+                totals[location] = totals.get(location, 0) + size
+        sections = [(f'{document_profile.document.path}:', list(totals.items()))]
+        for example, growth in document_profile.allocations:
+            sections.append((f'line {example.line}, column {example.column}:', growth))
+        lines = []
+        for title, growth in sections:
+            lines.append(title)
+            for location, size in sorted(growth, key=lambda item: -item[1])[:self.top]:
+                lines.append(f'  {format_size(size):>12}  {location}')
+            lines.append('')
+        return '\n'.join(lines)
+
+    def write(self, document: 'Document') -> None:
+        """
+        Write the results for the supplied document.
+        """
+        document_profile = self.documents.pop(document, None)
+        if document_profile is None:
+            return
+        directory = document_profile.directory
+        directory.mkdir(parents=True, exist_ok=True)
+        combined: Optional[pstats.Stats] = None
+        for example, profile in document_profile.stats:
+            stats = pstats.Stats(profile)
+            stats.dump_stats(directory / f'line-{example.line}-column-{example.column}.pstats')
+            if combined is None:
+                combined = stats
+            else:
+                combined.add(stats)
+        if combined is not None:
+            combined.dump_stats(directory / 'document.pstats')
+        if document_profile.allocations:
+            (directory / 'allocations.txt').write_text(self.allocation_report(document_profile))
+
+    def close(self) -> None:
+        """
+        Write the results for any documents not yet written and stop tracing memory
+        allocations if this profiler started doing so.
+        """
+        for document in list(self.documents):
+            self.write(document)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
 
 from sybil.typing import Evaluator, LexemeMapping
 
@@ -18,6 +18,9 @@ class Lexeme(str):
         self.offset = offset
         self.line_offset = line_offset
 
+    def __getnewargs__(self) -> Tuple[str, int, int]:  # type: ignore[override]
+        return str(self), self.offset, self.line_offset
+
     def strip_leading_newlines(self) -> 'Lexeme':
         stripped = self.lstrip('\n')
         removed = len(self) - len(stripped)
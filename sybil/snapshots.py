@@ -0,0 +1,148 @@
+import pickle
+from bisect import bisect_left
+from hashlib import sha256
+from importlib import import_module
+from io import BytesIO
+from itertools import islice
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Collection, Dict, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
+
+from .document import Document
+from .example import Example
+
+
+class NamespacePickler(pickle.Pickler):
+    # Modules are common in namespaces and can be re-imported by name:
+
+    def reducer_override(self, obj: Any) -> Any:
+        if isinstance(obj, ModuleType):
+            return import_module, (obj.__name__,)
+        return NotImplemented
+
+
+def snapshot(namespace: Dict[str, Any], exclude: Collection[str] = ()) -> Optional[bytes]:
+    """
+    Return a pickled image of the supplied namespace, leaving out the names in ``exclude``,
+    or ``None`` if anything in it cannot be pickled.
+    """
+    state = {
+        name: value for name, value in namespace.items()
+        if name not in exclude and name != '__builtins__'
+    }
+    buffer = BytesIO()
+    try:
+        NamespacePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(state)
+    except Exception:
+        return None
+    return buffer.getvalue()
+
+
+class Snapshots:
+    """
+    Images of the :attr:`~sybil.Document.namespace` of documents taken before each example
+    is evaluated, such that a failing example can later be run on its own.
+
+    An image is taken before each example is evaluated but only stored, in ``directory``,
+    if that example fails. When an example is evaluated without the examples before it
+    having been evaluated, such as when only failing tests are re-run, the stored image
+    is restored into the namespace. If there is no stored image, because the document has
+    changed or its namespace could not be pickled, the earlier examples are evaluated
+    first, ignoring any failures, to rebuild the namespace.
+
+    :param directory:
+        The directory in which images will be stored. It will be created if it
+        does not exist.
+    """
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory: Path = Path(directory)
+        self.evaluated: 'WeakKeyDictionary[Document, int]' = WeakKeyDictionary()
+        self.hashes: 'WeakKeyDictionary[Document, Tuple[str, bytes]]' = WeakKeyDictionary()
+        self.pending: Dict[str, Optional[bytes]] = {}
+        #: The number of examples for which a stored image was restored.
+        self.restored: int = 0
+        #: The number of examples evaluated to rebuild a namespace.
+        self.replayed: int = 0
+
+    def __repr__(self) -> str:
+        return f'<Snapshots {self.directory}: {self.restored} restored, {self.replayed} replayed>'
+
+    def key(self, example: Example, name: str = '') -> str:
+        document = example.document
+        text_hash = self.hashes.get(document)
+        if text_hash is None or text_hash[0] is not document.text:
+            text_digest = sha256(document.text.encode('utf-8', 'surrogatepass')).digest()
+            text_hash = self.hashes[document] = document.text, text_digest
+        digest = sha256(text_hash[1])
+        for part in (example.path, name, f'{example.line}:{example.column}'):
+            digest.update(part.encode('utf-8', 'surrogatepass'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.directory / f'{key}.pickle'
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.entry_path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            state: Dict[str, Any] = pickle.loads(data)
+        except Exception:
+            # A corrupt or incompatible image, get rid of it:
+            path.unlink(missing_ok=True)
+            return None
+        return state
+
+    def prepare(self, example: Example, name: str = '', exclude: Collection[str] = ()) -> None:
+        """
+        Make sure the namespace of the supplied example's document is in the state it would
+        be in had all the examples before it been evaluated, and take an image of it.
+        ``exclude`` contains names, such as those of fixtures, that are neither stored nor
+        restored.
+        """
+        document = example.document
+        namespace = example.namespace
+        regions = document.regions
+        index = bisect_left(regions, (example.region.start,))
+        while regions[index][1] is not example.region:
+            index += 1
+        last = self.evaluated.get(document, -1)
+        key = self.key(example, name)
+        if index > last + 1:
+            state = self.load(key)
+            if state is not None:
+                for existing in list(namespace):
+                    if existing not in exclude:
+                        del namespace[existing]
+                namespace.update(state)
+                self.restored += 1
+            else:
+                for earlier in islice(document.examples(), last + 1, index):
+                    self.replayed += 1
+                    try:
+                        earlier.evaluate()
+                    except Exception:
+                        pass
+        self.evaluated[document] = index
+        self.pending[key] = snapshot(namespace, exclude)
+
+    def finish(self, example: Example, name: str = '', failed: bool = False) -> None:
+        """
+        Store the image taken before the supplied example if it failed, or remove any
+        stored image if it did not.
+        """
+        key = self.key(example, name)
+        data = self.pending.pop(key, None)
+        path = self.entry_path(key)
+        if failed and data is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp = path.with_suffix(f'.{id(self)}.tmp')
+            temp.write_bytes(data)
+            temp.replace(path)
+        elif not failed:
+            path.unlink(missing_ok=True)
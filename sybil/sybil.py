@@ -1,12 +1,19 @@
 import inspect
 from pathlib import Path
-from collections.abc import Callable, Collection, Mapping, Sequence
-from typing import Any, Dict, Optional, Type, List, Tuple
+from collections.abc import Callable, Collection, Iterator, Mapping, Sequence
+from typing import TYPE_CHECKING, Any, Dict, Optional, Type, List, Tuple
 
 from .document import Document, PythonDocStringDocument
 from .example import Example
+from .paths import PathMatcher, walk
 from .typing import Parser
 
+if TYPE_CHECKING:
+    from .cache import ParseCache
+    from .profiling import Profiler
+    from .timing import Timings
+    from .validation import Problem
+
 DEFAULT_DOCUMENT_TYPES = {
     None: Document,
     '.py': PythonDocStringDocument,
@@ -78,6 +85,21 @@ class Sybil:
     :param name:
       A name to use in test identifiers so that the identifier indicates which :class:`Sybil`
       that test was discovered by.
+
+    :param cache:
+      An optional :class:`~sybil.cache.ParseCache` in which the regions parsed from each
+      documentation source file will be stored, such that unchanged files do not need to be
+      parsed again.
+
+    :param ignore_files:
+      The names of ``.gitignore``-style files that, when found in any directory searched
+      for documentation source files, list files and directories that should not be
+      searched. For example, ``ignore_files=['.gitignore']``. This is used by
+      :meth:`paths` and so by the :ref:`unitttest_integration`.
+
+    :param profiler:
+      An optional :class:`~sybil.profiling.Profiler` used to profile the evaluation of
+      examples from the documents parsed by this :class:`Sybil`.
     """
     def __init__(
         self,
@@ -94,6 +116,9 @@ class Sybil:
         encoding: str = 'utf-8',
         document_types: Optional[Mapping[Optional[str], Type[Document]]] = None,
         name: str = '',
+        cache: Optional['ParseCache'] = None,
+        ignore_files: Sequence[str] = (),
+        profiler: Optional['Profiler'] = None,
     ) -> None:
 
         self.parsers: Sequence[Parser] = parsers
@@ -119,6 +144,10 @@ class Sybil:
             self.document_types.update(document_types)
         self.default_document_type: Type[Document] = self.document_types[None]
         self.name = name
+        self.cache: Optional['ParseCache'] = cache
+        self.ignore_files: Sequence[str] = ignore_files
+        self.profiler: Optional['Profiler'] = profiler
+        self._matcher: Optional[Tuple[Tuple[Any, ...], PathMatcher]] = None
 
     def __repr__(self) -> str:
         return f'<Sybil: {self.name or str(id(self))}>'
@@ -130,27 +159,39 @@ class Sybil:
         assert isinstance(other, Sybil)
         return SybilCollection((self, other))
 
+    def matcher(self) -> PathMatcher:
+        """
+        The :class:`~sybil.paths.PathMatcher` for the current ``path``, ``patterns``,
+        ``excludes`` and ``filenames`` of this :class:`Sybil`.
+        """
+        key = (self.path, tuple(self.patterns), tuple(self.excludes), tuple(self.filenames))
+        if self._matcher is None or self._matcher[0] != key:
+            self._matcher = key, PathMatcher(*key)
+        return self._matcher[1]
+
     def should_parse(self, path: Path) -> bool:
-        try:
-            path = path.relative_to(self.path)
-        except ValueError:
-            return False
-
-        include = False
-        if any(path.match(p) for p in self.patterns):
-            include = True
-        if path.name in self.filenames:
-            include = True
-        if not include:
-            return False
-
-        if any(path.match(e) for e in self.excludes):
-            return False
-        return True
+        return self.matcher()(path)
+
+    def paths(self) -> Iterator[Path]:
+        """
+        Lazily yield the paths of all documentation source files under :attr:`path` that
+        this :class:`Sybil` should parse, in sorted order.
+        """
+        for path in walk(self.path, self.ignore_files):
+            if self.should_parse(path):
+                yield path
+
+    def document_type_for(self, path: Path) -> Type[Document]:
+        return self.document_types.get(path.suffix, self.default_document_type)
 
     def parse(self, path: Path) -> Document:
-        type_ = self.document_types.get(path.suffix, self.default_document_type)
-        return type_.parse(str(path), *self.parsers, encoding=self.encoding)
+        if self.cache is not None:
+            document = self.cache.parse(self, path)
+        else:
+            type_ = self.document_type_for(path)
+            document = type_.parse(str(path), *self.parsers, encoding=self.encoding)
+        document.profiler = self.profiler
+        return document
 
     def identify(self, example: Example) -> str:
         sybil_name = f'sybil:{self.name},' if self.name else ''
@@ -163,12 +204,48 @@ class Sybil:
         from .integration.pytest import pytest_integration
         return pytest_integration(self)
 
-    def unittest(self) -> Callable[[Any, Any, Optional[str]], Any]:
+    def unittest(
+            self,
+            parse_processes: Optional[int] = None,
+            processes: Optional[int] = None,
+            timings: Optional['Timings'] = None,
+    ) -> Callable[[Any, Any, Optional[str]], Any]:
         """
         The helper method for when you use :ref:`unitttest_integration`.
+
+        :param parse_processes:
+          If more than one, documentation source files will be parsed using a pool of
+          this many worker processes rather than in the current process.
+
+        :param processes:
+          If more than one, documents will be evaluated using a pool of this many worker
+          processes, with the examples from each document evaluated in order in the same
+          worker process.
+
+        :param timings:
+          If supplied, the documents parsed and examples evaluated will be added to this
+          :class:`~sybil.timing.Timings` so that the slowest can be reported on.
         """
         from .integration.unittest import unittest_integration
-        return unittest_integration(self)
+        return unittest_integration(
+            self, parse_processes=parse_processes, processes=processes, timings=timings
+        )
+
+    def validate(self, processes: Optional[int] = None) -> List['Problem']:
+        """
+        Parse all the documentation source files this :class:`Sybil` would use and compile
+        the Python examples found, without evaluating any examples, returning every
+        :class:`~sybil.validation.Problem` found. This is a quick way to find problems such
+        as lexing errors, overlapping regions, malformed arguments and syntax errors before
+        running any examples.
+
+        :param processes:
+          The number of worker processes to parse files in, defaulting to the number of
+          CPUs available. If one, files are parsed in the current process.
+        """
+        from .validation import validate
+        jobs = [(0, path) for path in self.paths()]
+        return [problem for found in validate([self], jobs, processes) for problem in found]
 
 
 class SybilCollection(List[Sybil]):
@@ -186,9 +263,38 @@ class SybilCollection(List[Sybil]):
         from .integration.pytest import pytest_integration
         return pytest_integration(*self)
 
-    def unittest(self) -> Callable[[Any, Any, Optional[str]], Any]:
+    def unittest(
+            self,
+            parse_processes: Optional[int] = None,
+            processes: Optional[int] = None,
+            timings: Optional['Timings'] = None,
+    ) -> Callable[[Any, Any, Optional[str]], Any]:
         """
         The helper method for when you use :ref:`unitttest_integration`.
+
+        :param parse_processes:
+          If more than one, documentation source files will be parsed using a pool of
+          this many worker processes rather than in the current process.
+
+        :param processes:
+          If more than one, documents will be evaluated using a pool of this many worker
+          processes, with the examples from each document evaluated in order in the same
+          worker process.
+
+        :param timings:
+          If supplied, the documents parsed and examples evaluated will be added to this
+          :class:`~sybil.timing.Timings` so that the slowest can be reported on.
         """
         from .integration.unittest import unittest_integration
-        return unittest_integration(*self)
+        return unittest_integration(
+            *self, parse_processes=parse_processes, processes=processes, timings=timings
+        )
+
+    def validate(self, processes: Optional[int] = None) -> List['Problem']:
+        """
+        Validate the documentation source files of each :class:`Sybil` in this collection,
+        as described in :meth:`Sybil.validate`.
+        """
+        from .validation import validate
+        jobs = [(index, path) for index, sybil in enumerate(self) for path in sybil.paths()]
+        return [problem for found in validate(self, jobs, processes) for problem in found]
@@ -1,18 +1,47 @@
 import re
+from array import array
+from bisect import bisect_left
+from typing import Tuple
 
 NEWLINE = re.compile("\n")
 
 
-class LineNumberOffsets:
+class LineIndex:
+    """
+    An index of the positions of the newlines in a piece of text, allowing character
+    positions to be converted to line and column numbers, and back again, without scanning
+    the text each time.
+    """
 
     def __init__(self, text: str) -> None:
-        self.offsets = {
-            line: match.start()+1 for (line, match) in enumerate(NEWLINE.finditer(text), start=1)
-        }
-        self.offsets[0] = 0
+        self.newlines = array('q', [match.start() for match in NEWLINE.finditer(text)])
+
+    def line(self, position: int) -> int:
+        """
+        Return the one based line number of the supplied character position.
+        """
+        return bisect_left(self.newlines, position) + 1
+
+    def line_column(self, position: int) -> Tuple[int, int]:
+        """
+        Return the one based line and column numbers of the supplied character position.
+        """
+        index = bisect_left(self.newlines, position)
+        line_start = self.newlines[index-1] if index else -1
+        return index + 1, position - line_start
+
+    def offset(self, line: int, column: int) -> int:
+        """
+        Return the character offset of the zero based line number and column offset.
+        """
+        return (self.newlines[line-1] + 1 if line else 0) + column
+
+
+class LineNumberOffsets(LineIndex):
+    # Retained for backwards compatibility.
 
     def get(self, line: int, column: int) -> int:
         """
         Return the character offset of the  zero based line number and column offset.
         """
-        return self.offsets[line] + column
+        return self.offset(line, column)
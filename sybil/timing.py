@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .document import Document
+    from .example import Example
+
+
+@dataclass
+class ParserTiming:
+    """
+    The time taken by a :any:`Parser` to parse a :class:`~sybil.Document`, along with the
+    number of regions it found.
+    """
+    parser: Any
+    seconds: float = 0.0
+    regions: int = 0
+
+    @property
+    def name(self) -> str:
+        return type(self.parser).__qualname__
+
+
+class Timings:
+    """
+    A collection of the :class:`documents <sybil.Document>` parsed and
+    :class:`examples <sybil.example.Example>` evaluated during a test run, from which
+    a report of the slowest of each can be produced.
+    """
+
+    def __init__(self) -> None:
+        self.documents: List['Document'] = []
+        self.examples: List['Example'] = []
+
+    def add_document(self, document: 'Document') -> None:
+        self.documents.append(document)
+
+    def add_example(self, example: 'Example') -> None:
+        self.examples.append(example)
+
+    def slowest_documents(self, limit: int) -> List['Document']:
+        """
+        Return up to ``limit`` documents, slowest to read and parse first.
+        """
+        return sorted(self.documents, key=lambda d: d.parse_time, reverse=True)[:limit]
+
+    def slowest_examples(self, limit: int) -> List['Example']:
+        """
+        Return up to ``limit`` of the examples that have been evaluated, slowest first.
+        """
+        evaluated = [example for example in self.examples if example.wall_time is not None]
+        return sorted(evaluated, key=lambda e: e.wall_time or 0, reverse=True)[:limit]
+
+    def report(self, limit: int = 10) -> str:
+        """
+        Return a report of the ``limit`` slowest documents to parse and examples to evaluate.
+        """
+        lines = [f'slowest {limit} document parses:']
+        for document in self.slowest_documents(limit):
+            parts = [f'read {document.read_time or 0:.3f}s'] + [
+                f'{timing.name} {timing.seconds:.3f}s, {timing.regions} regions'
+                for timing in document.parser_timings
+            ]
+            lines.append(f'{document.parse_time:8.3f}s  {document.path} ({"; ".join(parts)})')
+        lines.append(f'slowest {limit} example evaluations:')
+        for example in self.slowest_examples(limit):
+            lines.append(
+                f'{example.wall_time or 0:8.3f}s wall {example.cpu_time or 0:8.3f}s cpu  '
+                f'{example.path} line={example.line} column={example.column}'
+            )
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,104 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from .cache import code_cache
+from .evaluators.python import PythonEvaluator
+from .evaluators.skip import Skipper
+
+if TYPE_CHECKING:
+    from .sybil import Sybil
+
+
+@dataclass
+class Problem:
+    """
+    A problem found when :meth:`validating <sybil.Sybil.validate>` a documentation
+    source file.
+    """
+    #: The absolute path of the documentation source file.
+    path: str
+    #: A description of the problem, starting with the type of exception raised.
+    message: str
+    #: The line on which the problem was found, if known.
+    line: Optional[int] = None
+
+    def __str__(self) -> str:
+        location = self.path if self.line is None else f'{self.path}, line {self.line}'
+        return f'{location}: {self.message}'
+
+
+def describe(exception: Exception) -> str:
+    return f'{type(exception).__name__}: {exception}'
+
+
+def validate_path(sybil: 'Sybil', path: Path) -> List[Problem]:
+    """
+    Parse the supplied documentation source file with the supplied :class:`~sybil.Sybil`
+    and compile the source of any Python examples found, along with the conditions of
+    any skip directives, without evaluating them, returning all the problems found.
+
+    If parsing fails, each parser is used on its own so that problems found by one
+    don't hide those found by the others.
+    """
+    try:
+        document = sybil.parse(path)
+    except Exception as exception:
+        problems = []
+        document_type = sybil.document_type_for(path)
+        for parser in sybil.parsers:
+            try:
+                document_type.parse(str(path), parser, encoding=sybil.encoding)
+            except Exception as parser_exception:
+                problems.append(Problem(str(path), describe(parser_exception)))
+        # If every parser succeeded on its own, the regions they found overlap:
+        return problems or [Problem(str(path), describe(exception))]
+
+    problems = []
+    for example in document.examples():
+        evaluator = example.region.evaluator
+        if isinstance(evaluator, Skipper):
+            try:
+                evaluator.validate(example)
+            except SyntaxError as exception:
+                problems.append(Problem(
+                    example.path, f'{type(exception).__name__}: {exception.msg}', example.line
+                ))
+            except ValueError as exception:
+                problems.append(Problem(example.path, describe(exception), example.line))
+            continue
+        if not isinstance(evaluator, PythonEvaluator):
+            continue
+        line = example.line + getattr(example.parsed, 'line_offset', 0)
+        try:
+            code_cache.compile(example.parsed, example.path, line, evaluator.flags)
+        except SyntaxError as exception:
+            problems.append(Problem(
+                example.path, f'{type(exception).__name__}: {exception.msg}', exception.lineno
+            ))
+    return problems
+
+
+def validate(
+        sybils: Sequence['Sybil'], jobs: Sequence[Tuple[int, Path]], processes: Optional[int]
+) -> List[List[Problem]]:
+    """
+    Validate the supplied documentation source files, using a pool of worker processes
+    if ``processes`` is more than one, or the number of CPUs available if it is ``None``.
+
+    :param sybils:
+        The :class:`~sybil.Sybil` instances to use for parsing.
+
+    :param jobs:
+        A sequence of (index into ``sybils``, path) pairs.
+
+    :return:
+        A list of the problems found for each job, in the same order as ``jobs``.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes > 1 and len(jobs) > 1:
+        from .processes import validate_in_processes
+        return validate_in_processes(sybils, jobs, processes)
+    return [validate_path(sybils[index], path) for index, path in jobs]
@@ -192,13 +192,13 @@ def clone_functional_sample(name: str, target: Path) -> Path:
     return dest
 
 
-def run_pytest(capsys: CaptureFixture[str], path: Path) -> Results:
+def run_pytest(capsys: CaptureFixture[str], path: Path, *args: str) -> Results:
     class CollectResults:
         def pytest_sessionfinish(self, session):
             self.session = session
 
     results = CollectResults()
-    return_code = pytest_main(['-vvs', str(path), '-p', 'no:doctest'],
+    return_code = pytest_main(['-vvs', str(path), '-p', 'no:doctest', *args],
                               plugins=[results])
     return Results(
         capsys,
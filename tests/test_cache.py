@@ -0,0 +1,281 @@
+import re
+import traceback
+from pathlib import Path
+from shutil import copy
+
+import pytest
+from testfixtures import compare
+
+from sybil import Sybil, Region
+from sybil.cache import CodeCache, ParseCache, ParserState, code_cache
+from sybil.parsers.rest import (
+    CaptureParser, DocTestParser, PythonCodeBlockParser, SkipParser, ClearNamespaceParser
+)
+from .helpers import (
+    sample_path, functional_sample, run_pytest, write_config, PYTEST, check_excinfo
+)
+
+
+def make_sybil(cache: ParseCache) -> Sybil:
+    return Sybil(
+        [CaptureParser(), DocTestParser(), PythonCodeBlockParser(), SkipParser(),
+         ClearNamespaceParser()],
+        cache=cache,
+    )
+
+
+def describe(parsed):
+    if isinstance(parsed, str):
+        return str(parsed), getattr(parsed, '__dict__', None)
+    return getattr(parsed, '__dict__', parsed)
+
+
+def details(document):
+    return [
+        (example.line, example.column, example.region.evaluator, describe(example.parsed))
+        for example in document
+    ]
+
+
+def test_hit_after_miss(tmp_path: Path):
+    path = Path(copy(sample_path('codeblock.txt'), tmp_path))
+    cache = ParseCache(tmp_path / 'cache')
+    sybil = make_sybil(cache)
+    first = sybil.parse(path)
+    compare(cache.hits, expected=0)
+    compare(cache.misses, expected=1)
+    second = sybil.parse(path)
+    compare(cache.hits, expected=1)
+    compare(cache.misses, expected=1)
+    compare(second.text, expected=first.text)
+    compare(details(second), expected=details(first))
+    examples = list(second)
+    second.namespace['y'] = 0
+    examples[0].evaluate()
+    compare(second.namespace['y'], expected=1)
+    with pytest.raises(Exception) as excinfo:
+        examples[1].evaluate()
+    check_excinfo(examples[1], excinfo, 'boom!', lineno=11)
+
+
+def test_hit_preserves_evaluator_identity(tmp_path: Path):
+    path = Path(copy(sample_path('skip.txt'), tmp_path))
+    cache = ParseCache(tmp_path / 'cache')
+    skip_parser = SkipParser()
+    sybil = Sybil([DocTestParser(), skip_parser], cache=cache)
+    sybil.parse(path)
+    document = sybil.parse(path)
+    compare(cache.hits, expected=1)
+    skips = [e for e in document if e.region.evaluator is skip_parser.skipper]
+    assert skips
+
+
+def test_new_process_state_shares_cache(tmp_path: Path):
+    path = Path(copy(sample_path('doctest.txt'), tmp_path))
+    directory = tmp_path / 'cache'
+    make_sybil(ParseCache(directory)).parse(path)
+    # A new Sybil with the same configuration, as would be created by a new test run:
+    cache = ParseCache(directory)
+    document = make_sybil(cache).parse(path)
+    compare(cache.hits, expected=1)
+    compare(len(list(document)), expected=5)
+
+
+def test_content_change_invalidates(tmp_path: Path):
+    path = tmp_path / 'doc.txt'
+    path.write_text('>>> 1\n1\n')
+    cache = ParseCache(tmp_path / 'cache')
+    sybil = make_sybil(cache)
+    sybil.parse(path)
+    path.write_text('>>> 1\n1\n>>> 2\n2\n')
+    document = sybil.parse(path)
+    compare(cache.misses, expected=2)
+    compare(len(list(document)), expected=2)
+
+
+def test_parser_configuration_change_invalidates(tmp_path: Path):
+    path = Path(copy(sample_path('codeblock_future_imports.txt'), tmp_path))
+    directory = tmp_path / 'cache'
+    Sybil([PythonCodeBlockParser()], cache=ParseCache(directory)).parse(path)
+    cache = ParseCache(directory)
+    Sybil([PythonCodeBlockParser(future_imports=['annotations'])], cache=cache).parse(path)
+    compare(cache.misses, expected=1)
+
+
+def test_fingerprint_stable():
+    compare(
+        ParserState([DocTestParser(), SkipParser()]).fingerprint,
+        expected=ParserState([DocTestParser(), SkipParser()]).fingerprint,
+    )
+    assert (ParserState([DocTestParser()]).fingerprint !=
+            ParserState([DocTestParser(optionflags=1)]).fingerprint)
+
+
+def test_unwritable_directory(tmp_path: Path):
+    path = tmp_path / 'doc.txt'
+    path.write_text('>>> 1\n1\n')
+    # A file where the directory should be means the directory can't be created:
+    (tmp_path / 'cache').write_text('')
+    cache = ParseCache(tmp_path / 'cache')
+    document = Sybil([DocTestParser()], cache=cache).parse(path)
+    compare(len(document.regions), expected=1)
+    compare((cache.misses, cache.uncacheable), expected=(1, 1))
+
+
+def test_encoding_invalidates(tmp_path: Path):
+    path = tmp_path / 'doc.txt'
+    path.write_text('>>> 1\n1\n')
+    directory = tmp_path / 'cache'
+    Sybil([DocTestParser()], cache=ParseCache(directory)).parse(path)
+    cache = ParseCache(directory)
+    Sybil([DocTestParser()], encoding='ascii', cache=cache).parse(path)
+    compare(cache.misses, expected=1)
+
+
+def test_windows_line_endings(tmp_path: Path):
+    path = tmp_path / 'doc.txt'
+    path.write_bytes(b'>>> 1\r\n1\r\n')
+    cache = ParseCache(tmp_path / 'cache')
+    sybil = make_sybil(cache)
+    first = sybil.parse(path)
+    second = sybil.parse(path)
+    compare(cache.hits, expected=1)
+    compare(second.text, expected=first.text)
+
+
+def test_uncacheable(tmp_path: Path):
+    path = tmp_path / 'doc.txt'
+    path.write_text('X\n')
+
+    def parser(document):
+        for m in re.finditer('X', document.text):
+            yield Region(m.start(), m.end(), evaluator=lambda example: None)
+
+    cache = ParseCache(tmp_path / 'cache')
+    sybil = Sybil([parser], cache=cache)
+    sybil.parse(path)
+    document = sybil.parse(path)
+    compare(cache.misses, expected=2)
+    compare(cache.uncacheable, expected=2)
+    compare(len(list(document)), expected=1)
+
+
+def test_corrupt_entry(tmp_path: Path):
+    path = Path(copy(sample_path('doctest.txt'), tmp_path))
+    cache = ParseCache(tmp_path / 'cache')
+    sybil = make_sybil(cache)
+    sybil.parse(path)
+    (entry,) = cache.directory.glob('*.pickle')
+    entry.write_bytes(b'not a pickle')
+    document = sybil.parse(path)
+    compare(cache.misses, expected=2)
+    compare(len(list(document)), expected=5)
+    sybil.parse(path)
+    compare(cache.hits, expected=1)
+
+
+def test_clear(tmp_path: Path):
+    path = Path(copy(sample_path('doctest.txt'), tmp_path))
+    cache = ParseCache(tmp_path / 'cache')
+    sybil = make_sybil(cache)
+    cache.clear()
+    sybil.parse(path)
+    cache.clear()
+    sybil.parse(path)
+    compare(cache.misses, expected=2)
+    compare(repr(cache), expected=f'<ParseCache {cache.directory}: 0 hits, 2 misses, 0 uncacheable>')
+
+
+def test_python_docstrings(tmp_path: Path):
+    path = Path(copy(sample_path('docstrings.py'), tmp_path))
+    cache = ParseCache(tmp_path / 'cache')
+    sybil = Sybil([DocTestParser()], cache=cache)
+    first = sybil.parse(path)
+    second = sybil.parse(path)
+    compare(cache.hits, expected=1)
+    compare(type(second), expected=type(first))
+    compare(details(second), expected=details(first))
+
+
+def test_pytest_option(tmp_path: Path, capsys):
+    write_config(tmp_path, PYTEST, patterns="['*.rst']")
+    (tmp_path / 'doc.rst').write_text('>>> 1 + 1\n2\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-cache')
+    compare(results.total, expected=1)
+    results.out.assert_present('sybil parse cache: 0 hits, 1 misses, 0 uncacheable')
+    results = run_pytest(capsys, tmp_path, '--sybil-cache')
+    compare(results.total, expected=1)
+    results.out.assert_present('sybil parse cache: 1 hits, 0 misses, 0 uncacheable')
+
+
+def test_pytest_option_not_used(capsys):
+    results = run_pytest(capsys, functional_sample('pytest'))
+    results.out.assert_not_present('sybil parse cache')
+
+
+def test_code_cache(tmp_path: Path):
+    cache = CodeCache(tmp_path / 'code')
+    code = cache.compile('x = 1\n', 'doc.rst', 3, 0)
+    assert cache.compile('x = 1\n', 'doc.rst', 3, 0) is code
+    assert cache.compile('x = 1\n', 'doc.rst', 4, 0) is not code
+    compare((cache.hits, cache.misses), expected=(1, 2))
+    # A new session uses the code stored on disk:
+    cache = CodeCache(tmp_path / 'code')
+    namespace = {}
+    exec(cache.compile('x = 1\n', 'doc.rst', 3, 0), namespace)
+    compare(namespace['x'], expected=1)
+    compare(repr(cache), expected=f'<CodeCache {tmp_path / "code"}: 1 hits, 0 misses>')
+    cache.clear()
+    cache.compile('x = 1\n', 'doc.rst', 3, 0)
+    compare(cache.misses, expected=1)
+
+
+def test_code_cache_bounded():
+    cache = CodeCache(maxsize=2)
+    first = cache.compile('x = 1\n', 'doc.rst', 1, 0)
+    cache.compile('x = 2\n', 'doc.rst', 2, 0)
+    # using the first makes the second the least recently used:
+    assert cache.compile('x = 1\n', 'doc.rst', 1, 0) is first
+    cache.compile('x = 3\n', 'doc.rst', 3, 0)
+    compare(len(cache.code), expected=2)
+    assert cache.compile('x = 1\n', 'doc.rst', 1, 0) is first
+    cache.compile('x = 2\n', 'doc.rst', 2, 0)
+    compare((cache.hits, cache.misses), expected=(2, 4))
+
+
+def test_code_cache_unwritable_directory(tmp_path: Path):
+    (tmp_path / 'code').write_text('')
+    cache = CodeCache(tmp_path / 'code')
+    namespace = {}
+    exec(cache.compile('x = 1\n', 'doc.rst', 0, 0), namespace)
+    compare(namespace['x'], expected=1)
+
+
+def test_code_cache_line_numbers(tmp_path: Path):
+    cache = CodeCache(tmp_path / 'code')
+    cache.compile('x = 1\nraise Exception()\n', 'doc.rst', 3, 0)
+    code = CodeCache(tmp_path / 'code').compile('x = 1\nraise Exception()\n', 'doc.rst', 3, 0)
+    with pytest.raises(Exception) as excinfo:
+        exec(code, {})
+    compare(traceback.extract_tb(excinfo.tb)[-1].lineno, expected=5)
+
+
+def test_code_cache_corrupt_entry(tmp_path: Path):
+    cache = CodeCache(tmp_path / 'code')
+    key = cache.key('x = 1\n', 'doc.rst', 0, 0)
+    (tmp_path / 'code').mkdir()
+    cache.entry_path(key).write_bytes(b'not marshalled')
+    cache.compile('x = 1\n', 'doc.rst', 0, 0)
+    compare(cache.misses, expected=1)
+    assert CodeCache(tmp_path / 'code').load(key) is not None
+
+
+def test_pytest_option_code_cache(tmp_path: Path, capsys):
+    write_config(tmp_path, PYTEST, patterns="['*.rst']", parsers='[PythonCodeBlockParser()]')
+    (tmp_path / 'doc.rst').write_text('.. code-block:: python\n\n    x = 1\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-cache')
+    results.out.assert_present('sybil code cache: 0 hits, 1 misses')
+    code_cache.clear()
+    results = run_pytest(capsys, tmp_path, '--sybil-cache')
+    results.out.assert_present('sybil code cache: 1 hits, 0 misses')
+    assert code_cache.directory is None
@@ -53,3 +53,15 @@ def test_capture_codeblock():
     examples, namespace = parse('capture_codeblock.txt', CaptureParser(), expected=1)
     examples[0].evaluate()
     assert json.loads(namespace['json']) == {"a key": "value", "b key": 42}
+
+
+def test_no_captures():
+    document = Document('Some text::\n\n    ..\n    -> foo\n', 'sample.txt')
+    assert list(CaptureParser()(document)) == []
+
+
+def test_capture_at_end_without_newline():
+    document = Document('Example::\n\n    first\n    second\n\n.. -> foo', 'sample.txt')
+    region, = CaptureParser()(document)
+    assert (region.start, region.end) == (0, 33)
+    assert region.parsed == ('foo', 'first\nsecond\n')
@@ -0,0 +1,195 @@
+import os
+from pathlib import Path
+
+import pytest
+from testfixtures import compare
+
+from sybil.changes import Changes, Manifest, imported_modules
+from sybil.integration.pytest_plugin import ChangesRecorder
+from sybil.python import import_cleanup
+from .helpers import run_pytest, write_config, PYTEST
+
+
+@pytest.fixture(autouse=True)
+def cleanup_imports():
+    with import_cleanup():
+        yield
+
+
+def test_manifest(tmp_path: Path):
+    path = tmp_path / 'doc.rst'
+    path.write_text('one')
+    manifest = Manifest()
+    assert manifest.changed(path)
+    manifest.record(path)
+    assert not manifest.changed(path)
+    # Same content, newer modification time:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert not manifest.changed(path)
+    compare(manifest.entries[str(path)][0], expected=stat.st_mtime_ns + 10**9)
+    path.write_text('two')
+    assert manifest.changed(path)
+    manifest.forget(path)
+    compare(manifest.entries, expected={})
+    manifest.record(tmp_path / 'missing')
+    compare(manifest.entries, expected={})
+
+
+def test_manifest_imports(tmp_path: Path):
+    module = tmp_path / 'module.py'
+    module.write_text('one')
+    doc = tmp_path / 'doc.rst'
+    manifest = Manifest()
+    manifest.record(module, document=doc)
+    assert not manifest.changed(module, document=doc)
+    assert manifest.changed(module, document=tmp_path / 'other.rst')
+    assert manifest.changed(module)
+    compare(manifest.save(), expected={
+        'files': {}, 'imports': {str(doc): {str(module): manifest.imports[str(doc)][str(module)]}},
+    })
+    manifest.forget(doc)
+    compare(manifest.save(), expected={'files': {}, 'imports': {}})
+
+
+def test_imported_modules_python():
+    compare(
+        imported_modules(
+            'import os, a.b as c\nfrom .sibling import x\nfrom .. import y\n',
+            python=True, package='pkg.sub',
+        ),
+        expected={'os', 'a.b', 'pkg.sub.sibling', 'pkg.sub.sibling.x', 'pkg', 'pkg.y'},
+    )
+
+
+def test_imported_modules_text():
+    text = (
+        '>>> import mod\n'
+        '.. code-block:: python\n\n'
+        '    from pkg.thing import (a, b as c)\n'
+        'Prose mentioning that you import things is ignored.\n'
+    )
+    compare(
+        imported_modules(text, python=False),
+        expected={'mod', 'pkg.thing', 'pkg.thing.a', 'pkg.thing.b'},
+    )
+
+
+def test_imports_followed(tmp_path: Path):
+    (tmp_path / 'pkg').mkdir()
+    (tmp_path / 'pkg' / '__init__.py').write_text('')
+    (tmp_path / 'pkg' / 'a.py').write_text('from . import b\n')
+    (tmp_path / 'pkg' / 'b.py').write_text('import os\n')
+    doc = tmp_path / 'doc.rst'
+    doc.write_text('>>> import pkg.a\n')
+    changes = Changes(tmp_path, imports=True)
+    compare(
+        changes.imported(doc),
+        expected={tmp_path / 'pkg' / '__init__.py', tmp_path / 'pkg' / 'a.py',
+                  tmp_path / 'pkg' / 'b.py'},
+    )
+
+
+def test_recorder(tmp_path: Path):
+    changes = Changes(tmp_path)
+    recorder = ChangesRecorder(changes)
+
+    def report(path: str, line: int, when: str, outcome: str) -> pytest.TestReport:
+        nodeid = f'{path}::line:{line}'
+        report = pytest.TestReport(nodeid, (path, line, nodeid), {}, outcome, None, when)
+        report.sybil_path = path  # type: ignore[attr-defined]
+        report.sybil_collected = 2  # type: ignore[attr-defined]
+        return report
+
+    recorder.pytest_runtest_logreport(report('/a.rst', 1, 'setup', 'passed'))
+    recorder.pytest_runtest_logreport(report('/a.rst', 1, 'call', 'passed'))
+    recorder.pytest_runtest_logreport(report('/a.rst', 2, 'call', 'passed'))
+    recorder.pytest_runtest_logreport(report('/b.rst', 1, 'setup', 'skipped'))
+    recorder.pytest_runtest_logreport(report('/b.rst', 2, 'call', 'passed'))
+    recorder.pytest_runtest_logreport(report('/c.rst', 1, 'call', 'failed'))
+    # only one of the two examples from d.rst has run:
+    recorder.pytest_runtest_logreport(report('/d.rst', 1, 'call', 'passed'))
+    recorder.pytest_runtest_logreport(
+        pytest.TestReport('other', ('other', 1, 'other'), {}, 'passed', None, 'call')
+    )
+    compare(changes.passed, expected={Path('/a.rst'), Path('/b.rst')})
+    compare(changes.failed, expected={Path('/c.rst')})
+
+
+def write_project(tmp_path: Path) -> None:
+    write_config(tmp_path, PYTEST, patterns="['*.rst']")
+    (tmp_path / 'a.rst').write_text('>>> 1 + 1\n2\n')
+    (tmp_path / 'b.rst').write_text('>>> 2 + 2\n4\n')
+
+
+def test_pytest_changed(tmp_path: Path, capsys):
+    write_project(tmp_path)
+    compare(run_pytest(capsys, tmp_path, '--sybil-changed').total, expected=2)
+    compare(run_pytest(capsys, tmp_path, '--sybil-changed').total, expected=0)
+    (tmp_path / 'b.rst').write_text('>>> 3 + 3\n5\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-changed')
+    compare((results.total, results.failures), expected=(1, 1))
+    # failing documents are collected until they pass:
+    compare(run_pytest(capsys, tmp_path, '--sybil-changed').total, expected=1)
+    (tmp_path / 'b.rst').write_text('>>> 3 + 3\n6\n')
+    compare(run_pytest(capsys, tmp_path, '--sybil-changed').total, expected=1)
+    compare(run_pytest(capsys, tmp_path, '--sybil-changed').total, expected=0)
+    # without the option, everything is collected:
+    compare(run_pytest(capsys, tmp_path).total, expected=2)
+
+
+def test_pytest_changed_files(tmp_path: Path, capsys):
+    write_project(tmp_path)
+    file_list = tmp_path / 'changed.txt'
+    file_list.write_text(f'{tmp_path / "b.rst"}\n\nnot-a-doc.py\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-changed-files', str(file_list))
+    compare(results.total, expected=1)
+    results.out.assert_present('b.rst')
+
+
+def test_pytest_changed_imports(tmp_path: Path, capsys):
+    write_project(tmp_path)
+    (tmp_path / 'helper.py').write_text('VALUE = 1\n')
+    (tmp_path / 'c.rst').write_text('>>> from helper import VALUE\n>>> VALUE\n1\n')
+    args = '--sybil-changed', '--sybil-changed-imports'
+    compare(run_pytest(capsys, tmp_path, *args).total, expected=4)
+    compare(run_pytest(capsys, tmp_path, *args).total, expected=0)
+    (tmp_path / 'helper.py').write_text('VALUE = 1  # changed\n')
+    compare(run_pytest(capsys, tmp_path, '--sybil-changed').total, expected=0)
+    compare(run_pytest(capsys, tmp_path, *args).total, expected=2)
+    compare(run_pytest(capsys, tmp_path, *args).total, expected=0)
+
+
+def test_imports_recorded_per_document(tmp_path: Path):
+    (tmp_path / 'helper.py').write_text('VALUE = 1\n')
+    c = tmp_path / 'c.rst'
+    c.write_text('>>> from helper import VALUE\n')
+    d = tmp_path / 'd.rst'
+    d.write_text('>>> from helper import VALUE\n')
+    changes = Changes(tmp_path, imports=True)
+    changes.passed.update([c, d])
+    changes.save()
+    (tmp_path / 'helper.py').write_text('VALUE = 1  # changed\n')
+    changes = Changes(tmp_path, changes.manifest, imports=True)
+    assert changes(c) and changes(d)
+    # only the examples from c.rst have passed since the change:
+    changes.passed.add(c)
+    changes.save()
+    changes = Changes(tmp_path, changes.manifest, imports=True)
+    assert not changes(c)
+    assert changes(d)
+
+
+def test_pytest_changed_partial_runs(tmp_path: Path, capsys):
+    write_config(tmp_path, PYTEST, patterns="['*.rst']")
+    (tmp_path / 'a.rst').write_text('>>> 1 + 1\n2\n\n>>> 2 + 2\n5\n')
+    (tmp_path / 'b.rst').write_text('>>> 1 + 1\n3\n')
+    # not all of the examples in a.rst are run:
+    results = run_pytest(capsys, tmp_path, '--sybil-changed', '-k', 'a.rst and line:1')
+    compare((results.total, results.failures), expected=(1, 0))
+    compare(run_pytest(capsys, tmp_path, '--sybil-changed').total, expected=3)
+    (tmp_path / 'a.rst').write_text('>>> 1 + 1\n2\n\n>>> 2 + 2\n4\n')
+    # the run stops before all the examples have run:
+    results = run_pytest(capsys, tmp_path, '--sybil-changed', '-x')
+    compare(results.failures, expected=1)
+    compare(run_pytest(capsys, tmp_path, '--sybil-changed').total, expected=3)
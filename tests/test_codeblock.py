@@ -8,7 +8,12 @@ from sybil import Example, Sybil
 from sybil.document import Document
 from sybil.parsers.codeblock import PythonCodeBlockParser, CodeBlockParser
 from sybil.parsers.rest import DocTestParser
-from .helpers import check_excinfo, parse, sample_path, check_path, SAMPLE_PATH, add_to_python_path
+from sybil.evaluators.python import AsyncPythonEvaluator
+from sybil.python import import_cleanup
+from .helpers import (
+    check_excinfo, parse, sample_path, check_path, SAMPLE_PATH, add_to_python_path,
+    run, write_config, PYTEST, UNITTEST,
+)
 
 
 def test_basic():
@@ -183,3 +188,87 @@ def test_code_directive():
 def test_sourcecode_directive():
     sybil = Sybil([PythonCodeBlockParser()])
     check_path(sample_path('sourcecode.rst'), sybil, expected=1)
+
+
+ASYNC_DOCUMENT = """\
+.. code-block:: python
+
+    import asyncio
+    queue = asyncio.Queue()
+
+    async def worker():
+        try:
+            while True:
+                print('got', await queue.get())
+        finally:
+            print('worker cancelled')
+
+    task = asyncio.create_task(worker())
+
+.. code-block:: python
+
+    await queue.put(1)
+    await asyncio.sleep(0)
+    assert not task.done()
+"""
+
+
+def test_async(tmp_path: Path):
+    path = tmp_path / 'doc.rst'
+    path.write_text(ASYNC_DOCUMENT)
+    evaluator = AsyncPythonEvaluator()
+    document = Document.parse(str(path), CodeBlockParser('python', evaluator))
+    for example in document:
+        example.evaluate()
+    loop = evaluator.loops[document]
+    assert not loop.is_closed()
+    document.teardown()
+    assert loop.is_closed()
+    assert document.namespace['task'].cancelled()
+    compare(evaluator.loops, expected={})
+
+
+def test_async_no_await(tmp_path: Path):
+    evaluator = AsyncPythonEvaluator()
+    document = Document('.. code-block:: python\n\n    x = 1\n', str(tmp_path / 'doc.rst'))
+    document.add_regions(CodeBlockParser('python', evaluator)(document))
+    for example in document:
+        example.evaluate()
+    compare(document.namespace, expected={'x': 1})
+    document.teardown()
+
+
+def test_async_line_numbers(tmp_path: Path):
+    path = tmp_path / 'doc.rst'
+    path.write_text('.. code-block:: python\n\n    import asyncio\n'
+                    '    await asyncio.sleep(0)\n    raise Exception("boom!")\n')
+    examples = list(Document.parse(str(path), CodeBlockParser('python', AsyncPythonEvaluator())))
+    with pytest.raises(Exception) as excinfo:
+        examples[0].evaluate()
+    check_excinfo(examples[0], excinfo, 'boom!', lineno=5)
+    examples[0].document.teardown()
+
+
+ASYNC_CONFIG_TEMPLATE = """
+from sybil import Sybil
+from sybil.evaluators.python import AsyncPythonEvaluator
+from sybil.python import import_cleanup
+from sybil.parsers.rest import CodeBlockParser
+{assigned_name} = Sybil(
+{params}
+).{integration}()
+"""
+
+
+@pytest.mark.parametrize('runner', [PYTEST, UNITTEST])
+def test_async_integration(tmp_path: Path, capsys: pytest.CaptureFixture[str], runner: str):
+    (tmp_path / 'doc.rst').write_text(ASYNC_DOCUMENT)
+    write_config(
+        tmp_path, runner, template=ASYNC_CONFIG_TEMPLATE,
+        parsers="[CodeBlockParser('python', AsyncPythonEvaluator())]", pattern="'*.rst'",
+    )
+    with import_cleanup():
+        results = run(capsys, runner, tmp_path)
+    compare((results.total, results.failures, results.errors), expected=(2, 0, 0))
+    results.out.assert_present('got 1')
+    results.out.assert_present('worker cancelled')
@@ -1,5 +1,8 @@
 # coding=utf-8
-from doctest import REPORT_NDIFF, ELLIPSIS, DocTestParser as BaseDocTestParser
+from doctest import (
+    REPORT_NDIFF, ELLIPSIS, FAIL_FAST, REPORT_ONLY_FIRST_FAILURE,
+    DocTestParser as BaseDocTestParser
+)
 from pathlib import Path
 
 import pytest
@@ -8,7 +11,7 @@ from testfixtures import compare
 from sybil.document import Document, PythonDocStringDocument
 from sybil.example import SybilFailure
 from sybil.parsers.abstract import DocTestStringParser
-from sybil.parsers.rest import DocTestParser, DocTestDirectiveParser
+from sybil.parsers.rest import DocTestParser, DocTestDirectiveParser, SkipParser
 from .helpers import sample_path, parse, FUNCTIONAL_TEST_DIR
 
 
@@ -48,6 +51,106 @@ def test_fail():
     assert actual.endswith('Exception: boom!\n')
 
 
+def test_batch():
+    parser = DocTestParser(batch=True)
+    examples, namespace = parse('doctest.txt', parser, expected=5)
+    evaluator = parser.string_parser.evaluator
+    examples[0].evaluate()
+    # all the examples have been run:
+    assert namespace['y'] == 2
+    compare(len(evaluator.pending[examples[0].document]), expected=4)
+    for example in examples[1:]:
+        example.evaluate()
+    compare(evaluator.pending, expected={})
+
+
+def test_batch_released_on_teardown():
+    parser = DocTestParser(batch=True)
+    examples, _ = parse('doctest.txt', parser, expected=5)
+    evaluator = parser.string_parser.evaluator
+    examples[0].evaluate()
+    examples[0].document.teardown()
+    compare(evaluator.pending, expected={})
+    # once torn down, the examples are run again:
+    examples[1].evaluate()
+    compare(len(evaluator.pending[examples[0].document]), expected=3)
+
+
+def test_batch_evaluated_again(tmp_path):
+    path = tmp_path / 'doc.txt'
+    path.write_text('>>> x = 1\n>>> x\n1\n>>> x += 1\n>>> x\n2\n')
+    document = Document.parse(str(path), DocTestParser(batch=True))
+    examples = list(document)
+    examples[0].evaluate()
+    examples[1].evaluate()
+    examples[2].evaluate()
+    # evaluating an example again runs a new batch rather than reporting the old outcome:
+    examples[2].evaluate()
+    compare(document.namespace['x'], expected=3)
+    with pytest.raises(SybilFailure) as excinfo:
+        examples[3].evaluate()
+    compare(excinfo.value.result, expected='Expected:\n    2\nGot:\n    3\n')
+
+
+def test_batch_fail():
+    path = sample_path('doctest_fail.txt')
+    examples, _ = parse(
+        'doctest_fail.txt', DocTestParser(REPORT_ONLY_FIRST_FAILURE, batch=True), expected=2
+    )
+    with pytest.raises(SybilFailure) as excinfo:
+        examples[0].evaluate()
+    compare(str(excinfo.value), expected=(
+        f"Example at {path}, line 1, column 1 did not evaluate as expected:\n"
+        "Expected:\n"
+        "    Not my output\n"
+        "Got:\n"
+        "    where's my output?\n"
+    ))
+    with pytest.raises(SybilFailure) as excinfo:
+        examples[1].evaluate()
+    assert excinfo.value.result.endswith('Exception: boom!\n')
+
+
+def test_batch_fail_fast(tmp_path):
+    path = tmp_path / 'doc.txt'
+    path.write_text('>>> x = 1\n>>> x\n2\n>>> x = 3\n')
+    document = Document.parse(str(path), DocTestParser(FAIL_FAST, batch=True))
+    examples = list(document)
+    examples[0].evaluate()
+    with pytest.raises(SybilFailure):
+        examples[1].evaluate()
+    # not run as part of the batch as the previous example failed:
+    assert document.namespace['x'] == 1
+    examples[2].evaluate()
+    assert document.namespace['x'] == 3
+
+
+def test_batch_out_of_order(tmp_path):
+    path = tmp_path / 'doc.txt'
+    path.write_text('>>> x = 1\n>>> y = 2\n>>> y\n2\n')
+    examples = list(Document.parse(str(path), DocTestParser(batch=True)))
+    # batches start from the example being evaluated:
+    examples[1].evaluate()
+    assert 'x' not in examples[1].namespace
+    examples[2].evaluate()
+
+
+def test_batch_stops_at_other_regions(tmp_path):
+    path = tmp_path / 'doc.txt'
+    path.write_text('>>> x = 1\n\n.. skip: next\n\n>>> x = 2\n\n>>> x = 3\n')
+    document = Document.parse(str(path), DocTestParser(batch=True), SkipParser())
+    examples = list(document)
+    compare(len(examples), expected=4)
+    for example in examples:
+        try:
+            example.evaluate()
+        except Exception as e:
+            assert type(e).__name__ == 'SkipTest'
+        if example is examples[0]:
+            assert document.namespace['x'] == 1
+    assert document.namespace['x'] == 3
+
+
 def test_fail_with_options():
     parser = DocTestParser(optionflags=REPORT_NDIFF|ELLIPSIS)
     examples, namespace = parse('doctest_fail.txt', parser, expected=2)
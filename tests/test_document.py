@@ -12,6 +12,7 @@ from sybil import Region, Example
 from sybil.document import PythonDocStringDocument, Document
 from sybil.example import NotEvaluated, SybilFailure
 from sybil.parsers.abstract.lexers import LexingException
+from sybil.parsers.rest import DocTestParser, PythonCodeBlockParser
 from .helpers import ast_docstrings, parse, sample_path
 
 
@@ -148,3 +149,22 @@ def test_nested_evaluators_not_evaluated_from_region():
     examples, namespace = parse('sample1.txt', parser, expected=1)
     with ShouldRaise(SybilFailure(examples[0], f'{evaluator!r} should not raise NotEvaluated()')):
         examples[0].evaluate()
+
+
+def test_release(tmp_path: Path):
+    path = tmp_path / 'doc.rst'
+    path.write_text('.. code-block:: python\n\n    x = 1\n\n>>> x\n1\n', encoding='latin-1')
+    document = Document.parse(str(path), PythonCodeBlockParser(), DocTestParser())
+    text = document.text
+    examples = list(document.examples())
+    assert any(region.lexemes for _, region in document.regions)
+    document.release('latin-1')
+    assert document._text is None
+    compare([region.lexemes for _, region in document.regions], expected=[{}, {}])
+    for example in examples:
+        example.evaluate()
+    compare(document.namespace['x'], expected=1)
+    assert document._text is None
+    # The text is read again if needed:
+    compare(document.line_column(examples[1].start), expected='line 5, column 1')
+    compare(document.text, expected=text)
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from testfixtures import compare
+
+from sybil.durations import Durations
+from .helpers import run_pytest, write_config, PYTEST
+
+
+def test_order():
+    durations = Durations({'/a.rst': 1.0, '/b.rst': 3.0, '/c.rst': 2.0})
+    compare(
+        durations.order([Path('/a.rst'), Path('/b.rst'), Path('/new.rst'), Path('/c.rst')]),
+        expected=[Path('/new.rst'), Path('/b.rst'), Path('/c.rst'), Path('/a.rst')],
+    )
+
+
+def test_save():
+    durations = Durations({'/a.rst': 1.0, '/b.rst': 3.0})
+    durations.add('/b.rst', 0.5)
+    durations.add('/b.rst', 0.25)
+    compare(durations.save(), expected={'/a.rst': 1.0, '/b.rst': 0.75})
+
+
+def test_xdist_group_marker(tmp_path: Path, capsys):
+    write_config(tmp_path, PYTEST, patterns="['*.rst']")
+    (tmp_path / 'doc.rst').write_text('>>> 1\n1\n>>> 2\n2\n')
+    results = run_pytest(capsys, tmp_path, '-m', 'xdist_group', '--strict-markers')
+    compare((results.total, results.failures), expected=(2, 0))
+
+
+def test_pytest_option(tmp_path: Path, capsys):
+    write_config(tmp_path, PYTEST, patterns="['*.rst']")
+    (tmp_path / 'a.rst').write_text('>>> 1\n1\n')
+    (tmp_path / 'b.rst').write_text('>>> import time; time.sleep(0.2)\n>>> 2\n2\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-durations')
+    compare(results.total, expected=3)
+    assert results.out.text.index('a.rst') < results.out.text.index('b.rst')
+    # The slower document now runs first:
+    results = run_pytest(capsys, tmp_path, '--sybil-durations')
+    results.out.then_find('b.rst::line:1')
+    results.out.then_find('b.rst::line:2')
+    results.out.then_find('a.rst::line:1')
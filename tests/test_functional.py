@@ -487,3 +487,74 @@ def test_request_missing_fixtures(tmp_path: Path, capsys: CaptureFixture[str]):
     compare(results.total, expected=1, suffix=results.out.text)
     compare(results.failures, expected=1, suffix=results.out.text)
     compare(results.errors, expected=0, suffix=results.out.text)
+
+
+def test_fixture_closure_shared_by_examples(tmp_path: Path):
+    (tmp_path / 'test.rst').write_text('>>> x\n1\n>>> x + 1\n2\n')
+    config_template = """
+    import pytest
+    from sybil.parsers.rest import DocTestParser
+    from sybil import Sybil
+
+    @pytest.fixture
+    def x():
+        return 1
+
+    sybil = Sybil(parsers=[DocTestParser()], pattern='*.rst', fixtures=['x'])
+    {assigned_name} = sybil.{integration}()
+    """
+    write_config(tmp_path, PYTEST, template=config_template)
+
+    class CollectItems:
+        def pytest_collection_finish(self, session):
+            self.items = session.items
+
+    collected = CollectItems()
+    compare(pytest.main(['-q', str(tmp_path), '-p', 'no:doctest'], plugins=[collected]),
+            expected=pytest.ExitCode.OK)
+    first, second = collected.items
+    assert first._fixtureinfo is second._fixtureinfo
+    compare(first.fixturenames, expected=['x'])
+    assert first.fixturenames is not second.fixturenames
+
+
+def test_pytest_per_document(tmp_path: Path, capsys: CaptureFixture[str]):
+    write_config(tmp_path, PYTEST, patterns="['*.rst']",
+                 parsers='[DocTestParser(), PythonCodeBlockParser(), SkipParser()]')
+    (tmp_path / 'pass.rst').write_text('>>> x = 1\n\n.. skip: next\n\n>>> y\n\n>>> x\n1\n')
+    (tmp_path / 'fail.rst').write_text('>>> x = 1\n>>> x\n2\n>>> x\n1\n')
+    (tmp_path / 'error.rst').write_text('>>> x = 1\n\n.. code-block:: python\n\n    y\n')
+    (tmp_path / 'empty.rst').write_text('No examples here.\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-per-document')
+    compare((results.total, results.failures), expected=(3, 2), suffix=results.out.text)
+    out = results.out
+    out.assert_present('pass.rst::document:0 PASSED')
+    out.then_find("NameError: name 'y' is not defined")
+    out.then_find(f'Example at {tmp_path / "error.rst"}, line 3, column 1\n')
+    out.then_find(f'Example at {tmp_path / "fail.rst"}, line 2, column 1 '
+                  'did not evaluate as expected:')
+
+
+def test_pytest_per_document_unnamed_sybils(tmp_path: Path, capsys: CaptureFixture[str]):
+    (tmp_path / 'conftest.py').write_text(
+        'from sybil import Sybil\n'
+        'from sybil.parsers.rest import DocTestParser, PythonCodeBlockParser\n'
+        "pytest_collect_file = (Sybil([DocTestParser()], pattern='*.rst') +\n"
+        "                       Sybil([PythonCodeBlockParser()], pattern='*.rst')).pytest()\n"
+    )
+    (tmp_path / 'doc.rst').write_text('>>> 1\n1\n\n.. code-block:: python\n\n    x = 1\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-per-document')
+    compare((results.total, results.failures), expected=(2, 0), suffix=results.out.text)
+    results.out.assert_present('doc.rst::document:0 PASSED')
+    results.out.assert_present('doc.rst::document:1 PASSED')
+
+
+@pytest.mark.parametrize('per_document', [(), ('--sybil-per-document',)])
+def test_pytest_lean(tmp_path: Path, capsys: CaptureFixture[str], per_document):
+    write_config(tmp_path, PYTEST, patterns="['*.rst']",
+                 parsers='[DocTestParser(), PythonCodeBlockParser()]')
+    (tmp_path / 'doc.rst').write_text('.. code-block:: python\n\n    x = 1\n\n>>> x\n2\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-lean', *per_document)
+    compare(results.failures, expected=1, suffix=results.out.text)
+    results.out.assert_present(f'Example at {tmp_path / "doc.rst"}, line 5, column 1 '
+                               'did not evaluate as expected:')
@@ -0,0 +1,107 @@
+import gc
+from pathlib import Path
+
+from testfixtures import compare
+
+from sybil import Document
+from sybil.namespaces import Namespaces
+from .helpers import run_pytest, write_config, PYTEST
+
+
+def test_release_after_last_example():
+    namespaces = Namespaces()
+    document = Document('', 'doc.rst')
+    document.namespace['x'] = 1
+    namespaces.expect(document)
+    namespaces.expect(document)
+    assert namespaces.open(document)
+    assert not namespaces.finish(document)
+    # Torn down with an example still to run, so it stays live:
+    namespaces.close(document)
+    compare(document.namespace, expected={'x': 1})
+    assert namespaces.open(document)
+    assert namespaces.finish(document)
+    namespaces.close(document)
+    compare(document.namespace, expected={})
+    assert not namespaces.open(document)
+    compare(repr(namespaces), expected='<Namespaces: 0 live, peak of 1, 1 released>')
+
+
+def test_released_documents_not_kept():
+    namespaces = Namespaces()
+    document = Document('', 'doc.rst')
+    namespaces.expect(document)
+    namespaces.open(document)
+    namespaces.finish(document)
+    namespaces.close(document)
+    compare(len(namespaces.released), expected=1)
+    del document
+    gc.collect()
+    compare(len(namespaces.released), expected=0)
+    compare(namespaces.cleared, expected=1)
+
+
+CONFIG = """
+from sybil import Sybil
+from sybil.parsers.rest import DocTestParser
+
+def setup(namespace):
+    print('setup')
+
+def teardown(namespace):
+    print('teardown', sorted(name for name in namespace if name != '__builtins__'))
+
+{assigned_name} = Sybil(
+    parsers=[DocTestParser()], pattern='*.rst', setup=setup, teardown=teardown,
+).{integration}()
+
+def pytest_collection_modifyitems(items):
+    # Interleave the examples from the two documents:
+    items[:] = [items[0], items[2], items[1], items[3]]
+
+def pytest_sessionfinish(session):
+    from sybil.integration.pytest import namespaces_key
+    namespaces = session.config.stash[namespaces_key]
+    print('namespaces:', [len(document.namespace) for document in namespaces.released])
+"""
+
+
+def test_pytest_interleaved(tmp_path: Path, capsys):
+    write_config(tmp_path, PYTEST, template=CONFIG)
+    for name in 'a', 'b':
+        (tmp_path / f'{name}.rst').write_text(f'>>> {name} = 1\n>>> {name}\n1\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-release-namespaces')
+    compare((results.total, results.failures), expected=(4, 0), suffix=results.out.text)
+    out = results.out
+    out.then_find("a.rst::line:1,column:1 setup\nPASSEDteardown ['a']")
+    out.then_find("b.rst::line:1,column:1 setup\nPASSEDteardown ['b']")
+    # The namespace from a.rst is still needed, so is set up again, and the
+    # names from the first example are still there:
+    out.then_find("a.rst::line:2,column:1 setup\nPASSEDteardown ['a']")
+    out.then_find("b.rst::line:2,column:1 setup\nPASSEDteardown ['b']")
+    out.assert_present('namespaces: [0, 0]')
+    out.assert_present('sybil namespaces: peak of 2 live, 2 released')
+
+
+DIST_CONFIG = """
+from sybil import Sybil
+from sybil.parsers.rest import DocTestParser
+
+{assigned_name} = Sybil(parsers=[DocTestParser()], pattern='*.rst').{integration}()
+
+def pytest_addoption(parser):
+    # Stands in for the option added by pytest-xdist:
+    parser.addoption('--dist', default='no')
+"""
+
+
+def test_pytest_dist_load_warning(tmp_path: Path, capsys):
+    write_config(tmp_path, PYTEST, template=DIST_CONFIG)
+    (tmp_path / 'a.rst').write_text('>>> 1\n1\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-release-namespaces', '--dist', 'load')
+    compare(results.total, expected=1)
+    results.out.assert_present(
+        '--sybil-release-namespaces has no effect with --dist load, use --dist loadgroup instead'
+    )
+    results = run_pytest(capsys, tmp_path, '--sybil-release-namespaces', '--dist', 'loadgroup')
+    results.out.assert_not_present('has no effect')
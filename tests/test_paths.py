@@ -0,0 +1,180 @@
+import os
+from itertools import product
+from pathlib import Path
+
+import pytest
+from testfixtures import compare
+
+from sybil import Sybil
+from sybil.parsers.rest import DocTestParser
+from sybil.paths import CollectionMatcher, GlobPattern, PathMatcher, walk
+
+ROOT = Path('/root/docs')
+
+PATHS = [
+    ROOT / 'index.rst',
+    ROOT / 'README',
+    ROOT / 'a' / 'b.rst',
+    ROOT / 'a' / 'b' / 'c.rst',
+    ROOT / 'a' / 'b' / 'c.md',
+    ROOT / 'a' / 'b' / 'c.py',
+    ROOT / 'a' / 'README',
+    ROOT / 'tests' / 'test_x.py',
+    ROOT / '.hidden.rst',
+    ROOT,
+    Path('/elsewhere/index.rst'),
+    Path('/root/docsother/index.rst'),
+]
+
+PATTERNS = [
+    '*.rst', '*.py', 'a/*.rst', 'b/*', '**/*.rst', 'a/b/c.*', '[ab]/*.rst', '[!a]*.rst',
+    '?.rst', '/root/docs/*.rst', 'README', 'c.*', 'a/b/c.rst',
+]
+
+
+def reference(root, patterns, excludes, filenames, path):
+    # The implementation of Sybil.should_parse before it was compiled:
+    try:
+        path = path.relative_to(root)
+    except ValueError:
+        return False
+    include = any(path.match(p) for p in patterns) or path.name in filenames
+    return include and not any(path.match(e) for e in excludes)
+
+
+@pytest.mark.parametrize('pattern', PATTERNS)
+def test_glob_pattern_matches_pure_path(pattern):
+    glob = GlobPattern(pattern)
+    for path in PATHS:
+        relative = path.relative_to(ROOT) if path.is_relative_to(ROOT) else path
+        compare(glob.match(relative.parts), expected=relative.match(pattern), prefix=str(path))
+
+
+@pytest.mark.parametrize('patterns, excludes, filenames', [
+    (patterns, excludes, filenames)
+    for patterns, excludes, filenames in product(
+        [[], ['*.rst'], ['*.rst', '*.py'], ['**/*.rst', 'b/*'], ['[!a]*.rst', '?.rst'],
+         ['*']],
+        [[], ['a/*'], ['tests/*', '*.md'], ['c.*']],
+        [set(), {'README'}],
+    )
+])
+def test_matcher_matches_reference(patterns, excludes, filenames):
+    matcher = PathMatcher(ROOT, patterns, excludes, filenames)
+    compare(
+        [matcher(path) for path in PATHS],
+        expected=[reference(ROOT, patterns, excludes, filenames, path) for path in PATHS],
+    )
+
+
+def test_fast_reject():
+    matcher = PathMatcher(ROOT, ['*.rst', 'docs/*.md'], [], {'README'})
+    compare(matcher.suffixes, expected=('.rst', '.md'))
+    assert matcher.might_match('README')
+    assert matcher.might_match('x.md')
+    assert not matcher.might_match('x.py')
+    compare(PathMatcher(ROOT, ['*.rst', 'foo*'], [], ()).suffixes, expected=None)
+
+
+def test_empty_pattern():
+    with pytest.raises(ValueError):
+        GlobPattern('')
+
+
+def test_sybil_matcher_follows_changes():
+    sybil = Sybil([DocTestParser()], path=str(ROOT), pattern='*.rst')
+    assert sybil.matcher() is sybil.matcher()
+    assert not sybil.should_parse(ROOT / 'x.py')
+    sybil.patterns.append('*.py')
+    assert sybil.should_parse(ROOT / 'x.py')
+
+
+def test_collection_matcher():
+    rst = Sybil([DocTestParser()], path=str(ROOT), pattern='*.rst', name='rst')
+    py = Sybil([DocTestParser()], path=str(ROOT), pattern='*.py', excludes=['tests/*'])
+    readme = Sybil([DocTestParser()], path=str(ROOT), filenames={'README'})
+    matcher = CollectionMatcher([rst, py, readme])
+    for path in PATHS:
+        compare(
+            matcher(path),
+            expected=[s for s in (rst, py, readme) if s.should_parse(path)],
+            prefix=str(path),
+        )
+    compare(matcher.suffixes, expected=('.rst', '.py'))
+
+
+def make_tree(root: Path, *paths: str) -> None:
+    for path in paths:
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text('')
+
+
+def test_walk_order_matches_sorted_glob(tmp_path: Path):
+    make_tree(
+        tmp_path, 'a.rst', 'a/b.rst', 'a/b/c.rst', 'a-b.rst', 'B.rst', '.hidden/x.rst',
+        'z/y/x/w.rst', 'a.rst.bak',
+    )
+    (tmp_path / 'link').symlink_to(tmp_path / 'a')
+    (tmp_path / 'link.rst').symlink_to(tmp_path / 'a.rst')
+    compare(
+        list(walk(tmp_path)),
+        expected=[p for p in sorted(tmp_path.glob('**/*')) if p.is_file()],
+    )
+
+
+def test_walk_missing_root(tmp_path: Path):
+    compare(list(walk(tmp_path / 'missing')), expected=[])
+
+
+def test_walk_ignore_files(tmp_path: Path, monkeypatch):
+    make_tree(
+        tmp_path,
+        'docs/index.rst', 'docs/build/out.rst', 'docs/_static/x.rst', 'docs/keep.log',
+        'node_modules/pkg/readme.rst', 'src/build', 'src/a.log', 'src/sub/.gitignore',
+        'src/sub/generated.rst', 'src/sub/real.rst', 'top.rst', 'deep/a/b/c.tmp.rst',
+    )
+    (tmp_path / '.gitignore').write_text(
+        '# comment\n\nnode_modules/\nbuild/\n*.log\n!keep.log\n/top.rst\n**/b/*.tmp.rst\n'
+    )
+    (tmp_path / 'docs' / '.gitignore').write_text('_static\n')
+    (tmp_path / 'src' / 'sub' / '.gitignore').write_text('generated.rst\n')
+
+    scanned = []
+    original = os.scandir
+
+    def scandir(path):
+        scanned.append(Path(path).relative_to(tmp_path).as_posix())
+        return original(path)
+
+    monkeypatch.setattr(os, 'scandir', scandir)
+    compare(
+        [p.relative_to(tmp_path).as_posix() for p in walk(tmp_path, ['.gitignore'])],
+        expected=[
+            '.gitignore',
+            'docs/.gitignore',
+            'docs/index.rst',
+            'docs/keep.log',
+            # build/ only matches directories:
+            'src/build',
+            'src/sub/.gitignore',
+            'src/sub/real.rst',
+        ],
+    )
+    assert 'node_modules' not in scanned
+    assert 'docs/build' not in scanned
+    assert 'docs/_static' not in scanned
+
+
+def test_sybil_paths(tmp_path: Path):
+    make_tree(tmp_path, 'a.rst', 'b.py', 'ignored/c.rst', 'd/e.rst')
+    (tmp_path / '.ignore').write_text('ignored\n')
+    sybil = Sybil(
+        [DocTestParser()], path=str(tmp_path), pattern='*.rst', ignore_files=['.ignore']
+    )
+    compare(
+        [p.relative_to(tmp_path).as_posix() for p in sybil.paths()],
+        expected=['a.rst', 'd/e.rst'],
+    )
+    compare(len(list(Sybil([DocTestParser()], path=str(tmp_path), pattern='*.rst').paths())),
+            expected=3)
@@ -0,0 +1,74 @@
+import re
+
+from testfixtures import compare
+
+from sybil.parsers.abstract.patterns import PATTERNS, PatternRegistry
+from sybil.parsers.markdown.lexers import DirectiveInHTMLCommentLexer, FencedCodeBlockLexer
+from sybil.parsers.myst.lexers import DirectiveLexer as MystDirectiveLexer
+from sybil.parsers.rest.lexers import DirectiveLexer, DirectiveInCommentLexer
+from .helpers import lex
+
+
+def test_hit_after_miss():
+    registry = PatternRegistry()
+    first = registry.compile('(?P<x>{x})', x='a+')
+    second = registry.compile('(?P<x>{x})', x='a+')
+    assert first is second
+    compare(first.pattern, expected='(?P<x>a+)')
+    compare((registry.hits, registry.misses, registry.evictions), expected=(1, 1, 0))
+
+
+def test_key_includes_flags_and_substitutions():
+    registry = PatternRegistry()
+    plain = registry.compile('{x}', x='a')
+    assert registry.compile('{x}', re.MULTILINE, x='a') is not plain
+    assert registry.compile('{x}', x='b') is not plain
+    compare(registry.misses, expected=3)
+
+
+def test_no_substitutions_means_no_formatting():
+    compare(PatternRegistry().compile('a{2,}').pattern, expected='a{2,}')
+
+
+def test_least_recently_used_evicted():
+    registry = PatternRegistry(maxsize=2)
+    a = registry.compile('a')
+    registry.compile('b')
+    # use 'a' so that 'b' is now the least recently used:
+    registry.compile('a')
+    registry.compile('c')
+    compare(registry.evictions, expected=1)
+    assert registry.compile('a') is a
+    registry.compile('b')
+    compare(registry.misses, expected=4)
+    compare(
+        repr(registry),
+        expected='<PatternRegistry: 2/2 patterns, 2 hits, 4 misses, 2 evictions>'
+    )
+
+
+def test_clear():
+    registry = PatternRegistry()
+    registry.compile('a')
+    registry.compile('a')
+    registry.clear()
+    compare(repr(registry), expected='<PatternRegistry: 0/1024 patterns, 0 hits, 0 misses, 0 evictions>')
+
+
+def test_identical_lexers_share_patterns():
+    for make in (
+        lambda: DirectiveLexer('code-block'),
+        lambda: DirectiveInCommentLexer('invisible-code-block'),
+        lambda: DirectiveInHTMLCommentLexer('skip'),
+    ):
+        assert make().start_pattern is make().start_pattern
+    for make in (lambda: FencedCodeBlockLexer('python'), lambda: MystDirectiveLexer('code')):
+        assert make().info_pattern is make().info_pattern
+
+
+def test_end_patterns_reused_while_lexing():
+    lexer = DirectiveLexer(directive='code-block')
+    lex('lexing-directives.txt', lexer)
+    hits = PATTERNS.hits
+    regions = lex('lexing-directives.txt', lexer)
+    assert PATTERNS.hits - hits >= len(regions)
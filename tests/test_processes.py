@@ -0,0 +1,194 @@
+import re
+import unittest
+from pathlib import Path
+
+import pytest
+from testfixtures import compare
+
+from sybil import Sybil, Region
+from sybil.cache import ParseCache
+from sybil.parsers.rest import DocTestParser, PythonCodeBlockParser, SkipParser
+from sybil.processes import parse_in_processes
+from .helpers import sample_path
+
+
+def write_docs(tmp_path: Path, count: int) -> None:
+    for i in range(count):
+        (tmp_path / f'doc{i:02d}.rst').write_text(
+            f'>>> x = {i}\n\n.. code-block:: python\n\n  assert x == {i}\n\n'
+            f'.. skip: next\n\n>>> 1/0\n'
+        )
+
+
+def run_suite(suite):
+    result = unittest.TestResult()
+    suite.run(result)
+    return result
+
+
+def test_unittest_parse_processes(tmp_path: Path):
+    write_docs(tmp_path, 10)
+    sybil = Sybil(
+        [DocTestParser(), PythonCodeBlockParser(), SkipParser()],
+        path=str(tmp_path), pattern='*.rst'
+    )
+    serial = sybil.unittest()()
+    parallel = sybil.unittest(parse_processes=3)()
+    compare([str(t) for t in parallel], expected=[str(t) for t in serial])
+    result = run_suite(parallel)
+    compare(result.testsRun, expected=40)
+    compare(result.errors + result.failures, expected=[])
+
+
+def test_collection_parse_processes(tmp_path: Path):
+    write_docs(tmp_path, 3)
+    first = Sybil([DocTestParser()], path=str(tmp_path), pattern='*.rst', name='first')
+    second = Sybil([PythonCodeBlockParser()], path=str(tmp_path), pattern='*.rst', name='second')
+    suite = (first + second).unittest(parse_processes=2)()
+    compare(
+        [str(t).split('/')[-1] for t in suite],
+        expected=[
+            'doc00.rst,sybil:first,line:1,column:1',
+            'doc00.rst,sybil:first,line:9,column:1',
+            'doc01.rst,sybil:first,line:1,column:1',
+            'doc01.rst,sybil:first,line:9,column:1',
+            'doc02.rst,sybil:first,line:1,column:1',
+            'doc02.rst,sybil:first,line:9,column:1',
+            'doc00.rst,sybil:second,line:3,column:1',
+            'doc01.rst,sybil:second,line:3,column:1',
+            'doc02.rst,sybil:second,line:3,column:1',
+        ]
+    )
+
+
+def test_unpicklable_regions_parsed_locally(tmp_path: Path):
+    (tmp_path / 'a.txt').write_text('X X\n')
+    (tmp_path / 'b.txt').write_text('X\n')
+    seen = []
+
+    def parser(document):
+        for m in re.finditer('X', document.text):
+            yield Region(m.start(), m.end(), evaluator=lambda example: seen.append(example.path))
+
+    sybil = Sybil([parser], path=str(tmp_path), pattern='*.txt')
+    result = run_suite(sybil.unittest(parse_processes=2)())
+    compare(result.testsRun, expected=3)
+    compare(len(seen), expected=3)
+
+
+def test_documents_match_serial_parse():
+    sybil = Sybil([DocTestParser()])
+    paths = [Path(sample_path(name)) for name in ('doctest.txt', 'docstrings.py')]
+    documents = parse_in_processes([sybil], [(0, path) for path in paths], processes=2)
+    for path, document in zip(paths, documents):
+        expected = sybil.parse(path)
+        compare(type(document), expected=type(expected))
+        compare(document.text, expected=expected.text)
+        compare(
+            [(e.line, e.column, e.region.evaluator) for e in document],
+            expected=[(e.line, e.column, e.region.evaluator) for e in expected],
+        )
+
+
+def test_timings_and_cache_counts_kept(tmp_path: Path):
+    write_docs(tmp_path, 4)
+    parsers = [DocTestParser(), PythonCodeBlockParser()]
+    sybil = Sybil(parsers, path=str(tmp_path), pattern='*.rst', cache=ParseCache(tmp_path / 'c'))
+    jobs = [(0, path) for path in sorted(sybil.paths())]
+    documents = parse_in_processes([sybil], jobs, processes=2)
+    for document in documents:
+        assert document.read_time is not None
+        compare([(t.parser, t.regions) for t in document.parser_timings],
+                expected=[(parsers[0], 2), (parsers[1], 1)])
+    compare((sybil.cache.hits, sybil.cache.misses), expected=(0, 4))
+    parse_in_processes([sybil], jobs, processes=2)
+    compare((sybil.cache.hits, sybil.cache.misses), expected=(4, 4))
+
+
+def test_spawned_workers(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr('sybil.processes.can_fork', lambda: False)
+    write_docs(tmp_path, 2)
+    sybil = Sybil([DocTestParser()], path=str(tmp_path), pattern='*.rst')
+    jobs = [(0, path) for path in sorted(sybil.paths())]
+    documents = parse_in_processes([sybil], jobs, processes=2)
+    compare([len(document.regions) for document in documents], expected=[2, 2])
+
+
+def test_unpicklable_sybils_parsed_locally(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr('sybil.processes.can_fork', lambda: False)
+    (tmp_path / 'a.txt').write_text('X X\n')
+    (tmp_path / 'b.txt').write_text('X\n')
+
+    def parser(document):
+        for m in re.finditer('X', document.text):
+            yield Region(m.start(), m.end(), evaluator=lambda example: None)
+
+    sybil = Sybil([parser], path=str(tmp_path), pattern='*.txt')
+    with pytest.warns(RuntimeWarning, match='could not use worker processes'):
+        suite = sybil.unittest(parse_processes=2)()
+    compare(suite.countTestCases(), expected=3)
+
+
+def test_unittest_processes_without_fork(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr('sybil.processes.can_fork', lambda: False)
+    write_docs(tmp_path, 3)
+    sybil = Sybil([DocTestParser(), SkipParser()], path=str(tmp_path), pattern='*.rst')
+    with pytest.warns(RuntimeWarning, match='cannot safely be forked'):
+        result = run_suite(sybil.unittest(processes=2)())
+    compare(result.testsRun, expected=9)
+    compare(result.errors + result.failures, expected=[])
+
+
+def test_unittest_processes(tmp_path: Path):
+    write_docs(tmp_path, 6)
+    (tmp_path / 'doc02.rst').write_text('>>> x = 1\n\n>>> x\n2\n\n>>> assert 1 == 1\n')
+
+    def setup(namespace):
+        namespace['setup_ran'] = True
+
+    (tmp_path / 'doc04.rst').write_text('>>> setup_ran\nTrue\n\n>>> 1/0\n\n>>> 2\n2\n')
+    sybil = Sybil(
+        [DocTestParser(), PythonCodeBlockParser(), SkipParser()],
+        path=str(tmp_path), pattern='*.rst', setup=setup,
+    )
+    serial = run_suite(sybil.unittest()())
+    suite = sybil.unittest(processes=3)()
+    compare(suite.countTestCases(), expected=serial.testsRun)
+    parallel = run_suite(suite)
+    compare(parallel.testsRun, expected=serial.testsRun)
+    compare(
+        [(str(test), text.strip().splitlines()[-1]) for test, text in parallel.failures],
+        expected=[(str(test), text.strip().splitlines()[-1]) for test, text in serial.failures],
+    )
+    compare(
+        [(str(test), text.strip().splitlines()[-1]) for test, text in parallel.errors],
+        expected=[(str(test), text.strip().splitlines()[-1]) for test, text in serial.errors],
+    )
+    compare(len(parallel.skipped), expected=len(serial.skipped))
+    assert "ZeroDivisionError" in parallel.failures[1][1]
+
+
+def test_unittest_processes_setup_failure(tmp_path: Path):
+    write_docs(tmp_path, 2)
+
+    def setup(namespace):
+        raise ValueError('bad setup')
+
+    sybil = Sybil([DocTestParser()], path=str(tmp_path), pattern='*.rst', setup=setup)
+    result = run_suite(sybil.unittest(processes=2)())
+    compare(result.testsRun, expected=0)
+    compare(len(result.errors), expected=2)
+    test, text = result.errors[0]
+    assert str(test).startswith('setUpClass'), str(test)
+    assert "ValueError: bad setup" in text
+
+
+def test_unittest_processes_failfast(tmp_path: Path):
+    write_docs(tmp_path, 4)
+    (tmp_path / 'doc00.rst').write_text('>>> 1\n2\n')
+    sybil = Sybil([DocTestParser()], path=str(tmp_path), pattern='*.rst')
+    result = unittest.TestResult()
+    result.failfast = True
+    sybil.unittest(processes=2)().run(result)
+    compare(len(result.failures), expected=1)
+    assert result.testsRun < 7
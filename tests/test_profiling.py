@@ -0,0 +1,112 @@
+import cProfile
+import pstats
+from pathlib import Path
+
+import pytest
+from testfixtures import compare
+
+from sybil import Sybil
+from sybil.document import Document
+from sybil.example import SybilFailure
+from sybil.parsers.rest import DocTestParser
+from sybil.profiling import Profiler, format_size
+from .helpers import run_pytest, write_config, PYTEST
+
+TEXT = '>>> data = [bytes(1000) for _ in range(100)]\n>>> len(data)\n100\n>>> 1\n2\n'
+
+
+def make_document(tmp_path: Path, profiler: Profiler) -> Document:
+    path = tmp_path / 'doc.rst'
+    path.write_text(TEXT)
+    document = Document.parse(str(path), DocTestParser())
+    document.profiler = profiler
+    return document
+
+
+def result_directory(profiler: Profiler) -> Path:
+    directory, = profiler.directory.iterdir()
+    return directory
+
+
+def test_format_size():
+    compare(format_size(10), expected='+10.0 B')
+    compare(format_size(-2048), expected='-2.0 KiB')
+    compare(format_size(3 * 1024 ** 3), expected='+3.0 GiB')
+
+
+def test_cpu_and_memory(tmp_path: Path):
+    profiler = Profiler(tmp_path / 'profile', cpu=True, memory=True, top=3)
+    document = make_document(tmp_path, profiler)
+    first, second, third = document
+    first.evaluate()
+    second.evaluate()
+    with pytest.raises(SybilFailure):
+        third.evaluate()
+    compare(profiler.profiled, expected=3)
+    document.teardown()
+    profiler.close()
+    directory = result_directory(profiler)
+    assert directory.name.startswith('doc.rst-')
+    compare(sorted(p.name for p in directory.iterdir()), expected=[
+        'allocations.txt',
+        'document.pstats',
+        'line-1-column-1.pstats',
+        'line-2-column-1.pstats',
+        'line-4-column-1.pstats',
+    ])
+    stats = pstats.Stats(str(directory / 'document.pstats'))
+    assert stats.total_calls > 0
+    allocations = (directory / 'allocations.txt').read_text().splitlines()
+    compare(allocations[0], expected=f'{document.path}:')
+    assert 'line 1, column 1:' in allocations
+    assert any('KiB' in line for line in allocations[1:4]), allocations
+
+
+def test_select(tmp_path: Path):
+    profiler = Profiler(tmp_path / 'profile', select=['*.rst:2'])
+    document = make_document(tmp_path, profiler)
+    for example in list(document)[:2]:
+        example.evaluate()
+    compare(profiler.profiled, expected=1)
+    document.teardown()
+    compare(sorted(p.name for p in result_directory(profiler).iterdir()),
+            expected=['document.pstats', 'line-2-column-1.pstats'])
+
+
+def test_other_profiler_active(tmp_path: Path):
+    profiler = Profiler(tmp_path / 'profile')
+    document = make_document(tmp_path, profiler)
+    example = next(iter(document))
+    other = cProfile.Profile()
+    other.enable()
+    try:
+        example.evaluate()
+    finally:
+        other.disable()
+    # The example is still evaluated, even if it can't be profiled:
+    compare(document.namespace['data'][0], expected=bytes(1000))
+    document.teardown()
+
+
+def test_sybil_parameter(tmp_path: Path):
+    (tmp_path / 'doc.rst').write_text('>>> 1\n1\n')
+    profiler = Profiler(tmp_path / 'profile')
+    sybil = Sybil([DocTestParser()], path=str(tmp_path), pattern='*.rst', profiler=profiler)
+    document = sybil.parse(tmp_path / 'doc.rst')
+    assert document.profiler is profiler
+    next(iter(document)).evaluate()
+    compare(profiler.profiled, expected=1)
+
+
+def test_pytest_option(tmp_path: Path, capsys):
+    write_config(tmp_path, PYTEST, patterns="['*.rst']")
+    (tmp_path / 'doc.rst').write_text('>>> 1 + 1\n2\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-profile', 'all',
+                         '--sybil-profile-dir', str(tmp_path / 'profile'))
+    results.out.assert_present(
+        f'sybil profile: 1 examples profiled, results in {tmp_path / "profile"}'
+    )
+    directory, = (tmp_path / 'profile').iterdir()
+    compare(sorted(p.name for p in directory.iterdir()), expected=[
+        'allocations.txt', 'document.pstats', 'line-1-column-1.pstats',
+    ])
@@ -0,0 +1,138 @@
+import re
+from pathlib import Path
+
+import pytest
+from testfixtures import compare
+
+from sybil import Document
+from sybil.document import PythonDocStringDocument
+from sybil.parsers import markdown, myst, rest
+from sybil.parsers.abstract.lexers import LexerCollection
+from sybil.parsers.abstract.scanning import (
+    SCANS, CombinedScanner, ScanCache, combine_patterns, tokenize
+)
+from .helpers import SAMPLE_PATH, region_details
+
+
+def all_lexers(module):
+    lexers = LexerCollection()
+    for parser in (
+        module.CodeBlockParser(language='python'), module.CodeBlockParser(language='lolcode'),
+        module.SkipParser(), module.ClearNamespaceParser(),
+    ):
+        lexers.extend(parser.lexers)
+    return lexers
+
+
+def naive(lexers, document):
+    # What lexing a document with a collection of lexers did before scans were combined:
+    regions = []
+    for lexer in lexers:
+        SCANS.clear()
+        regions.extend(lexer(document))
+    return regions
+
+
+@pytest.mark.parametrize('module, path', [
+    (module, path)
+    for module, pattern in ((rest, '*.txt'), (rest, '*.rst'), (markdown, '*.md'), (myst, '*.md'))
+    for path in sorted(SAMPLE_PATH.glob(pattern))
+], ids=lambda value: getattr(value, 'name', getattr(value, '__name__', None)))
+def test_combined_matches_individual(module, path: Path):
+    lexers = all_lexers(module)
+    document = Document(path.read_text(), str(path))
+    try:
+        expected = naive(lexers, document)
+    except Exception as e:
+        with pytest.raises(type(e)):
+            list(lexers(Document(path.read_text(), str(path))))
+    else:
+        document = Document(path.read_text(), str(path))
+        compare(
+            expected=region_details(document, expected),
+            actual=region_details(document, lexers(document)),
+        )
+
+
+def test_tokenize():
+    compare(
+        tokenize(r'^(?P<prefix>[ \t]*)\.\.\s*(a|b)+?[]x]{2,3}\1'),
+        expected=[
+            '^', '(?P<prefix>[ \\t]*)', '\\.', '\\.', '\\s*', '(a|b)+?', '[]x]{2,3}', '\\1'
+        ],
+    )
+
+
+def test_common_prefix_hoisted():
+    combined = combine_patterns([
+        re.compile(r'^(?P<p> *)\.\. (?P<d>foo)\1', re.M),
+        re.compile(r'^(?P<p> *)\.\. (?P<d>bar)(x)\2', re.M),
+    ])
+    compare(
+        combined.pattern,
+        expected=r'(?=^(?P<p> *)\.\. (?:(?P<d__0>foo)(?:\1)|(?P<d__1>bar)(x)(?:\3)))',
+    )
+
+
+@pytest.mark.parametrize('patterns', [
+    [re.compile('a'), re.compile('b', re.M)],
+    [re.compile('(a)?(?(1)b|c)'), re.compile('a')],
+    [re.compile('(?i)a'), re.compile('b')],
+    [re.compile('a', re.X), re.compile('b', re.X)],
+], ids=['flags', 'conditional', 'inline-flags', 'verbose'])
+def test_cannot_combine(patterns):
+    assert combine_patterns(patterns) is None
+    # ...but the scanner still gives the right answer:
+    text = 'abcABC\nab\n'
+    compare(
+        {pattern: [m.span() for m in matches]
+         for pattern, matches in CombinedScanner(patterns).scan(text).items()},
+        expected={pattern: [m.span() for m in pattern.finditer(text)] for pattern in patterns}
+    )
+
+
+@pytest.mark.parametrize('patterns', [
+    ['ab', 'a', 'b|c'],
+    ['(x)(y)\\2', '(x)(z)\\2', 'x(?P<n>.)(?P=n)'],
+    ['a*', 'b'],
+    ['aa', 'aaa'],
+    ['(?<=a)b', 'b$'],
+])
+def test_scan_matches_finditer(patterns):
+    patterns = [re.compile(p, re.MULTILINE) for p in patterns]
+    text = 'aaab\nxyyxzzxqq\nab\nabc\nb'
+    actual = CombinedScanner(patterns).scan(text)
+    compare(
+        {p.pattern: [(m.span(), m.groups()) for m in actual[p]] for p in patterns},
+        expected={p.pattern: [(m.span(), m.groups()) for m in p.finditer(text)] for p in patterns}
+    )
+
+
+def test_scan_shared_between_parsers():
+    cache = ScanCache()
+    document = Document('text', 'path')
+    calls = []
+
+    def scan():
+        calls.append(1)
+        return iter([1, 2])
+
+    compare(cache.get(document, 'key', scan), expected=[1, 2])
+    compare(cache.get(document, 'key', scan), expected=[1, 2])
+    compare(len(calls), expected=1)
+    # a different document means a fresh scan:
+    compare(cache.get(Document('text', 'path'), 'key', scan), expected=[1, 2])
+    compare(len(calls), expected=2)
+
+
+def test_scans_cleared_after_parse():
+    path = SAMPLE_PATH / 'codeblock.txt'
+    Document.parse(str(path), rest.PythonCodeBlockParser(), rest.DocTestParser())
+    compare(SCANS.current, expected=(None, None, {}))
+    PythonDocStringDocument.parse(str(SAMPLE_PATH / 'docstrings.py'), rest.DocTestParser())
+    compare(SCANS.current, expected=(None, None, {}))
+
+
+@pytest.mark.parametrize('module', [rest, markdown, myst])
+def test_parser_lexers_are_combined(module):
+    assert all_lexers(module).scanner().combined is not None
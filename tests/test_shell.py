@@ -0,0 +1,204 @@
+import os
+from pathlib import Path
+from shutil import which
+
+import pytest
+from testfixtures import compare
+
+from sybil import Document
+from sybil.evaluators.shell import ShellEvaluator, commands
+from sybil.example import SybilFailure
+from sybil.parsers.rest import CodeBlockParser
+from sybil.python import import_cleanup
+from .helpers import run, write_config, PYTEST, UNITTEST
+
+pytestmark = pytest.mark.skipif(which('bash') is None, reason='bash is not available')
+
+SESSION = """\
+.. code-block:: console
+
+    $ export GREETING=hello
+    $ mkdir sub && cd sub
+    $ echo $GREETING
+    hello
+
+.. code-block:: bash
+
+    echo ignored
+    test "$(basename "$PWD")" = sub
+
+.. code-block:: console
+
+    $ printf 'no newline'
+    no newline
+    $ echo one &&
+    > echo two
+    one
+    two
+"""
+
+
+def parse(tmp_path: Path, text: str, evaluator: ShellEvaluator) -> Document:
+    path = tmp_path / 'doc.rst'
+    path.write_text(text)
+    return Document.parse(
+        str(path), CodeBlockParser('console', evaluator), CodeBlockParser('bash', evaluator)
+    )
+
+
+def test_commands():
+    compare(commands('$ one\n> two\nout\n\n$ three\n'), expected=[
+        ('one\ntwo', 'out'),
+        ('three', ''),
+    ])
+    compare(commands('echo one\necho two\n'), expected=[('echo one\necho two\n', None)])
+
+
+def test_session(tmp_path: Path):
+    evaluator = ShellEvaluator()
+    document = parse(tmp_path, SESSION, evaluator)
+    for example in document:
+        example.evaluate()
+    assert (tmp_path / 'sub').is_dir()
+    session = evaluator.sessions[document]
+    document.teardown()
+    assert session.process.returncode is not None
+    compare(evaluator.sessions, expected={})
+
+
+def test_wrong_output(tmp_path: Path):
+    document = parse(tmp_path, '.. code-block:: console\n\n    $ echo foo\n    bar\n',
+                     ShellEvaluator())
+    example, = document
+    with pytest.raises(SybilFailure) as excinfo:
+        example.evaluate()
+    compare(excinfo.value.result, expected='$ echo foo\nExpected:\n    bar\nGot:\n    foo\n')
+    document.teardown()
+
+
+def test_non_zero_exit(tmp_path: Path):
+    document = parse(tmp_path, '.. code-block:: bash\n\n    echo oops >&2\n    false\n',
+                     ShellEvaluator())
+    example, = document
+    with pytest.raises(SybilFailure) as excinfo:
+        example.evaluate()
+    compare(excinfo.value.result,
+            expected='echo oops >&2\nfalse\nexited with status 1:\n    oops\n')
+    document.teardown()
+
+
+def test_shell_exits(tmp_path: Path):
+    text = ('.. code-block:: console\n\n    $ exit 3\n\n'
+            '.. code-block:: console\n\n    $ echo hello\n    hello\n')
+    evaluator = ShellEvaluator()
+    document = parse(tmp_path, text, evaluator)
+    exits, later = document
+    with pytest.raises(SybilFailure) as excinfo:
+        exits.evaluate()
+    compare(excinfo.value.result, expected='$ exit 3\nexited the shell with status 3\n')
+    compare(evaluator.sessions, expected={})
+    # A new session is started for later examples:
+    later.evaluate()
+    document.teardown()
+
+
+def test_set_e(tmp_path: Path):
+    text = '.. code-block:: bash\n\n    set -e\n    echo before\n    false\n    echo after\n'
+    document = parse(tmp_path, text, ShellEvaluator())
+    example, = document
+    with pytest.raises(SybilFailure) as excinfo:
+        example.evaluate()
+    compare(excinfo.value.result, expected=(
+        'set -e\necho before\nfalse\necho after\nexited the shell with status 1:\n    before\n'
+    ))
+    document.teardown()
+
+
+def test_invalid_syntax(tmp_path: Path):
+    text = ('.. code-block:: console\n\n    $ echo "unterminated\n\n'
+            ".. code-block:: console\n\n    $ echo 'still here'\n    still here\n")
+    document = parse(tmp_path, text, ShellEvaluator())
+    invalid, valid = document
+    with pytest.raises(SybilFailure) as excinfo:
+        invalid.evaluate()
+    assert excinfo.value.result.startswith('$ echo "unterminated\nexited with status 2:\n'), \
+        excinfo.value.result
+    # The session is still usable:
+    valid.evaluate()
+    document.teardown()
+
+
+def test_timeout(tmp_path: Path):
+    text = '.. code-block:: bash\n\n    sleep 30\n\n.. code-block:: bash\n\n    true\n'
+    evaluator = ShellEvaluator(timeout=0.5)
+    document = parse(tmp_path, text, evaluator)
+    slow, fast = document
+    session = evaluator.session_for(document)
+    with pytest.raises(SybilFailure) as excinfo:
+        slow.evaluate()
+    compare(excinfo.value.result, expected='sleep 30\ntimed out after 0.5 seconds\n')
+    assert session.process.returncode is not None
+    compare(evaluator.sessions, expected={})
+    # A new session is started for later examples:
+    fast.evaluate()
+    document.teardown()
+
+
+def test_does_not_read_protocol(tmp_path: Path):
+    text = '.. code-block:: console\n\n    $ cat\n    $ echo after\n    after\n'
+    document = parse(tmp_path, text, ShellEvaluator())
+    for example in document:
+        example.evaluate()
+    document.teardown()
+
+
+CONFIG_TEMPLATE = """
+from sybil import Sybil
+from sybil.evaluators.shell import ShellEvaluator
+from sybil.parsers.rest import CodeBlockParser
+evaluator = ShellEvaluator()
+{assigned_name} = Sybil(
+{params}
+).{integration}()
+"""
+
+
+@pytest.mark.parametrize('runner', [PYTEST, UNITTEST])
+def test_integration(tmp_path: Path, capsys: pytest.CaptureFixture[str], runner: str):
+    (tmp_path / 'doc.rst').write_text(SESSION)
+    write_config(
+        tmp_path, runner, template=CONFIG_TEMPLATE, pattern="'*.rst'",
+        parsers="[CodeBlockParser('console', evaluator), CodeBlockParser('bash', evaluator)]",
+    )
+    with import_cleanup():
+        results = run(capsys, runner, tmp_path)
+    compare((results.total, results.failures, results.errors), expected=(3, 0, 0))
+
+
+FAILING_TEARDOWN_TEMPLATE = """
+from sybil import Sybil
+from sybil.evaluators.shell import ShellEvaluator
+from sybil.parsers.rest import CodeBlockParser
+evaluator = ShellEvaluator()
+def teardown(namespace):
+    raise Exception('teardown failed')
+{assigned_name} = Sybil(
+{params}
+).{integration}()
+"""
+
+
+@pytest.mark.parametrize('runner', [PYTEST, UNITTEST])
+def test_session_closed_when_teardown_fails(
+        tmp_path: Path, capsys: pytest.CaptureFixture[str], runner: str
+):
+    (tmp_path / 'doc.rst').write_text('.. code-block:: bash\n\n    echo $$ > pid\n')
+    write_config(
+        tmp_path, runner, template=FAILING_TEARDOWN_TEMPLATE, pattern="'*.rst'",
+        parsers="[CodeBlockParser('bash', evaluator)]", teardown='teardown',
+    )
+    with import_cleanup():
+        results = run(capsys, runner, tmp_path)
+    results.out.assert_present('teardown failed')
+    with pytest.raises(ProcessLookupError):
+        os.kill(int((tmp_path / 'pid').read_text()), 0)
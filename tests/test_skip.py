@@ -1,10 +1,14 @@
+import gc
 import sys
+import weakref
+from pathlib import Path
 from unittest import SkipTest
 
 import pytest
-from testfixtures import ShouldRaise
+from testfixtures import ShouldRaise, compare
 
 from sybil import Document
+from sybil.evaluators.skip import compile_reason
 from sybil.parsers.rest import PythonCodeBlockParser, DocTestParser, SkipParser
 from .helpers import parse, sample_path
 
@@ -113,7 +117,64 @@ def test_malformed_arguments():
     with ShouldRaise(ValueError("malformed arguments to skip: '<:'")):
         Document.parse(path, SkipParser())
 
+
 def test_missing_arguments():
     path = sample_path('skip-missing-arguments.txt')
     with ShouldRaise(ValueError("missing arguments to skip")):
         Document.parse(path, SkipParser())
+
+
+def test_condition_uses_namespace_without_copying(tmp_path: Path):
+    path = tmp_path / 'doc.txt'
+    path.write_text('.. skip: next if(flag, reason="flagged")\n\n>>> 1\n1\n')
+    compile_reason.cache_clear()
+    for flag in False, True:
+        document = Document.parse(str(path), DocTestParser(), SkipParser())
+        namespace = document.namespace
+        namespace['flag'] = flag
+        skip, example = document
+        skip.evaluate()
+        assert document.namespace is namespace
+        assert 'if_' not in namespace
+        if flag:
+            with ShouldRaise(SkipTest('flagged')):
+                example.evaluate()
+        else:
+            example.evaluate()
+    info = compile_reason.cache_info()
+    assert (info.hits, info.misses) == (1, 1), info
+
+
+def test_condition_does_not_change_namespace(tmp_path: Path):
+    path = tmp_path / 'doc.rst'
+    path.write_text(
+        '.. code-block:: python\n\n    x = [1, 2]\n\n'
+        '.. skip: next if(any(i > y for i in x) and (z := 1), reason="big")\n\n'
+        '.. code-block:: python\n\n    raise Exception()\n'
+    )
+    document = Document.parse(str(path), PythonCodeBlockParser(), SkipParser())
+    setup, skip, example = document
+    setup.evaluate()
+    document.namespace['y'] = 0
+    skip.evaluate()
+    compare(sorted(document.namespace), expected=['x', 'y'])
+    with ShouldRaise(SkipTest('big')):
+        example.evaluate()
+
+
+def test_unfinished_skip_does_not_keep_document_alive(tmp_path: Path):
+    path = tmp_path / 'doc.txt'
+    path.write_text('.. skip: start\n\n>>> 1\n2\n')
+    parser = SkipParser()
+    document = Document.parse(str(path), DocTestParser(), parser)
+    for example in document:
+        try:
+            example.evaluate()
+        except SkipTest:
+            pass
+    assert len(parser.skipper.document_state) == 1
+    reference = weakref.ref(document)
+    del document, example
+    gc.collect()
+    assert reference() is None
+    assert len(parser.skipper.document_state) == 0
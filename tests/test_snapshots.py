@@ -0,0 +1,75 @@
+import os
+import pickle
+from pathlib import Path
+
+from testfixtures import compare
+
+from sybil import Document
+from sybil.parsers.rest import DocTestParser
+from sybil.snapshots import Snapshots, snapshot
+from .helpers import run_pytest, write_config, PYTEST
+
+
+def test_snapshot():
+    data = snapshot({'os': os, 'x': 1, 'fixture': object(), '__builtins__': {}},
+                    exclude={'fixture'})
+    assert data is not None
+    compare(pickle.loads(data), expected={'os': os, 'x': 1})
+
+
+def test_snapshot_not_picklable():
+    compare(snapshot({'f': lambda: None}), expected=None)
+
+
+def make_document(tmp_path: Path, text: str) -> Document:
+    path = tmp_path / 'doc.txt'
+    path.write_text(text)
+    return Document.parse(str(path), DocTestParser())
+
+
+def test_restore(tmp_path: Path):
+    text = '>>> x = 1\n>>> x += 1\n>>> x\n3\n'
+    snapshots = Snapshots(tmp_path / 'snapshots')
+    examples = list(make_document(tmp_path, text))
+    for example in examples:
+        snapshots.prepare(example)
+        try:
+            example.evaluate()
+        except Exception:
+            snapshots.finish(example, failed=True)
+        else:
+            snapshots.finish(example)
+    compare(len(list((tmp_path / 'snapshots').iterdir())), expected=1)
+
+    # Only the failing example:
+    snapshots = Snapshots(tmp_path / 'snapshots')
+    example = list(make_document(tmp_path, text))[2]
+    snapshots.prepare(example)
+    compare(example.namespace['x'], expected=2)
+    compare(repr(snapshots), expected=(
+        f'<Snapshots {tmp_path / "snapshots"}: 1 restored, 0 replayed>'
+    ))
+
+
+def test_replay(tmp_path: Path):
+    text = '>>> def f(): return 1\n>>> x = f()\n>>> x\n2\n'
+    snapshots = Snapshots(tmp_path / 'snapshots')
+    example = list(make_document(tmp_path, text))[2]
+    snapshots.prepare(example)
+    compare(example.namespace['x'], expected=1)
+    compare((snapshots.restored, snapshots.replayed), expected=(0, 2))
+
+
+def test_pytest_last_failed(tmp_path: Path, capsys):
+    write_config(tmp_path, PYTEST, patterns="['*.rst']")
+    (tmp_path / 'doc.rst').write_text('>>> x = 1\n>>> x += 1\n>>> x\n3\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-snapshots')
+    compare((results.total, results.failures), expected=(3, 1))
+    results = run_pytest(capsys, tmp_path, '--sybil-snapshots', '--lf')
+    compare((results.total, results.failures), expected=(1, 1))
+    results.out.assert_present('sybil snapshots: 1 restored, 0 examples replayed')
+    results.out.assert_present('Got:\n    2')
+    (tmp_path / 'doc.rst').write_text('>>> x = 1\n>>> x += 1\n>>> x\n2\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-snapshots', '--lf')
+    compare((results.total, results.failures), expected=(1, 0))
+    results.out.assert_present('sybil snapshots: 0 restored, 2 examples replayed')
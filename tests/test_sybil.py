@@ -9,7 +9,7 @@ import pytest
 from testfixtures import compare, StringComparison
 
 from sybil import Sybil, Region
-from sybil.document import Document, PythonDocument
+from sybil.document import Document, PythonDocStringDocument, PythonDocument
 from sybil.example import Example, SybilFailure
 
 from .helpers import sample_path, write_doctest
@@ -211,6 +211,96 @@ class TestDocument:
             'from line 1, column 3 to line 1, column 5'
         )
 
+    def test_add_regions(self, document):
+        region1 = Region(0, 1, None, None)
+        region2 = Region(2, 2, None, None)
+        region3 = Region(2, 4, None, None)
+        region4 = Region(6, 8, None, None)
+        document.add(region3)
+        document.add_regions([region4, region2, region1])
+        assert [e.region for e in document] == [region1, region2, region3, region4]
+
+    def test_add_regions_same_order_as_add(self):
+        regions = [Region(1, 2), Region(1, 1), Region(1, 1), Region(0, 1)]
+        one_by_one = Document('ABCDEFGH', '/the/path')
+        for region in regions:
+            one_by_one.add(region)
+        bulk = Document('ABCDEFGH', '/the/path')
+        bulk.add_regions(regions)
+        compare(bulk.regions, expected=one_by_one.regions)
+
+    def test_add_regions_overlap(self, document):
+        region1 = Region(0, 1, None, None)
+        document.add(region1)
+        with pytest.raises(ValueError) as excinfo:
+            document.add_regions([Region(4, 5), Region(2, 4), Region(1, 3)])
+        assert str(excinfo.value) == (
+            '<Region start=1 end=3> '
+            'from line 1, column 2 to line 1, column 4 overlaps '
+            '<Region start=2 end=4> '
+            'from line 1, column 3 to line 1, column 5'
+        )
+        assert [e.region for e in document] == [region1]
+
+    def test_add_regions_out_of_bounds(self, document):
+        with pytest.raises(ValueError) as excinfo:
+            document.add_regions([Region(0, 1), Region(8, 9)])
+        assert str(excinfo.value) == (
+            '<Region start=8 end=9> '
+            'from line 1, column 9 to line 1, column 10 '
+            'goes beyond end of document'
+        )
+        assert document.regions == []
+
+    def test_parse_overlap_reported_before_parser_error(self, tmp_path: Path):
+        path = tmp_path / 'doc.txt'
+        path.write_text('ABCDEFGH')
+
+        def first(document):
+            yield Region(0, 4)
+
+        def second(document):
+            yield Region(2, 6)
+
+        def broken(document):
+            yield Region(6, 7)
+            raise Exception('parser failed')
+
+        with pytest.raises(ValueError, match=' overlaps '):
+            Document.parse(str(path), first, second, broken)
+        with pytest.raises(Exception, match='parser failed'):
+            Document.parse(str(path), first, broken, second)
+
+    def test_parse_docstrings_overlap_reported_before_parser_error(self, tmp_path: Path):
+        path = tmp_path / 'module.py'
+        path.write_text('"""\nABCDEFGH\n"""\n')
+
+        def first(document):
+            yield Region(0, 4)
+
+        def second(document):
+            yield Region(2, 6)
+
+        def broken(document):
+            raise Exception('parser failed')
+
+        with pytest.raises(ValueError, match=' overlaps '):
+            PythonDocStringDocument.parse(str(path), first, second, broken)
+        with pytest.raises(Exception, match='parser failed'):
+            PythonDocStringDocument.parse(str(path), first, broken, second)
+
+    def test_region_at(self, document):
+        region1 = Region(0, 2, None, None)
+        region2 = Region(4, 4, None, None)
+        region3 = Region(4, 6, None, None)
+        document.add_regions([region1, region3, region2])
+        compare([document.region_at(p) for p in range(-1, 9)], expected=[
+            None, region1, region1, None, None, region3, region3, None, None, None
+        ])
+        region4 = Region(7, 8, None, None)
+        document.add(region4)
+        assert document.region_at(7) is region4
+
     def test_example_path(self, document):
         document.add(Region(0, 1, None, None))
         assert [e.document for e in document] == [document]
@@ -0,0 +1,40 @@
+import pytest
+from testfixtures import compare
+
+from sybil import Document
+from sybil.text import LineIndex, LineNumberOffsets
+
+
+def naive_line_column(text, position):
+    return text.count('\n', 0, position)+1, position - text.rfind('\n', 0, position)
+
+
+@pytest.mark.parametrize('text', ['', 'x', '\n', 'a\nbc\n\ndef', '\n\nx\n'])
+def test_line_column(text):
+    index = LineIndex(text)
+    for position in range(len(text)+1):
+        compare(
+            index.line_column(position),
+            expected=naive_line_column(text, position),
+            prefix=f'position {position}',
+        )
+        compare(index.line(position), expected=naive_line_column(text, position)[0])
+
+
+def test_offset():
+    text = 'a\nbc\n\ndef'
+    index = LineIndex(text)
+    for position in range(len(text)+1):
+        line, column = index.line_column(position)
+        compare(index.offset(line-1, column-1), expected=position)
+    compare(LineNumberOffsets(text).get(1, 1), expected=3)
+
+
+def test_document_line_index():
+    document = Document('a\nb\n', 'path')
+    index = document.line_index
+    assert document.line_index is index
+    compare(document.line_column(2), expected='line 2, column 1')
+    document.text = 'a\n\nb\n'
+    assert document.line_index is not index
+    compare(document.line_column(3), expected='line 3, column 1')
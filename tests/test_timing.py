@@ -0,0 +1,84 @@
+from pathlib import Path
+import unittest
+
+import pytest
+from testfixtures import compare
+
+from sybil import Sybil
+from sybil.document import Document, PythonDocStringDocument
+from sybil.parsers.rest import DocTestParser, PythonCodeBlockParser
+from sybil.timing import Timings
+from .helpers import run_pytest, sample_path, write_config, PYTEST
+
+
+def test_document_parse():
+    document = Document.parse(
+        sample_path('doctest.txt'), DocTestParser(), PythonCodeBlockParser()
+    )
+    assert document.read_time is not None
+    compare(
+        [(timing.name, timing.regions) for timing in document.parser_timings],
+        expected=[('DocTestParser', 5), ('PythonCodeBlockParser', 0)],
+    )
+    assert document.parse_time >= sum(t.seconds for t in document.parser_timings)
+
+
+def test_docstring_document_parse():
+    document = PythonDocStringDocument.parse(sample_path('docstrings.py'), DocTestParser())
+    compare(
+        [(timing.name, timing.regions) for timing in document.parser_timings],
+        expected=[('DocTestParser', len(document.regions))],
+    )
+
+
+def test_example_evaluate():
+    document = Document.parse(sample_path('doctest_fail.txt'), DocTestParser())
+    first, second = document
+    assert first.wall_time is None
+    with pytest.raises(Exception):
+        first.evaluate()
+    assert first.wall_time is not None
+    assert first.cpu_time is not None
+    assert second.wall_time is None
+
+
+def test_report():
+    timings = Timings()
+    document = Document.parse(sample_path('doctest.txt'), DocTestParser())
+    timings.add_document(document)
+    examples = list(document)
+    for example in examples[:2]:
+        example.evaluate()
+        timings.add_example(example)
+    examples[0].wall_time = 2.0
+    examples[1].wall_time = 1.0
+    timings.add_example(examples[2])
+    compare(timings.slowest_examples(5), expected=examples[:2])
+    compare(timings.slowest_examples(1), expected=examples[:1])
+    report = timings.report(1).splitlines()
+    compare(report[0], expected='slowest 1 document parses:')
+    assert report[1].endswith(f'{document.path} (read {document.read_time:.3f}s; '
+                              f'DocTestParser {document.parser_timings[0].seconds:.3f}s, '
+                              f'5 regions)'), report[1]
+    compare(report[2], expected='slowest 1 example evaluations:')
+    assert report[3].startswith('   2.000s wall'), report[3]
+    assert report[3].endswith(f'{document.path} line=3 column=1'), report[3]
+
+
+def test_pytest_option(tmp_path: Path, capsys):
+    write_config(tmp_path, PYTEST, patterns="['*.rst']")
+    (tmp_path / 'doc.rst').write_text('>>> 1 + 1\n2\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-timings', '3')
+    results.out.assert_present('sybil timings')
+    results.out.assert_present('slowest 3 document parses:')
+    results.out.assert_present(f'{tmp_path / "doc.rst"} line=1 column=1')
+
+
+def test_unittest(tmp_path: Path):
+    (tmp_path / 'doc.rst').write_text('>>> 1 + 1\n2\n')
+    timings = Timings()
+    sybil = Sybil([DocTestParser()], path=str(tmp_path), pattern='*.rst')
+    suite = sybil.unittest(timings=timings)(None, None, None)
+    compare(len(timings.documents), expected=1)
+    suite.run(unittest.TestResult())
+    compare([e.line for e in timings.slowest_examples(10)], expected=[1])
@@ -0,0 +1,96 @@
+from pathlib import Path
+
+from testfixtures import compare
+
+from sybil import Sybil
+from sybil.parsers import myst, rest
+from sybil.validation import Problem
+from .helpers import run_pytest, write_config, PYTEST
+
+
+def write_documents(path: Path) -> None:
+    (path / 'good.md').write_text('```python\nx = 1\n```\n')
+    (path / 'lexing.md').write_text(
+        '% skip: <:\n\n<!--- invisible-code-block: python\nx = 1\n'
+    )
+    (path / 'syntax.md').write_text(
+        'Text\n\n```python\nx = (\n```\n\n```python\nif True:\n    y = 1\n  z = 2\n```\n'
+    )
+
+
+def check_problems(problems, path: Path) -> None:
+    compare([(Path(p.path).name, p.line, p.message.split(':')[0]) for p in problems], expected=[
+        ('lexing.md', None, 'LexingException'),
+        ('lexing.md', None, 'ValueError'),
+        ('syntax.md', 4, 'SyntaxError'),
+        ('syntax.md', 10, 'IndentationError'),
+    ])
+    assert str(problems[2]).startswith(f"{path / 'syntax.md'}, line 4: SyntaxError: ")
+
+
+def test_validate(tmp_path: Path):
+    write_documents(tmp_path)
+    sybil = Sybil([myst.PythonCodeBlockParser(), myst.SkipParser()],
+                  path=str(tmp_path), pattern='*.md')
+    check_problems(sybil.validate(processes=1), tmp_path)
+    check_problems(sybil.validate(processes=2), tmp_path)
+
+
+def test_validate_overlap(tmp_path: Path):
+    (tmp_path / 'doc.rst').write_text('.. code-block:: python\n\n    >>> 1\n    1\n')
+    sybil = Sybil([rest.PythonCodeBlockParser(), rest.DocTestParser()],
+                  path=str(tmp_path), pattern='*.rst')
+    problem, = sybil.validate()
+    assert problem.message.startswith('ValueError: <Region start=0 end=39'), problem
+    assert ' overlaps <Region start=' in problem.message, problem
+
+
+def test_validate_skips(tmp_path: Path):
+    (tmp_path / 'doc.rst').write_text(
+        '.. skip: bogus\n\n'
+        '.. skip: next if(1 +)\n\n'
+        '.. skip: start if(True, reason="ok")\n\n'
+        '.. skip: end if(True)\n\n'
+        '.. skip: next "fine"\n'
+    )
+    sybil = Sybil([rest.SkipParser()], path=str(tmp_path), pattern='*.rst')
+    problems = sybil.validate(processes=1)
+    path = str(tmp_path / 'doc.rst')
+    compare([(p.path, p.line, p.message.split(':')[0]) for p in problems], expected=[
+        (path, 1, 'ValueError'),
+        (path, 3, 'SyntaxError'),
+        (path, 7, 'ValueError'),
+    ])
+    compare(problems[0].message, expected='ValueError: Bad skip action: bogus')
+    compare(problems[2].message, expected="ValueError: Cannot have condition on 'skip: end'")
+
+
+def test_validate_collection(tmp_path: Path):
+    write_documents(tmp_path)
+    (tmp_path / 'doc.rst').write_text('.. code-block:: python\n\n    x = (\n')
+    collection = (
+        Sybil([myst.PythonCodeBlockParser()], path=str(tmp_path), pattern='syntax.md')
+        + Sybil([rest.PythonCodeBlockParser()], path=str(tmp_path), pattern='*.rst')
+    )
+    problems = collection.validate(processes=2)
+    compare([(p.path, p.line) for p in problems], expected=[
+        (str(tmp_path / 'syntax.md'), 4),
+        (str(tmp_path / 'syntax.md'), 10),
+        (str(tmp_path / 'doc.rst'), 3),
+    ])
+    compare(problems[1], expected=Problem(
+        str(tmp_path / 'syntax.md'),
+        'IndentationError: unindent does not match any outer indentation level',
+        10,
+    ))
+
+
+def test_pytest_option(tmp_path: Path, capsys):
+    write_config(tmp_path, PYTEST, patterns="['*.rst']",
+                 parsers='[DocTestParser(), PythonCodeBlockParser()]')
+    (tmp_path / 'fails.rst').write_text('>>> 1\n2\n')
+    (tmp_path / 'syntax.rst').write_text('.. code-block:: python\n\n    x = (\n')
+    results = run_pytest(capsys, tmp_path, '--sybil-validate')
+    compare((results.total, results.failures), expected=(2, 1), suffix=results.out.text)
+    results.out.assert_present('fails.rst::validate PASSED')
+    results.out.assert_present(f"{tmp_path / 'syntax.rst'}, line 3: SyntaxError: ")